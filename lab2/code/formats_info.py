@@ -3,7 +3,10 @@ from typing import Tuple, Dict, Any, Optional
 
 def infer_color_depth(img: Image.Image) -> int:
     """Паспрабаваць вывесці глыбіню колеру ў бітах (total bits per pixel)."""
-    mode = img.mode
+    return color_depth_for_mode(img.mode)
+
+def color_depth_for_mode(mode: str) -> int:
+    """Глыбіня колеру па рэжыме PIL (без адкрыцця файла)."""
     if mode == "1":
         return 1
     if mode in ("L", "P"):
@@ -15,7 +18,7 @@ def infer_color_depth(img: Image.Image) -> int:
     if mode == "CMYK":
         return 32
     try:
-        bands = len(img.getbands())
+        bands = Image.getmodebands(mode)
         return bands * 8
     except Exception:
         return 0
@@ -25,14 +28,16 @@ def get_dpi(img: Image.Image) -> Tuple[Optional[float], Optional[float]]:
     info = img.info
     dpi = info.get("dpi")
     if isinstance(dpi, tuple) and len(dpi) == 2:
-        return dpi[0], dpi[1]
+        # TIFF аддае IFDRational, які не фарматуецца праз f"{dpi:.1f}"
+        return float(dpi[0]), float(dpi[1])
     try:
         if hasattr(img, "tag_v2"):
             tag = img.tag_v2
             x = tag.get(282)  # XResolution
             y = tag.get(283)  # YResolution
             unit = tag.get(296)  # ResolutionUnit
-            if x and y:
+            # 1 - адносныя адзінкі (толькі прапорцыі пікселя), гэта не DPI
+            if x and y and unit != 1:
                 def rational_to_float(v):
                     try:
                         return float(v)
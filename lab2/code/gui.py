@@ -1,34 +1,71 @@
 import sys
 import os
+import queue
+import threading
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout,
-                             QPushButton, QLabel, QTableWidget, QTableWidgetItem,
+                             QPushButton, QLabel, QTableView, QAbstractItemView,
                              QTextEdit, QProgressBar, QFileDialog, QMessageBox,
                              QWidget, QHeaderView, QTabWidget,
-                             QLineEdit, QGroupBox, QFrame)
+                             QLineEdit, QGroupBox, QFrame, QComboBox)
 from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer
-from PyQt6.QtGui import QFont, QPalette, QColor
+from PyQt6.QtGui import QFont
 from image_analyzer import ImageAnalyzer
+from metadata_index import DEFAULT_INDEX_PATH
+from read_backends import BACKENDS
+from results_model import ResultsTableModel
+
+# Колькі пакетаў вынікаў можа чакаць адлюстравання; калі чарга поўная,
+# аналіз прыпыняецца, пакуль інтэрфейс яе не разбярэ
+RESULT_QUEUE_BATCHES = 8
 
 class AnalysisThread(QThread):
     """Асобны паток для апрацоўкі малюнкаў"""
     progress = pyqtSignal(int, int, str)  # бягучы, усяго, імя файла
-    finished = pyqtSignal(dict)  # вынікі
+    batch_ready = pyqtSignal()  # у чарзе batches з'явіўся пакет вынікаў
+    finished = pyqtSignal(dict)  # зводка або памылка
 
-    def __init__(self, folder_path):
+    def __init__(self, folder_path, backend="auto"):
         super().__init__()
         self.folder_path = folder_path
-        self.analyzer = ImageAnalyzer(max_workers=6)
+        self.analyzer = ImageAnalyzer(index_path=DEFAULT_INDEX_PATH, backend=backend)
+        self.batches = queue.Queue(maxsize=RESULT_QUEUE_BATCHES)
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        """Спыніць аналіз пасля бягучага пакета"""
+        self._stop_event.set()
 
     def run(self):
         try:
-            results = self.analyzer.analyze_folder(
+            stream = self.analyzer.iter_folder(
                 self.folder_path,
                 lambda current, total, filename: self.progress.emit(current, total, filename)
             )
-            self.finished.emit(results)
+            try:
+                while not self._stop_event.is_set():
+                    try:
+                        batch = next(stream)
+                    except StopIteration as done:
+                        self.finished.emit({'summary': done.value})
+                        return
+                    if not self._put(batch):
+                        return
+            finally:
+                # Адмяняе чытанне, якое яшчэ не пачалося, і закрывае індэкс
+                stream.close()
         except Exception as e:
             self.finished.emit({'error': str(e)})
 
+    def _put(self, batch):
+        while not self._stop_event.is_set():
+            try:
+                self.batches.put(batch, timeout=0.1)
+            except queue.Full:
+                continue
+            self.batch_ready.emit()
+            return True
+        return False
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -236,9 +273,20 @@ class MainWindow(QMainWindow):
         self.export_btn.clicked.connect(self.export_results)
         self.export_btn.setEnabled(False)
 
+        # Спосаб чытання файлаў (гл. read_backends.py)
+        backend_label = QLabel("⚙️ Чытанне:")
+        backend_label.setStyleSheet("font-weight: bold; color: #2c3e50; font-size: 11px;")
+        self.backend_combo = QComboBox()
+        for name, title in BACKENDS.items():
+            self.backend_combo.addItem(title, name)
+        self.backend_combo.setToolTip("Патокі - для сеткавых дыскаў, працэсы - для лакальных "
+                                      "дыскаў і вялікіх тэчак; аўтаматычна - па замеры затрымкі")
+
         buttons_layout.addWidget(self.analyze_btn)
         buttons_layout.addWidget(self.export_btn)
         buttons_layout.addStretch()
+        buttons_layout.addWidget(backend_label)
+        buttons_layout.addWidget(self.backend_combo)
 
         # Інфармацыя пра абраную папку - кампактная
         self.folder_info = QLabel("Папка не абраная")
@@ -380,17 +428,26 @@ class MainWindow(QMainWindow):
         table_title = QLabel("📊 Вынікі аналізу малюнкаў")
         table_title.setStyleSheet("font-weight: bold; color: #2c3e50; font-size: 12px; margin-bottom: 5px;")
 
-        # Табліца вынікаў - ВЯЛІКАЯ, займае ўсё месца
-        self.results_table = QTableWidget()
-        self.results_table.setColumnCount(10)  # Зменена з 9 на 10
-        self.results_table.setHorizontalHeaderLabels([
-            "📁 Імя файла", "📏 Памер", "🎯 DPI", "🎨 Глыбіня",
-            "💾 Сціск", "🖼️ Фармат", "📊 Файл", "🔢 Квантаванне", "📂 Шлях", "✅ Статус"
-        ])
+        # Фільтр па імені, фармаце і шляху - з затрымкай, каб не фільтраваць пасля кожнай літары
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("🔍 Фільтр па імені, фармаце або шляху...")
+        self.filter_edit.setClearButtonEnabled(True)
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(200)
+        self.filter_timer.timeout.connect(self.apply_filter)
+        self.filter_edit.textChanged.connect(self.filter_timer.start)
+
+        # Табліца вынікаў - ВЯЛІКАЯ, займае ўсё месца; мадэль малюе толькі бачныя радкі
+        # Сартаванне па загалоўку і фільтр выконвае сама слупковая мадэль, без проксі
+        self.results_model = ResultsTableModel(self)
+        self.results_table = QTableView()
+        self.results_table.setModel(self.results_model)
+        self.results_table.verticalHeader().setDefaultSectionSize(24)
 
         # Стылізацыя табліцы
         self.results_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: white;
                 alternate-background-color: #f8f9fa;
                 gridline-color: #e0e0e0;
@@ -399,12 +456,12 @@ class MainWindow(QMainWindow):
                 color: #333333;
                 font-size: 11px;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 4px;
                 border-bottom: 1px solid #f0f0f0;
                 color: #333333;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #d6eaf8;
                 color: #2c3e50;
             }
@@ -421,10 +478,15 @@ class MainWindow(QMainWindow):
         # Налады табліцы
         self.results_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
         self.results_table.setAlternatingRowColors(True)
-        self.results_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.results_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        # Без індыкатара радкі ідуць у парадку прыходу; сартаванне - пстрычкай па загалоўку
+        self.results_table.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.results_table.setSortingEnabled(True)
         self.results_table.doubleClicked.connect(self.show_file_details)
 
         # Аўтаматычнае размеркаванне шырыні слупкоў
+        # Шырыня па змесціве толькі бачных радкоў, а не ўсёй мадэлі
+        self.results_table.horizontalHeader().setResizeContentsPrecision(0)
         self.results_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)  # Імя
         self.results_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)  # Памер
         self.results_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeMode.ResizeToContents)  # DPI
@@ -438,6 +500,7 @@ class MainWindow(QMainWindow):
         self.results_table.horizontalHeader().setSectionResizeMode(8, QHeaderView.ResizeMode.Stretch)  # Шлях
 
         layout.addWidget(table_title, stretch=0)
+        layout.addWidget(self.filter_edit, stretch=0)
         layout.addWidget(self.results_table, stretch=1)  # Табліца займае ўсё месца
         self.table_tab.setLayout(layout)
 
@@ -575,6 +638,7 @@ class MainWindow(QMainWindow):
         self.analyze_btn.setEnabled(False)
         self.browse_btn.setEnabled(False)
         self.export_btn.setEnabled(False)
+        self.backend_combo.setEnabled(False)
 
         # Налады прагрэсу
         self.progress_bar.setVisible(True)
@@ -592,9 +656,14 @@ class MainWindow(QMainWindow):
             }
         """)
 
+        # Вынікі дадаюцца ў табліцу па меры гатоўнасці
+        self.current_results = {'results': []}
+        self.results_model.clear()
+
         # Запуск у асобным патоку
-        self.analysis_thread = AnalysisThread(folder_path)
+        self.analysis_thread = AnalysisThread(folder_path, self.backend_combo.currentData())
         self.analysis_thread.progress.connect(self.update_progress)
+        self.analysis_thread.batch_ready.connect(self.drain_results)
         self.analysis_thread.finished.connect(self.analysis_finished)
         self.analysis_thread.start()
 
@@ -610,14 +679,31 @@ class MainWindow(QMainWindow):
             short_filename = "..." + filename[-27:]
         self.progress_details.setText(f"{current}/{total} ({percent:.1f}%) | {short_filename}")
 
+    def drain_results(self):
+        """Дадаць у табліцу ўсе пакеты, што чакаюць у чарзе аналізу"""
+        if self.analysis_thread is None:
+            return
+        records = []
+        while True:
+            try:
+                records.extend(self.analysis_thread.batches.get_nowait())
+            except queue.Empty:
+                break
+        if records:
+            self.current_results['results'].extend(records)
+            self.results_model.append(records)
+
     def analysis_finished(self, results):
         """Апрацоўка завяршэння аналізу"""
-        self.current_results = results
+        self.drain_results()
+        if 'summary' in results:
+            self.current_results['summary'] = results['summary']
 
         # Разблакіроўка элементаў кіравання
         self.analyze_btn.setEnabled(True)
         self.browse_btn.setEnabled(True)
         self.export_btn.setEnabled(True)
+        self.backend_combo.setEnabled(True)
 
         if 'error' in results:
             QMessageBox.critical(self, "❌ Памылка", results['error'])
@@ -634,8 +720,10 @@ class MainWindow(QMainWindow):
                 }
             """)
         else:
-            self.display_results(results)
-            self.status_label.setText(f"✅ Завершана: {len(results['results'])}")
+            # Радкі, што прыйшлі пасля сартавання, становяцца на свае месцы
+            self.results_model.resort()
+            self.update_stats(self.current_results)
+            self.status_label.setText(f"✅ Завершана: {len(self.current_results['results'])}")
             self.status_label.setStyleSheet("""
                 QLabel {
                     font-size: 10px;
@@ -650,54 +738,22 @@ class MainWindow(QMainWindow):
             self.export_btn.setEnabled(True)
 
         self.progress_bar.setVisible(False)
-        self.statusBar().showMessage("✅ Аналіз завершаны")
+        summary = results.get('summary', {})
+        if 'files_per_second' in summary:
+            self.statusBar().showMessage(f"✅ Аналіз завершаны: {summary['elapsed']:.2f} с, "
+                                         f"{summary['files_per_second']:.0f} файлаў/с ({summary['backend']})")
+        else:
+            self.statusBar().showMessage("✅ Аналіз завершаны")
 
     def display_results(self, results):
         """Адлюстраваць вынікі ў табліцы"""
-        self.results_table.setRowCount(0)
-
-        for i, result in enumerate(results['results']):
-            self.results_table.insertRow(i)
-
-            # Эмаджы для статуса
-            status_icon = "✅" if 'error' not in result else "❌"
-            status_text = "OK" if 'error' not in result else result['error'][:20] + "..."
-
-            # Інфармацыя пра квантаванне
-            quantization = result.get('quantization_short', 'N/A')
-
-            # Запаўненне радка
-            items = [
-                result.get('filename', 'N/A'),
-                result.get('image_size', 'N/A'),
-                result.get('dpi', '72 DPI'),
-                result.get('color_depth', 'N/A'),
-                result.get('compression', 'N/A'),
-                result.get('image_format', 'N/A'),
-                result.get('file_size', 'N/A'),
-                quantization,  # Новы слупок з квантаваннем
-                result.get('file_path', 'N/A'),
-                f"{status_icon} {status_text}"
-            ]
-
-            for col, text in enumerate(items):
-                item = QTableWidgetItem(str(text))
-                item.setTextAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
-
-                if 'error' in result:
-                    item.setBackground(QColor(255, 235, 238))
-                    item.setForeground(QColor(192, 57, 43))
-                elif i % 2 == 0:
-                    item.setBackground(QColor(245, 245, 245))
-                    item.setForeground(QColor(51, 51, 51))
-                else:
-                    item.setBackground(QColor(255, 255, 255))
-                    item.setForeground(QColor(51, 51, 51))
-
-                self.results_table.setItem(i, col, item)
-
+        self.results_model.set_records(results['results'])
+        self.results_model.resort()
         self.update_stats(results)
 
+    def apply_filter(self):
+        self.results_model.set_filter(self.filter_edit.text())
+
     def update_stats(self, results):
         """Абнавіць укладку статыстыкі"""
         from image_analyzer import ImageAnalyzer
@@ -711,7 +767,13 @@ class MainWindow(QMainWindow):
             stats_text += f"Агульная інфармацыя:\n"
             stats_text += f"• Папка: {summary.get('folder_path', 'N/A')}\n"
             stats_text += f"• Усяго файлаў: {summary.get('total_files', 0)}\n"
-            stats_text += f"• Апрацавана: {summary.get('processed', 0)}\n\n"
+            stats_text += f"• Апрацавана: {summary.get('processed', 0)}\n"
+            stats_text += f"• З індэкса: {summary.get('from_index', 0)}\n"
+            stats_text += f"• Прачытана нанова: {summary.get('reanalyzed', 0)}\n"
+            stats_text += f"• Выдалена з індэкса: {summary.get('removed', 0)}\n"
+            stats_text += f"• Чытанне: {summary.get('backend', 'N/A')}\n"
+            stats_text += f"• Час: {summary.get('elapsed', 0):.2f} с "
+            stats_text += f"({summary.get('files_per_second', 0):.0f} файлаў/с)\n\n"
 
         stats_text += f"Вынікі апрацоўкі:\n"
         stats_text += f"• Паспяхова: {stats.get('successful', 0)}\n"
@@ -726,7 +788,9 @@ class MainWindow(QMainWindow):
 
     def show_file_details(self, index):
         """Паказаць дэтальныя звесткі пра файл"""
-        row = index.row()
+        if not index.isValid():
+            return
+        row = self.results_model.record_index(index.row())
         if not self.current_results or row >= len(self.current_results['results']):
             return
 
@@ -810,8 +874,10 @@ class MainWindow(QMainWindow):
     def closeEvent(self, event):
         """Апрацоўка закрыцця акна"""
         if self.analysis_thread and self.analysis_thread.isRunning():
-            self.analysis_thread.terminate()
-            self.analysis_thread.wait()
+            self.analysis_thread.stop()
+            if not self.analysis_thread.wait(5000):
+                self.analysis_thread.terminate()
+                self.analysis_thread.wait()
         event.accept()
 
 # Запуск праграмы
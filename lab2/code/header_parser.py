@@ -0,0 +1,376 @@
+import struct
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+# Колькі байтаў чытаецца з пачатку файла для фарматаў з фіксаваным загалоўкам
+HEADER_BYTES = 4096
+# Найбольшы сегмент JPEG (APP1 з EXIF), які чытаецца цалкам
+MAX_SEGMENT_BYTES = 65535
+
+# Тып даных TIFF -> (памер элемента, фармат struct)
+TIFF_TYPES = {
+    1: (1, "B"), 2: (1, "s"), 3: (2, "H"), 4: (4, "L"), 5: (8, "LL"),
+    6: (1, "b"), 7: (1, "s"), 8: (2, "h"), 9: (4, "l"), 10: (8, "ll"),
+    11: (4, "f"), 12: (8, "d"),
+}
+TIFF_COMPRESSION = {
+    1: "None",
+    5: "LZW",
+    6: "JPEG",
+    7: "JPEG (Old-style)",
+    8: "Deflate",
+    32946: "Deflate (Adobe)"
+}
+EXIF_IFD_TAG = 34665
+
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+JPEG_PROGRESSIVE_MARKERS = {0xC2, 0xC6, 0xCA, 0xCE}
+
+
+class HeaderError(Exception):
+    """Загаловак не распазнаны: трэба чытаць файл праз PIL"""
+
+
+def read_header(file_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Прачытаць метаданыя толькі з загалоўка файла, не дэкадуючы пікселі.
+    Вяртаем слоўнік з палямі format, mode, width, height, dpi, compression
+    і спецыфічнымі для фармату палямі, або None, калі фармат не
+    падтрымліваецца ці загаловак не ўдалося разабраць.
+    """
+    try:
+        with open(file_path, "rb") as f:
+            head = f.read(HEADER_BYTES)
+            if head.startswith(b"\xff\xd8"):
+                return _read_jpeg(f)
+            if head.startswith(b"\x89PNG\r\n\x1a\n"):
+                return _read_png(head)
+            if head[:6] in (b"GIF87a", b"GIF89a"):
+                return _read_gif(head)
+            if head.startswith(b"BM"):
+                return _read_bmp(head)
+            if head[:2] in (b"II", b"MM"):
+                return _read_tiff(f, head)
+            if head[:1] == b"\x0a" and len(head) >= 128:
+                return _read_pcx(f, head)
+    except (HeaderError, struct.error, OSError, ValueError, IndexError):
+        return None
+    return None
+
+
+def _read_jpeg(f: BinaryIO) -> Dict[str, Any]:
+    """Абысці сегменты JPEG да SOS: APP0 (JFIF), APP1 (EXIF), DQT і SOF"""
+    result: Dict[str, Any] = {"format": "JPEG", "quant_tables": {}}
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            raise HeaderError("пашкоджаны маркер JPEG")
+        code = marker[1]
+        while code == 0xFF:
+            code = f.read(1)[0]
+        if code == 0xD8 or 0xD0 <= code <= 0xD7 or code == 0x01:
+            continue
+        if code in (0xD9, 0xDA):
+            break
+
+        length = struct.unpack(">H", f.read(2))[0] - 2
+        if code in (0xE0, 0xE1, 0xDB) or code in JPEG_SOF_MARKERS:
+            data = f.read(min(length, MAX_SEGMENT_BYTES))
+        else:
+            f.seek(length, 1)
+            continue
+
+        if code == 0xE0 and data.startswith(b"JFIF\x00") and len(data) >= 12:
+            unit, x_density, y_density = struct.unpack(">BHH", data[7:12])
+            if unit == 1:
+                result["dpi"] = (x_density, y_density)
+            elif unit == 2:
+                result["dpi"] = (x_density * 2.54, y_density * 2.54)
+        elif code == 0xE1 and data.startswith(b"Exif\x00\x00") and "exif" not in result:
+            result["exif_ifd0"], result["exif"] = _read_exif(data[6:])
+        elif code == 0xDB:
+            offset = 0
+            while offset < len(data):
+                precision, table_id = data[offset] >> 4, data[offset] & 0x0F
+                result["quant_tables"][table_id] = 64
+                offset += 1 + 64 * (2 if precision else 1)
+        elif code in JPEG_SOF_MARKERS:
+            bits, height, width, components = struct.unpack(">BHHB", data[:6])
+            mode = {1: "L", 3: "RGB", 4: "CMYK"}.get(components)
+            if mode is None or bits != 8:
+                raise HeaderError("непадтрымоўваны SOF")
+            result.update(width=width, height=height, mode=mode,
+                          progressive=code in JPEG_PROGRESSIVE_MARKERS)
+
+    if "width" not in result:
+        raise HeaderError("няма SOF")
+
+    # Як у PIL: без JFIF-шчыльнасці дазвол бярэцца з EXIF, а калі там няма
+    # XResolution ці ResolutionUnit - прымаюцца прадвызначаныя 72 DPI
+    if "dpi" not in result and "exif_ifd0" in result:
+        ifd0 = result["exif_ifd0"]
+        if 282 in ifd0 and 296 in ifd0:
+            dpi = _to_float(ifd0[282])
+            if ifd0[296] == 3:
+                dpi *= 2.54
+            result["dpi"] = (dpi, dpi)
+        else:
+            result["dpi"] = (72, 72)
+
+    result["compression"] = "JPEG (progressive)" if result.pop("progressive") else "JPEG (baseline)"
+    return result
+
+
+def _read_png(head: bytes) -> Dict[str, Any]:
+    """IHDR, pHYs, PLTE і eXIf да першага IDAT"""
+    result: Dict[str, Any] = {"format": "PNG", "compression": "deflate/zlib"}
+    offset = 8
+    while offset + 8 <= len(head):
+        length, chunk_type = struct.unpack(">I4s", head[offset:offset + 8])
+        data = head[offset + 8:offset + 8 + length]
+        if chunk_type == b"IDAT" or chunk_type == b"IEND":
+            break
+
+        if chunk_type == b"IHDR":
+            width, height, bits, color_type = struct.unpack(">IIBB", data[:10])
+            mode = _png_mode(bits, color_type)
+            if mode is None:
+                raise HeaderError("непадтрымоўваны тып колеру PNG")
+            result.update(width=width, height=height, mode=mode)
+        elif chunk_type == b"pHYs" and len(data) == 9:
+            px, py, unit = struct.unpack(">IIB", data)
+            if unit == 1:
+                result["dpi"] = (px * 0.0254, py * 0.0254)
+        elif chunk_type == b"eXIf" and len(data) == length:
+            result["exif_ifd0"], result["exif"] = _read_exif(data)
+
+        offset += 12 + length
+
+    if "width" not in result:
+        raise HeaderError("няма IHDR")
+    return result
+
+
+def _png_mode(bits: int, color_type: int) -> Optional[str]:
+    if color_type == 0:
+        return {1: "1", 2: "L", 4: "L", 8: "L", 16: "I;16"}.get(bits)
+    if color_type == 2 and bits in (8, 16):
+        return "RGB"
+    if color_type == 3 and bits in (1, 2, 4, 8):
+        return "P"
+    if color_type == 4 and bits in (8, 16):
+        return "LA"
+    if color_type == 6 and bits in (8, 16):
+        return "RGBA"
+    return None
+
+
+def _read_gif(head: bytes) -> Dict[str, Any]:
+    """
+    Лагічны экран і глабальная палітра. Колькасць кадраў без чытання
+    ўсяго файла не вызначаецца.
+    """
+    width, height, flags = struct.unpack("<HHB", head[6:11])
+    result: Dict[str, Any] = {"format": "GIF", "width": width, "height": height, "mode": "P",
+                              "compression": "LZW (GIF)"}
+    if flags & 0x80:
+        colors = 2 << (flags & 0x07)
+        palette = head[13:13 + 3 * colors]
+        if len(palette) < 3 * colors:
+            raise HeaderError("палітра GIF за межамі загалоўка")
+        # Палітра 0, 1, 2, ... адценняў шэрага азначае рэжым "L", як у PIL
+        if all(palette[3 * i:3 * i + 3] == bytes((i,)) * 3 for i in range(colors)):
+            result["mode"] = "L"
+        else:
+            result["palette_colors"] = colors
+    return result
+
+
+def _read_bmp(head: bytes) -> Dict[str, Any]:
+    """BITMAPFILEHEADER і DIB-загаловак (BITMAPINFOHEADER і навейшыя)"""
+    header_size = struct.unpack("<I", head[14:18])[0]
+    if header_size < 40:
+        raise HeaderError("загаловак OS/2 BMP")
+
+    width, height, planes, bits, compression = struct.unpack("<iiHHI", head[18:34])
+    x_ppm, y_ppm, colors_used = struct.unpack("<iiI", head[38:50])
+    result: Dict[str, Any] = {"format": "BMP", "width": width, "height": abs(height),
+                              "compression": compression}
+    if x_ppm and y_ppm:
+        result["dpi"] = (x_ppm / 39.3701, y_ppm / 39.3701)
+
+    if bits in (24, 16) or (bits == 32 and compression == 0):
+        result["mode"] = "RGB"
+    elif bits <= 8 and compression == 0:
+        colors = colors_used or (1 << bits)
+        palette_offset = 14 + header_size
+        palette = head[palette_offset:palette_offset + 4 * colors]
+        if len(palette) < 4 * colors:
+            raise HeaderError("палітра BMP за межамі загалоўка")
+        # Як у PIL: палітра 0, 1, 2, ... (або 0, 255 для двух колераў) - адценні шэрага
+        levels = [0, 255] if colors == 2 else range(colors)
+        gray = all(palette[4 * i:4 * i + 3] == bytes((level,)) * 3 for i, level in enumerate(levels))
+        if gray:
+            result["mode"] = "1" if colors == 2 else "L"
+        else:
+            result["mode"] = "P"
+    else:
+        raise HeaderError("непадтрымоўваны варыянт BMP")
+    return result
+
+
+def _read_pcx(f: BinaryIO, head: bytes) -> Dict[str, Any]:
+    """128-байтавы загаловак PCX; для 8-бітных выяў - палітра ў канцы файла"""
+    version, bits = head[1], head[3]
+    x_min, y_min, x_max, y_max, h_dpi, v_dpi = struct.unpack("<HHHHHH", head[4:16])
+    planes = head[65]
+    if version not in (0, 2, 3, 5):
+        raise HeaderError("непадтрымоўваная версія PCX")
+
+    result: Dict[str, Any] = {"format": "PCX", "width": x_max - x_min + 1, "height": y_max - y_min + 1,
+                              "dpi": (h_dpi, v_dpi), "compression": "RLE/PCX"}
+    if bits == 1 and planes == 1:
+        result["mode"] = "1"
+    elif bits == 1 and planes in (2, 4):
+        result["mode"] = "P"
+    elif version == 5 and bits == 8 and planes == 3:
+        result["mode"] = "RGB"
+    elif version == 5 and bits == 8 and planes == 1:
+        # Палітра (256 колераў пасля байта 0x0C) захоўваецца ў канцы файла
+        f.seek(-769, 2)
+        palette = f.read(769)
+        gray = len(palette) != 769 or palette[0] != 0x0C or \
+            all(palette[1 + 3 * i:4 + 3 * i] == bytes((i,)) * 3 for i in range(256))
+        result["mode"] = "L" if gray else "P"
+    else:
+        raise HeaderError("непадтрымоўваны варыянт PCX")
+    return result
+
+
+def _read_tiff(f: BinaryIO, head: bytes) -> Dict[str, Any]:
+    """Першы IFD: памеры, фотаметрыя, біты на ўзор, сціск і дазвол"""
+    byte_order = "<" if head[:2] == b"II" else ">"
+    magic, ifd_offset = struct.unpack(byte_order + "HI", head[2:8])
+    if magic != 42:
+        raise HeaderError("BigTIFF або не TIFF")
+
+    tags = _read_ifd(f, None, byte_order, ifd_offset)
+    width, height = _first(tags.get(256)), _first(tags.get(257))
+    if not width or not height:
+        raise HeaderError("няма памераў TIFF")
+
+    photometric = _first(tags.get(262))
+    bits = tags.get(258, (1,))
+    bits = bits if isinstance(bits, tuple) else (bits,)
+    samples = _first(tags.get(277)) or 1
+    extra = tags.get(338)
+    mode = _tiff_mode(photometric, bits[0], samples, extra, _first(tags.get(339)) or 1)
+    if mode is None:
+        raise HeaderError("непадтрымоўваны тып TIFF")
+
+    compression = _first(tags.get(259)) or 1
+    result: Dict[str, Any] = {
+        "format": "TIFF", "width": width, "height": height, "mode": mode,
+        "compression": TIFF_COMPRESSION.get(compression, f"TIFF Compression code {compression}"),
+        "tiff_tags": tags,
+    }
+    # ResolutionUnit 1 - адносныя адзінкі без DPI, як у PIL. Без тэгаў дазволу
+    # PIL паведамляе 1 × 1 DPI, а тут дазвол застаецца невызначаным
+    unit = _first(tags.get(296))
+    if 282 in tags and 283 in tags and unit != 1:
+        x_dpi, y_dpi = _to_float(tags[282]), _to_float(tags[283])
+        if unit == 3:
+            x_dpi, y_dpi = x_dpi * 2.54, y_dpi * 2.54
+        result["dpi"] = (x_dpi, y_dpi)
+    return result
+
+
+def _tiff_mode(photometric: Optional[int], bits: int, samples: int, extra: Any, sample_format: int) -> Optional[str]:
+    if sample_format != 1:
+        return None
+    if photometric in (0, 1) and samples == 1:
+        return {1: "1", 8: "L", 16: "I;16"}.get(bits)
+    if photometric in (0, 1) and samples == 2 and bits == 8:
+        return "LA"
+    if photometric == 2 and bits == 8:
+        if samples == 3:
+            return "RGB"
+        if samples == 4:
+            return "RGBA" if _first(extra) in (1, 2) else "RGBX"
+    if photometric == 3 and samples == 1 and bits in (1, 2, 4, 8):
+        return "P"
+    if photometric == 5 and samples == 4 and bits == 8:
+        return "CMYK"
+    return None
+
+
+def _read_exif(data: bytes) -> Tuple[Dict[int, Any], Dict[int, Any]]:
+    """
+    EXIF з буфера (TIFF-структура): IFD0 асобна, і IFD0 разам з Exif
+    sub-IFD, як у PIL _getexif.
+    """
+    byte_order = "<" if data[:2] == b"II" else ">"
+    if data[:2] not in (b"II", b"MM"):
+        raise HeaderError("няма TIFF-загалоўка ў EXIF")
+
+    ifd0 = _read_ifd(None, data, byte_order, struct.unpack(byte_order + "I", data[4:8])[0])
+    merged = dict(ifd0)
+    if EXIF_IFD_TAG in ifd0:
+        merged.update(_read_ifd(None, data, byte_order, _first(ifd0[EXIF_IFD_TAG])))
+    return ifd0, merged
+
+
+def _read_ifd(f: Optional[BinaryIO], data: Optional[bytes], byte_order: str, offset: int) -> Dict[int, Any]:
+    """Запісы аднаго IFD з файла f (з адвольнага зрушэння) або з буфера data"""
+
+    def read(at: int, size: int) -> bytes:
+        if data is not None:
+            chunk = data[at:at + size]
+        else:
+            f.seek(at)
+            chunk = f.read(size)
+        if len(chunk) < size:
+            raise HeaderError("IFD за межамі файла")
+        return chunk
+
+    count = struct.unpack(byte_order + "H", read(offset, 2))[0]
+    entries = read(offset + 2, 12 * count)
+    tags: Dict[int, Any] = {}
+
+    for i in range(count):
+        tag, type_id, value_count, value_field = struct.unpack(byte_order + "HHI4s", entries[12 * i:12 * i + 12])
+        if type_id not in TIFF_TYPES:
+            continue
+        item_size, item_format = TIFF_TYPES[type_id]
+        size = item_size * value_count
+        if size <= 4:
+            raw = value_field[:size]
+        elif size > MAX_SEGMENT_BYTES:
+            continue
+        else:
+            raw = read(struct.unpack(byte_order + "I", value_field)[0], size)
+        tags[tag] = _decode_tiff_value(raw, type_id, value_count, byte_order)
+
+    return tags
+
+
+def _decode_tiff_value(raw: bytes, type_id: int, count: int, byte_order: str) -> Any:
+    if type_id == 2:
+        return raw.split(b"\x00", 1)[0].decode("latin-1")
+    if type_id == 7:
+        return raw
+
+    _, item_format = TIFF_TYPES[type_id]
+    values: List[Any] = list(struct.unpack(byte_order + item_format * count, raw))
+    if type_id in (5, 10):
+        values = [numerator / denominator if denominator else 0.0
+                  for numerator, denominator in zip(values[::2], values[1::2])]
+    return values[0] if count == 1 else tuple(values)
+
+
+def _first(value: Any) -> Any:
+    return value[0] if isinstance(value, tuple) and value else value
+
+
+def _to_float(value: Any) -> float:
+    return float(_first(value))
@@ -1,65 +1,149 @@
 import os
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from metadata_reader import MetadataReader
+import time
+from metadata_index import MetadataIndex, file_key
+from read_backends import create_backend
 from datetime import datetime
 
+# Найбольшы пакет вынікаў, які аддае iter_folder
+BATCH_SIZE = 256
+# Пры павольным чытанні пакет аддаецца не радзей, чым раз на столькі секунд
+BATCH_INTERVAL = 0.25
+
+
+class AnalysisError(Exception):
+    """Тэчку немагчыма прааналізаваць (няма тэчкі або малюнкаў у ёй)"""
+
+
 class ImageAnalyzer:
     """Клас для масавага аналізу малюнкаў"""
 
-    def __init__(self, max_workers=4):
+    def __init__(self, max_workers=None, index_path=None, backend="auto"):
+        # None - колькасць работнікаў выбірае бэкенд (ад колькасці ядраў)
         self.max_workers = max_workers
+        # "threads", "processes" або "auto" (гл. read_backends.py)
+        self.backend = backend
+        # Шлях да індэкса SQLite; None - кожны аналіз чытае ўсе файлы
+        self.index_path = index_path
         self.supported_formats = {'.jpg', '.jpeg', '.gif', '.tif', '.tiff', '.bmp', '.png', '.pcx'}
 
     def analyze_folder(self, folder_path, progress_callback=None):
         """Прааналізаваць усю папку з малюнкамі"""
+        results = []
+        try:
+            stream = self.iter_folder(folder_path, progress_callback)
+            while True:
+                results.extend(next(stream))
+        except StopIteration as done:
+            summary = done.value
+        except AnalysisError as e:
+            return {"error": str(e)}
+
+        return {'summary': summary, 'results': results}
+
+    def iter_folder(self, folder_path, progress_callback=None, batch_size=BATCH_SIZE):
+        """
+        Генератар вынікаў аналізу: спісы метаданых па меры гатоўнасці (не
+        больш за batch_size запісаў або BATCH_INTERVAL секунд чакання на
+        пакет). Спачатку ідуць вынікі з індэкса, потым прачытаныя файлы.
+        Зводка вяртаецца як значэнне генератара (StopIteration.value).
+
+        Чытанне ідзе толькі наперадзе спажыўца на абмежаванае акно задач,
+        таму павольны спажывец прыпыняе аналіз, а не збірае вынікі ў памяці.
+        """
         if not os.path.exists(folder_path):
-            return {"error": "Папка не існуе"}
+            raise AnalysisError("Папка не існуе")
 
-        image_files = self._find_image_files(folder_path)
+        started = time.perf_counter()
+        folder_path = os.path.abspath(folder_path)
+        image_files = self._scan_image_files(folder_path)
         total_files = len(image_files)
 
         if total_files == 0:
-            return {"error": "Малюнкі не знойдзены"}
-
-        results = []
-        completed = 0
-
-        # Выкарыстанне шматпаточнасці для хуткасці
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            future_to_file = {
-                executor.submit(MetadataReader.get_image_metadata, file_path): file_path
-                for file_path in image_files
-            }
-
-            for future in as_completed(future_to_file):
-                file_path = future_to_file[future]
-                try:
-                    metadata = future.result()
-                    metadata['file_path'] = file_path
-                    results.append(metadata)
-
-                    completed += 1
-                    if progress_callback:
-                        progress_callback(completed, total_files, os.path.basename(file_path))
-
-                except Exception as e:
-                    error_result = {
-                        'filename': os.path.basename(file_path),
-                        'error': str(e),
-                        'file_path': file_path
-                    }
-                    results.append(error_result)
-
+            raise AnalysisError("Малюнкі не знойдзены")
+
+        backend = create_backend(self.backend, self.max_workers)
+        index = MetadataIndex(self.index_path) if self.index_path is not None else None
+        keys = dict(image_files)
+        processed = from_index = removed = 0
+
+        try:
+            to_read = image_files
+            if index is not None:
+                # Нязмененыя файлы (той жа памер, mtime і inode) бяруцца з індэкса
+                indexed = index.load_keys(folder_path)
+                unchanged = []
+                to_read = []
+                for file_path, key in image_files:
+                    if key is not None and indexed.pop(file_path, None) == key:
+                        unchanged.append(file_path)
+                    else:
+                        indexed.pop(file_path, None)
+                        to_read.append((file_path, key))
+
+                for start in range(0, len(unchanged), batch_size):
+                    paths = unchanged[start:start + batch_size]
+                    records = index.fetch(paths)
+                    batch = [records[path] for path in paths if path in records]
+                    # Запісы, якія не ўдалося распакаваць, чытаюцца нанова
+                    to_read.extend((path, keys[path]) for path in paths if path not in records)
+
+                    processed += len(batch)
+                    from_index += len(batch)
+                    if batch:
+                        if progress_callback:
+                            progress_callback(processed, total_files, os.path.basename(paths[-1]))
+                        yield batch
+
+            batch = []
+            last_yield = time.perf_counter()
+            for file_path, metadata in backend.map_files([file_path for file_path, _ in to_read]):
+                batch.append(metadata)
+                processed += 1
+                if progress_callback:
+                    progress_callback(processed, total_files, os.path.basename(file_path))
+
+                if len(batch) >= batch_size or time.perf_counter() - last_yield >= BATCH_INTERVAL:
+                    self._store(index, keys, batch)
+                    yield batch
+                    batch = []
+                    last_yield = time.perf_counter()
+
+            if batch:
+                self._store(index, keys, batch)
+                yield batch
+
+            if index is not None:
+                # Запісы выдаленых файлаў выкідваюцца
+                index.remove(indexed)
+                removed = len(indexed)
+        finally:
+            if index is not None:
+                index.close()
+
+        elapsed = time.perf_counter() - started
         return {
-            'summary': {
-                'total_files': total_files,
-                'processed': len(results),
-                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'folder_path': folder_path
-            },
-            'results': results
+            'total_files': total_files,
+            'processed': processed,
+            'from_index': from_index,
+            'reanalyzed': processed - from_index,
+            'removed': removed,
+            'backend': backend.describe(),
+            'elapsed': elapsed,
+            'files_per_second': processed / elapsed if elapsed > 0 else 0.0,
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'folder_path': folder_path
         }
 
+    @staticmethod
+    def _store(index, keys, batch):
+        """Захаваць у індэксе толькі што прачытаныя файлы"""
+        if index is None:
+            return
+        # Памылкі чытання не кэшуюцца: такія файлы правяраюцца нанова
+        index.store((metadata['file_path'], keys[metadata['file_path']], metadata)
+                    for metadata in batch
+                    if 'error' not in metadata and keys.get(metadata['file_path']) is not None)
+
     def _find_image_files(self, folder_path):
         """Знайсці ўсе падтрымоўваемыя файлы малюнкаў"""
         image_files = []
@@ -73,6 +157,19 @@ class ImageAnalyzer:
 
         return image_files
 
+    def _scan_image_files(self, folder_path):
+        """Файлы малюнкаў разам з ключом (памер, mtime, inode) для індэкса"""
+        image_files = []
+
+        for file_path in self._find_image_files(folder_path):
+            try:
+                key = file_key(os.stat(file_path))
+            except OSError:
+                key = None
+            image_files.append((file_path, key))
+
+        return image_files
+
     def get_summary_stats(self, results):
         """Атрымаць статыстыку па выніках"""
         if 'results' not in results:
@@ -90,5 +187,6 @@ class ImageAnalyzer:
             'successful': len(successful),
             'errors': len(errors),
             'formats': formats,
-            'total_size': f"{sum(os.path.getsize(r['file_path']) for r in successful) / (1024*1024):.2f} MB"
+            # Памер файла ўжо ёсць у метаданых - без паўторнага stat на кожны файл
+            'total_size': f"{sum(r.get('file_size_bytes', 0) for r in successful) / (1024*1024):.2f} MB"
         }
@@ -1,6 +1,7 @@
 import sys
 import os
 import traceback
+import multiprocessing
 from PyQt6.QtWidgets import QApplication
 from gui import MainWindow
 
@@ -25,4 +26,6 @@ def main():
         return 1
 
 if __name__ == "__main__":
+    # Патрэбна для пула працэсаў у сабраным PyInstaller выкананым файле
+    multiprocessing.freeze_support()
     sys.exit(main())
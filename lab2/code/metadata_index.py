@@ -0,0 +1,110 @@
+import os
+import pickle
+import sqlite3
+from typing import Any, Dict, Iterable, Sequence, Tuple
+
+# Індэкс па змаўчанні захоўваецца ў хатняй тэчцы карыстальніка
+DEFAULT_INDEX_PATH = os.path.join(os.path.expanduser("~"), ".image_metadata_index.sqlite3")
+# Павялічваецца, калі мяняецца схема або набор палёў метаданых:
+# старыя запісы тады выкідваюцца, і файлы чытаюцца нанова
+INDEX_VERSION = 1
+# Найбольшая колькасць параметраў у адным запыце SQLite
+SQL_BATCH = 500
+
+# Памер, час змены (нс) і inode - калі адно з іх змянілася, файл чытаецца нанова
+FileKey = Tuple[int, int, int]
+
+
+def file_key(stat: os.stat_result) -> FileKey:
+    return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+
+class MetadataIndex:
+    """
+    Пастаянны індэкс метаданых у SQLite. Запіс ключуецца абсалютным шляхам
+    і захоўвае памер, mtime і inode файла разам з метаданымі (pickle), каб
+    пры паўторным аналізе тэчкі чытаць толькі новыя і змененыя файлы.
+
+    Злучэнне з базай належыць таму патоку, у якім індэкс створаны.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_INDEX_PATH):
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path, timeout=30)
+        self._ensure_schema()
+
+    def __enter__(self) -> "MetadataIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def _ensure_schema(self) -> None:
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        with self.connection:
+            if version != INDEX_VERSION:
+                self.connection.execute("DROP TABLE IF EXISTS files")
+                self.connection.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    inode INTEGER NOT NULL,
+                    metadata BLOB NOT NULL
+                )
+            """)
+
+    def load_keys(self, folder_path: str) -> Dict[str, FileKey]:
+        """Ключы файлаў для ўсіх запісаў пад тэчкай (без саміх метаданых)"""
+        prefix = os.path.join(os.path.abspath(folder_path), "")
+        # Усе шляхі з прэфіксам ляжаць у інтэрвале [prefix, prefix з наступным знакам)
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        rows = self.connection.execute(
+            "SELECT path, size, mtime_ns, inode FROM files WHERE path >= ? AND path < ?",
+            (prefix, upper)
+        )
+        return {path: (size, mtime_ns, inode) for path, size, mtime_ns, inode in rows}
+
+    def fetch(self, paths: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Метаданыя для пакета шляхоў. Запісы, якія не ўдалося распакаваць,
+        прапускаюцца - такія файлы трэба прачытаць нанова.
+        """
+        records = {}
+        for start in range(0, len(paths), SQL_BATCH):
+            chunk = paths[start:start + SQL_BATCH]
+            rows = self.connection.execute(
+                f"SELECT path, metadata FROM files WHERE path IN ({', '.join('?' * len(chunk))})",
+                chunk
+            )
+            for path, blob in rows:
+                try:
+                    records[path] = pickle.loads(blob)
+                except Exception:
+                    pass
+        return records
+
+    def store(self, entries: Iterable[Tuple[str, FileKey, Dict[str, Any]]]) -> None:
+        """Захаваць (шлях, ключ файла, метаданыя) адной транзакцыяй"""
+        rows = []
+        for path, key, metadata in entries:
+            try:
+                blob = pickle.dumps(metadata, protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception:
+                # Такі файл проста будзе прачытаны нанова пры наступным аналізе
+                continue
+            rows.append((path, *key, blob))
+
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, inode, metadata) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def remove(self, paths: Iterable[str]) -> None:
+        with self.connection:
+            self.connection.executemany("DELETE FROM files WHERE path = ?", ((path,) for path in paths))
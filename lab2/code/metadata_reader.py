@@ -2,7 +2,9 @@ from PIL import Image, ExifTags, TiffTags
 from PIL.ExifTags import TAGS
 import os
 from datetime import datetime
-from formats_info import infer_color_depth, get_dpi, get_compression_info, get_additional_info
+from formats_info import (infer_color_depth, color_depth_for_mode, get_dpi, get_compression_info,
+                          get_additional_info)
+from header_parser import read_header
 
 class MetadataReader:
     """Клас для чытання метаданых з малюнкаў"""
@@ -10,6 +12,14 @@ class MetadataReader:
     @staticmethod
     def get_image_metadata(file_path):
         """Атрымаць усю метаінфармацыю з малюнка"""
+        # Хуткі шлях: разбор загалоўка без PIL і без дэкадавання пікселяў
+        header = read_header(file_path)
+        if header is not None:
+            try:
+                return MetadataReader._get_header_metadata(header, file_path)
+            except Exception:
+                pass
+
         try:
             with Image.open(file_path) as img:
                 # Базавая інфармацыя
@@ -35,9 +45,42 @@ class MetadataReader:
         except Exception as e:
             return {"error": f"Памылка чытання: {str(e)}"}
 
+    @staticmethod
+    def _get_header_metadata(header, file_path):
+        """Сабраць тыя ж палі, што і праз PIL, з вынікаў read_header"""
+        metadata = MetadataReader._basic_fields(file_path, header["format"], header["mode"],
+                                                header["width"], header["height"])
+
+        exif = header.get("exif", {})
+        metadata.update(MetadataReader._exif_fields(exif.items()))
+
+        dpi_x, dpi_y = header.get("dpi", (None, None))
+        metadata.update(MetadataReader._format_specific_fields(color_depth_for_mode(header["mode"]),
+                                                               dpi_x, dpi_y, header.get("compression")))
+
+        # Тэгі IFD0 (для TIFF - уласна тэгі файла), як у PIL getexif()
+        ifd0 = header.get("tiff_tags", header.get("exif_ifd0"))
+        if ifd0:
+            metadata['exif_keys_count'] = len(ifd0)
+            metadata['exif_sample'] = {str(k): str(v) for k, v in list(ifd0.items())[:3]}
+
+        quant_tables = header.get("quant_tables")
+        if quant_tables:
+            metadata['jpeg_quantization_tables'] = quant_tables
+
+        if header["format"] == "GIF":
+            metadata['gif_palette_colors'] = header.get("palette_colors")
+
+        metadata.update(MetadataReader._quantization_fields(header["format"], quant_tables))
+        return metadata
+
     @staticmethod
     def _get_basic_info(img, file_path):
         """Атрымаць базавую інфармацыю пра малюнак"""
+        return MetadataReader._basic_fields(file_path, img.format, img.mode, img.width, img.height)
+
+    @staticmethod
+    def _basic_fields(file_path, image_format, mode, width, height):
         file_stats = os.stat(file_path)
 
         return {
@@ -46,44 +89,47 @@ class MetadataReader:
             "file_size": f"{file_stats.st_size / 1024:.2f} KB",
             "file_size_bytes": file_stats.st_size,
             "file_modified": datetime.fromtimestamp(file_stats.st_mtime).strftime('%Y-%m-%d %H:%M:%S'),
-            "image_format": img.format,
-            "image_mode": img.mode,
-            "image_size": f"{img.width} × {img.height} px",
-            "width": img.width,
-            "height": img.height,
-            "has_alpha": "Так" if img.mode in ('RGBA', 'LA', 'P') else "Не"
+            "image_format": image_format,
+            "image_mode": mode,
+            "image_size": f"{width} × {height} px",
+            "width": width,
+            "height": height,
+            "has_alpha": "Так" if mode in ('RGBA', 'LA', 'P') else "Не"
         }
 
     @staticmethod
     def _get_format_specific_data(img, file_path):
         """Атрымаць даныя спецыфічныя для фармату з formats_info.py"""
-        specific_data = {}
-
         try:
             # Выкарыстоўваем функцыі з formats_info.py
-            # Глыбіня колеру
-            color_depth = infer_color_depth(img)
-            specific_data['color_depth'] = f"{color_depth} біт"
-            specific_data['color_depth_value'] = color_depth
-
-            # Дазвол (DPI)
             dpi_x, dpi_y = get_dpi(img)
-            if dpi_x and dpi_y:
-                specific_data['dpi'] = f"{dpi_x:.1f} × {dpi_y:.1f} DPI"
-                specific_data['dpi_x'] = dpi_x
-                specific_data['dpi_y'] = dpi_y
-            else:
-                specific_data['dpi'] = "Не вызначана"
-
-            # Інфармацыя пра сціск
-            compression = get_compression_info(img)
-            if compression:
-                specific_data['compression'] = compression
-            else:
-                specific_data['compression'] = "Не вызначана"
+            return MetadataReader._format_specific_fields(infer_color_depth(img), dpi_x, dpi_y,
+                                                          get_compression_info(img))
 
         except Exception as e:
-            specific_data["format_specific_error"] = str(e)
+            return {"format_specific_error": str(e)}
+
+    @staticmethod
+    def _format_specific_fields(color_depth, dpi_x, dpi_y, compression):
+        specific_data = {}
+
+        # Глыбіня колеру
+        specific_data['color_depth'] = f"{color_depth} біт"
+        specific_data['color_depth_value'] = color_depth
+
+        # Дазвол (DPI)
+        if dpi_x and dpi_y:
+            specific_data['dpi'] = f"{dpi_x:.1f} × {dpi_y:.1f} DPI"
+            specific_data['dpi_x'] = dpi_x
+            specific_data['dpi_y'] = dpi_y
+        else:
+            specific_data['dpi'] = "Не вызначана"
+
+        # Інфармацыя пра сціск
+        if compression:
+            specific_data['compression'] = compression
+        else:
+            specific_data['compression'] = "Не вызначана"
 
         return specific_data
 
@@ -121,24 +167,30 @@ class MetadataReader:
     @staticmethod
     def _get_exif_data(img):
         """Атрымаць EXIF метаданыя (захавана для сумяшчальнасці)"""
-        exif_data = {}
-
         try:
             if hasattr(img, '_getexif') and img._getexif():
-                for tag_id, value in img._getexif().items():
-                    tag_name = TAGS.get(tag_id, tag_id)
+                return MetadataReader._exif_fields(img._getexif().items())
 
-                    # Канвертаваць нестандартныя тыпы даных
-                    if isinstance(value, bytes):
-                        try:
-                            value = value.decode('utf-8', errors='ignore')
-                        except:
-                            value = str(value)[:100] + "..." if len(str(value)) > 100 else str(value)
+        except Exception as e:
+            return {"exif_error": f"EXIF памылка: {str(e)}"}
 
-                    exif_data[f"EXIF_{tag_name}"] = value
+        return {}
 
-        except Exception as e:
-            exif_data["exif_error"] = f"EXIF памылка: {str(e)}"
+    @staticmethod
+    def _exif_fields(items):
+        exif_data = {}
+
+        for tag_id, value in items:
+            tag_name = TAGS.get(tag_id, tag_id)
+
+            # Канвертаваць нестандартныя тыпы даных
+            if isinstance(value, bytes):
+                try:
+                    value = value.decode('utf-8', errors='ignore')
+                except:
+                    value = str(value)[:100] + "..." if len(str(value)) > 100 else str(value)
+
+            exif_data[f"EXIF_{tag_name}"] = value
 
         return exif_data
 
@@ -214,34 +266,36 @@ class MetadataReader:
     @staticmethod
     def _get_quantization_info(img):
         """Атрымаць інфармацыю пра квантаванне"""
-        quantization_info = {}
-
         try:
-            # Для JPEG файлаў
-            if img.format == "JPEG" and hasattr(img, 'quantization') and img.quantization:
-                tables = img.quantization
-                if tables:
-                    # Колькасць табліц квантавання
-                    quantization_info['quantization_tables_count'] = len(tables)
-
-                    # Памер табліц (звычайна 64 для 8x8 блокаў)
-                    table_sizes = []
-                    for table_id, table_data in tables.items():
-                        if table_data:
-                            table_sizes.append(len(table_data))
-
-                    if table_sizes:
-                        quantization_info['quantization_table_size'] = f"{table_sizes[0]} coefficients"
-
-                    # Кароткая інфармацыя для табліцы
-                    quantization_info['quantization_short'] = f"JPEG {len(tables)} табліц"
-                else:
-                    quantization_info['quantization_short'] = "Без квантавання"
-            else:
-                quantization_info['quantization_short'] = "Не ўжываецца"
+            tables = getattr(img, 'quantization', None)
+            if tables:
+                tables = {table_id: len(table_data) if table_data else 0 for table_id, table_data in tables.items()}
+            return MetadataReader._quantization_fields(img.format, tables)
 
         except Exception as e:
-            quantization_info['quantization_short'] = "Памылка чытання"
-            quantization_info['quantization_error'] = str(e)
+            return {
+                'quantization_short': "Памылка чытання",
+                'quantization_error': str(e)
+            }
+
+    @staticmethod
+    def _quantization_fields(image_format, tables):
+        """tables - слоўнік {нумар табліцы: колькасць каэфіцыентаў}"""
+        quantization_info = {}
+
+        # Для JPEG файлаў
+        if image_format == "JPEG" and tables:
+            # Колькасць табліц квантавання
+            quantization_info['quantization_tables_count'] = len(tables)
+
+            # Памер табліц (звычайна 64 для 8x8 блокаў)
+            table_sizes = [size for size in tables.values() if size]
+            if table_sizes:
+                quantization_info['quantization_table_size'] = f"{table_sizes[0]} coefficients"
+
+            # Кароткая інфармацыя для табліцы
+            quantization_info['quantization_short'] = f"JPEG {len(tables)} табліц"
+        else:
+            quantization_info['quantization_short'] = "Не ўжываецца"
 
         return quantization_info
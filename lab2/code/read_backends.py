@@ -0,0 +1,200 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from header_parser import HEADER_BYTES
+from metadata_reader import MetadataReader
+
+# Назва бэкенда -> подпіс для інтэрфейсу
+BACKENDS = {
+    "auto": "Аўтаматычна",
+    "threads": "Патокі",
+    "processes": "Працэсы",
+}
+# Колькі файлаў чытаецца паслядоўна для ацэнкі затрымкі ўводу-вываду
+AUTO_SAMPLE_FILES = 8
+# Меншыя аб'ёмы не акупляюць запуск пула працэсаў
+PROCESS_MIN_FILES = 256
+MAX_THREADS = 64
+# Колькі задач на аднаго работніка можа чакаць выніку адначасова
+IN_FLIGHT_PER_WORKER = 4
+
+Record = Tuple[str, Dict[str, Any]]
+
+
+def cpu_count() -> int:
+    return os.cpu_count() or 1
+
+
+def read_file(file_path: str) -> Dict[str, Any]:
+    """Метаданыя аднаго файла; выключэнні ператвараюцца ў запіс з памылкай"""
+    try:
+        metadata = MetadataReader.get_image_metadata(file_path)
+    except Exception as e:
+        metadata = {'filename': os.path.basename(file_path), 'error': str(e)}
+    metadata['file_path'] = file_path
+    return metadata
+
+
+def read_batch(paths: Sequence[str]) -> List[Record]:
+    """Пакет файлаў для працэса-работніка: адзін выклік на пакет, а не на файл"""
+    return [(path, read_file(path)) for path in paths]
+
+
+def completed_in_window(executor, function: Callable, items: Iterable, window: int) -> Iterator:
+    """
+    (элемент, future) у парадку завяршэння. Адначасова выконваецца не
+    больш за window задач, наступная ставіцца толькі пасля таго, як
+    спажывец забраў вынік, - так павольны спажывец прыпыняе чытанне.
+    Пры закрыцці генератара нявыкананыя задачы адмяняюцца.
+    """
+    items = iter(items)
+    pending = {executor.submit(function, item): item for item in islice(items, window)}
+    try:
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                for next_item in islice(items, 1):
+                    pending[executor.submit(function, next_item)] = next_item
+                yield item, future
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def error_record(file_path: str, error: Exception) -> Record:
+    return file_path, {'filename': os.path.basename(file_path), 'error': str(error), 'file_path': file_path}
+
+
+class ThreadBackend:
+    """
+    Пул патокаў. Разбор загалоўкаў трымае GIL, але пры павольным
+    вводзе-вывадзе (сеткавыя дыскі) патокі большую частку часу чакаюць
+    дыск, таму іх можа быць значна больш, чым ядраў.
+    """
+
+    name = "threads"
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or min(32, cpu_count() + 4)
+
+    def describe(self) -> str:
+        return f"патокі ×{self.max_workers}"
+
+    def map_files(self, paths: Sequence[str]) -> Iterator[Record]:
+        """(шлях, метаданыя) у парадку завяршэння"""
+        if not paths:
+            return
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            window = self.max_workers * IN_FLIGHT_PER_WORKER
+            for file_path, future in completed_in_window(executor, read_file, paths, window):
+                try:
+                    yield file_path, future.result()
+                except Exception as e:
+                    yield error_record(file_path, e)
+
+
+class ProcessBackend:
+    """
+    Пул працэсаў для разбору, абмежаванага працэсарам: кожны работнік мае
+    свой GIL. Файлы перадаюцца пакетамі, каб кошт перадачы задач і
+    вынікаў паміж працэсамі размяркоўваўся на некалькі файлаў.
+    """
+
+    name = "processes"
+
+    def __init__(self, max_workers: Optional[int] = None, chunk_size: Optional[int] = None):
+        self.max_workers = max_workers or cpu_count()
+        self.chunk_size = chunk_size
+
+    def describe(self) -> str:
+        return f"працэсы ×{self.max_workers}"
+
+    def _chunk_size(self, total: int) -> int:
+        if self.chunk_size:
+            return self.chunk_size
+        # Каля чатырох пакетаў на работніка - для раўнамернай загрузкі
+        return max(1, min(64, total // (self.max_workers * 4)))
+
+    def map_files(self, paths: Sequence[str]) -> Iterator[Record]:
+        if not paths:
+            return
+        chunk_size = self._chunk_size(len(paths))
+        chunks = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+
+        workers = min(self.max_workers, len(chunks))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            window = workers * IN_FLIGHT_PER_WORKER
+            for chunk, future in completed_in_window(executor, read_batch, chunks, window):
+                try:
+                    records = future.result()
+                except Exception as e:
+                    records = [error_record(path, e) for path in chunk]
+                yield from records
+
+
+class AutoBackend:
+    """
+    Выбар бэкенда па выніках вымярэння: некалькі файлаў чытаюцца
+    паслядоўна, асобна засякаецца чытанне загалоўка з дыска і поўны
+    разбор. Калі чаканне дыска пераважае, выбіраюцца патокі ў колькасці
+    ядры × (1 + чаканне / разбор); інакш - пул працэсаў па адным на ядро.
+    """
+
+    name = "auto"
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers
+        self.chosen = None
+
+    def describe(self) -> str:
+        if self.chosen is None:
+            return "аўтаматычна"
+        return f"аўтаматычна: {self.chosen.describe()}"
+
+    def map_files(self, paths: Sequence[str]) -> Iterator[Record]:
+        if not paths:
+            return
+        sample = paths[:AUTO_SAMPLE_FILES]
+        io_time = parse_time = 0.0
+
+        for path in sample:
+            started = time.perf_counter()
+            try:
+                with open(path, 'rb') as f:
+                    f.read(HEADER_BYTES)
+            except OSError:
+                pass
+            read_done = time.perf_counter()
+            # Загаловак ужо ў кэшы АС: гэта пераважна час разбору
+            metadata = read_file(path)
+            io_time += read_done - started
+            parse_time += time.perf_counter() - read_done
+            yield path, metadata
+
+        rest = paths[len(sample):]
+        self.chosen = self.choose(len(rest), io_time, parse_time)
+        yield from self.chosen.map_files(rest)
+
+    def choose(self, remaining: int, io_time: float, parse_time: float):
+        cores = cpu_count()
+        wait_ratio = io_time / max(parse_time, 1e-6)
+
+        if wait_ratio >= 1 or remaining < PROCESS_MIN_FILES or cores == 1:
+            workers = self.max_workers or int(min(MAX_THREADS, max(cores, cores * (1 + wait_ratio))))
+            return ThreadBackend(workers)
+        return ProcessBackend(self.max_workers or cores)
+
+
+def create_backend(name: str = "auto", max_workers: Optional[int] = None):
+    """Бэкенд чытання па назве з BACKENDS"""
+    if name == "threads":
+        return ThreadBackend(max_workers)
+    if name == "processes":
+        return ProcessBackend(max_workers)
+    if name == "auto":
+        return AutoBackend(max_workers)
+    raise ValueError(f"Невядомы бэкенд: {name}")
@@ -0,0 +1,199 @@
+from typing import Any, Dict, List, Sequence
+
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt6.QtGui import QColor
+
+# Слупок: (загаловак, поле запісу, значэнне па змаўчанні, лікавае поле для сартавання)
+COLUMNS = [
+    ("📁 Імя файла", 'filename', 'N/A', None),
+    ("📏 Памер", 'image_size', 'N/A', 'pixels'),
+    ("🎯 DPI", 'dpi', '72 DPI', 'dpi_x'),
+    ("🎨 Глыбіня", 'color_depth', 'N/A', 'color_depth_value'),
+    ("💾 Сціск", 'compression', 'N/A', None),
+    ("🖼️ Фармат", 'image_format', 'N/A', None),
+    ("📊 Файл", 'file_size', 'N/A', 'file_size_bytes'),
+    ("🔢 Квантаванне", 'quantization_short', 'N/A', None),
+    ("📂 Шлях", 'file_path', 'N/A', None),
+    ("✅ Статус", 'error', None, None),
+]
+STATUS_COLUMN = len(COLUMNS) - 1
+# Палі, якія захоўваюцца ў мадэлі: слупкі і лікавыя ключы сартавання
+STORED_FIELDS = [field for _, field, _, _ in COLUMNS] + ['width', 'height', 'dpi_x', 'color_depth_value',
+                                                        'file_size_bytes']
+# Слупкі, па якіх шукае фільтр: імя файла, фармат і шлях
+FILTER_COLUMNS = (0, 5, 8)
+
+ERROR_BACKGROUND = QColor(255, 235, 238)
+ERROR_FOREGROUND = QColor(192, 57, 43)
+
+
+def sort_number(value) -> float:
+    """Лікавы ключ сартавання; у запісаў з памылкай ён меншы за любы сапраўдны"""
+    return float(value) if isinstance(value, (int, float)) else -1.0
+
+
+class ResultsTableModel(QAbstractTableModel):
+    """
+    Мадэль табліцы вынікаў над слупковым сховішчам: для кожнага поля
+    адзін спіс значэнняў, без аб'екта на ячэйку. Тэкст ячэйкі і колер
+    фармуюцца толькі ў data(), калі від запытвае бачныя радкі.
+
+    Радкі мадэлі - гэта self._order, спіс нумароў запісаў пасля
+    сартавання і фільтра. Сартаванне і фільтр апрацоўваюць цэлы слупок
+    адным праходам: ключы сартавання і тэкст для пошуку будуюцца пры
+    першым запыце і потым толькі дапаўняюцца новымі запісамі. Запісы,
+    дададзеныя пасля сартавання, ідуць у канцы да resort().
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._fields: Dict[str, List[Any]] = {field: [] for field in STORED_FIELDS}
+        self._values: List[List[Any]] = [self._fields[field] for _, field, _, _ in COLUMNS]
+        self._sort_keys: Dict[int, List[Any]] = {}
+        self._search: List[str] = []
+        self._order: List[int] = []
+        self._sort_column = -1
+        self._sort_order = Qt.SortOrder.AscendingOrder
+        self._filter_text = ""
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._order)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return COLUMNS[section][0]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        record = self._order[index.row()]
+        column = index.column()
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            value = self._values[column][record]
+            if value is None:
+                value = COLUMNS[column][2]
+            if column == STATUS_COLUMN:
+                return "✅ OK" if value is None else f"❌ {value[:20]}..."
+            return str(value)
+
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
+
+        if self._values[STATUS_COLUMN][record] is not None:
+            # Звычайныя радкі фарбуе сам від (alternatingRowColors)
+            if role == Qt.ItemDataRole.BackgroundRole:
+                return ERROR_BACKGROUND
+            if role == Qt.ItemDataRole.ForegroundRole:
+                return ERROR_FOREGROUND
+        return None
+
+    def record_index(self, row: int) -> int:
+        """Нумар запісу (у парадку дадання) для радка мадэлі"""
+        return self._order[row]
+
+    def clear(self):
+        self.beginResetModel()
+        for values in self._fields.values():
+            values.clear()
+        self._sort_keys.clear()
+        self._search.clear()
+        self._order.clear()
+        self.endResetModel()
+
+    def set_records(self, records: Sequence[Dict[str, Any]]):
+        self.clear()
+        self.append(records)
+
+    def append(self, records: Sequence[Dict[str, Any]]):
+        if not records:
+            return
+        first = len(self._values[0])
+        # Прапушчаныя палі - None; значэнне па змаўчанні падстаўляе data()
+        for field, values in self._fields.items():
+            values += [record.get(field) for record in records]
+
+        new_rows = range(first, first + len(records))
+        if self._filter_text:
+            search = self._search_text()
+            new_rows = [record for record in new_rows if self._filter_text in search[record]]
+        if not new_rows:
+            return
+
+        row = len(self._order)
+        self.beginInsertRows(QModelIndex(), row, row + len(new_rows) - 1)
+        self._order.extend(new_rows)
+        self.endInsertRows()
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self._sort_column = column
+        self._sort_order = order
+        self.resort()
+
+    def resort(self):
+        """Перасартаваць па апошнім слупку (разам з радкамі, дададзенымі пасля сартавання)"""
+        if self._sort_column < 0 or not self._order:
+            return
+        self.layoutAboutToBeChanged.emit()
+        old_indexes = self.persistentIndexList()
+        old_records = [self._order[index.row()] for index in old_indexes]
+
+        self._order = self._filtered(self._sorted_records())
+
+        # Захаваць вылучэнне і бягучую ячэйку пасля перастаноўкі радкоў
+        position = {record: row for row, record in enumerate(self._order)} if old_indexes else {}
+        new_indexes = [self.index(position[record], index.column())
+                       for record, index in zip(old_records, old_indexes)]
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.layoutChanged.emit()
+
+    def set_filter(self, text: str):
+        """Пакінуць радкі, у якіх імя файла, фармат або шлях утрымліваюць text"""
+        text = text.strip().lower()
+        if text == self._filter_text:
+            return
+        self.beginResetModel()
+        self._filter_text = text
+        self._order = self._filtered(self._sorted_records())
+        self.endResetModel()
+
+    def _sorted_records(self) -> List[int]:
+        count = len(self._values[0])
+        if self._sort_column < 0:
+            return list(range(count))
+        keys = self._column_sort_keys(self._sort_column)
+        return sorted(range(count), key=keys.__getitem__,
+                      reverse=self._sort_order == Qt.SortOrder.DescendingOrder)
+
+    def _filtered(self, records: List[int]) -> List[int]:
+        if not self._filter_text:
+            return records
+        search = self._search_text()
+        return [record for record in records if self._filter_text in search[record]]
+
+    def _column_sort_keys(self, column: int) -> List[Any]:
+        """Ключы сартавання слупка, дапоўненыя для запісаў пасля мінулага сартавання"""
+        keys = self._sort_keys.setdefault(column, [])
+        start = len(keys)
+        number = COLUMNS[column][3]
+        if number == 'pixels':
+            widths, heights = self._fields['width'][start:], self._fields['height'][start:]
+            keys += [sort_number(w) * sort_number(h) if w is not None else -1.0
+                     for w, h in zip(widths, heights)]
+        elif number:
+            keys += [sort_number(value) for value in self._fields[number][start:]]
+        else:
+            keys += [str(value).lower() for value in self._values[column][start:]]
+        return keys
+
+    def _search_text(self) -> List[str]:
+        """Тэкст для фільтра (у ніжнім рэгістры), дапоўнены для новых запісаў"""
+        start = len(self._search)
+        columns = [self._values[column][start:] for column in FILTER_COLUMNS]
+        self._search += [" ".join(map(str, values)).lower() for values in zip(*columns)]
+        return self._search
+
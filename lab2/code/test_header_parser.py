@@ -0,0 +1,84 @@
+import pytest
+from PIL import Image
+
+import metadata_reader
+from header_parser import read_header
+from metadata_reader import MetadataReader
+
+
+def sample_image():
+    # Каляровая выява з рознымі пікселямі, каб палітра не была адценнямі шэрага
+    red = Image.linear_gradient("L").resize((30, 20))
+    green = red.transpose(Image.Transpose.FLIP_LEFT_RIGHT)
+    blue = Image.radial_gradient("L").resize((30, 20))
+    return Image.merge("RGB", (red, green, blue))
+
+
+def exif(tags):
+    data = Image.Exif()
+    data.update(tags)
+    return data.tobytes()
+
+
+# (імя файла, рэжым PIL, параметры захавання)
+SAMPLE_FILES = [
+    ("jfif_dpi.jpg", "RGB", {"dpi": (300, 300)}),
+    ("jfif_no_dpi.jpg", "RGB", {}),
+    ("exif_no_resolution.jpg", "RGB", {"exif": exif({271: "Camera"})}),
+    ("exif_resolution_cm.jpg", "RGB", {"exif": exif({282: 200.0, 283: 200.0, 296: 3})}),
+    ("exif_no_unit.jpg", "RGB", {"exif": exif({282: 150.0, 283: 150.0})}),
+    ("progressive.jpg", "L", {"progressive": True}),
+    ("rgb.png", "RGB", {"dpi": (96, 96)}),
+    ("palette.png", "P", {}),
+    ("rgba.png", "RGBA", {}),
+    ("palette.gif", "P", {}),
+    ("gray.gif", "L", {}),
+    ("rgb.bmp", "RGB", {}),
+    ("gray.bmp", "L", {}),
+    ("bilevel.bmp", "1", {}),
+    ("palette.bmp", "P", {}),
+    ("rgb.tif", "RGB", {"dpi": (150, 150)}),
+    ("lzw.tif", "RGB", {"compression": "tiff_lzw", "dpi": (72, 72)}),
+    ("relative_unit.tif", "L", {"tiffinfo": {282: 4.0, 283: 4.0, 296: 1}}),
+    ("rgb.pcx", "RGB", {}),
+    ("gray.pcx", "L", {}),
+]
+
+# Палі, якія загаловак не дае па задуме: колькасць кадраў GIF патрабуе чытання ўсяго файла
+HEADER_ONLY_MISSING = {"gif_frames_count"}
+
+
+def pil_metadata(monkeypatch, file_path):
+    with monkeypatch.context() as patch:
+        patch.setattr(metadata_reader, "read_header", lambda path: None)
+        return MetadataReader.get_image_metadata(file_path)
+
+
+@pytest.mark.parametrize("name, mode, options", SAMPLE_FILES)
+def test_header_metadata_matches_pil(tmp_path, monkeypatch, name, mode, options):
+    file_path = str(tmp_path / name)
+    sample_image().convert(mode).save(file_path, **options)
+
+    assert read_header(file_path) is not None
+    header = MetadataReader.get_image_metadata(file_path)
+    expected = pil_metadata(monkeypatch, file_path)
+
+    for key in HEADER_ONLY_MISSING:
+        expected.pop(key, None)
+    assert header == expected
+
+
+def test_jpeg_exif_without_resolution_defaults_to_72_dpi(tmp_path):
+    file_path = str(tmp_path / "exif.jpg")
+    sample_image().save(file_path, exif=exif({271: "Camera"}))
+
+    assert read_header(file_path)["dpi"] == (72, 72)
+
+
+def test_tiff_without_resolution_tags_has_no_dpi(tmp_path, monkeypatch):
+    file_path = str(tmp_path / "plain.tif")
+    sample_image().save(file_path)
+
+    # PIL паведамляе 1 × 1 DPI, загаловак - невызначаны дазвол (гл. README)
+    assert MetadataReader.get_image_metadata(file_path)["dpi"] == "Не вызначана"
+    assert pil_metadata(monkeypatch, file_path)["dpi_x"] == 1
@@ -0,0 +1,227 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import numpy as np
+from PIL import Image
+from image_processor import ImageProcessor
+from pipeline import Pipeline
+from out_of_core import MEMMAP_EXTENSIONS, process_out_of_core
+from image_writer import ENCODER_PROFILES, save_image
+
+SUPPORTED_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.ppm', '.pgm'}
+
+# Кароткія лацінскія імёны аперацый для запуску з каманднага радка
+OPERATION_ALIASES = {
+    "linear_contrast": "Лінейнае кантраставаньне",
+    "brightness": "Павялічыць яркасць",
+    "contrast": "Павялічыць кантраснасць",
+    "manual_threshold": "Мануальная парогавая апрацоўка",
+    "adaptive_threshold": "Адаптыўная парогавая апрацоўка (Otsu)",
+    "gaussian_threshold": "Лякальная парогавая апрацоўка (Gaussian)",
+    "mean_threshold": "Лякальная парогавая апрацоўка (Mean)",
+    "invert": "Інвертаваць колеры",
+    "global_threshold": "Глабальная парогавая апрацоўка (Mean)",
+    "otsu_threshold": "Глабальная парогавая апрацоўка (Otsu)",
+    "triangle_threshold": "Глабальная парогавая апрацоўка (Triangle)",
+    "isodata_threshold": "Глабальная парогавая апрацоўка (Isodata)",
+    "percentile_threshold": "Глабальная парогавая апрацоўка (Percentile)",
+    "dilate": "Марфалагічнае пашырэнне",
+    "erode": "Марфалагічнае звужэнне",
+}
+
+
+def resolve_operation(name):
+    """Назва аперацыі, яе аліяс, імя захаванага ланцужка або шлях да .json"""
+    if name in OPERATION_ALIASES:
+        return OPERATION_ALIASES[name]
+    if name in ImageProcessor.OPERATION_HALOS:
+        return name
+    if name.endswith(".json") and os.path.isfile(name):
+        return Pipeline.load(name)
+
+    presets = Pipeline.load_presets()
+    if name in presets:
+        return presets[name]
+
+    raise ValueError(f"Невядомая аперацыя: {name}")
+
+
+def find_images(input_dir, extensions=SUPPORTED_EXTENSIONS):
+    for root, dirs, files in os.walk(input_dir):
+        dirs.sort()
+        for file_name in sorted(files):
+            if os.path.splitext(file_name)[1].lower() in extensions:
+                yield os.path.join(root, file_name)
+
+
+def process_file(file_path, input_dir, output_dir, operation, params, output_format, profile=None):
+    started = time.perf_counter()
+
+    with Image.open(file_path) as pil_image:
+        image = np.array(pil_image.convert('RGB'))
+
+    # Вынікі парогавых аперацый застаюцца бітавымі да запісу ў файл
+    result = ImageProcessor.process_image(image, operation, dict(params, packed=True))
+    if result is None:
+        raise RuntimeError("аперацыя не вярнула выніку")
+
+    relative_path = os.path.relpath(file_path, input_dir)
+    if profile:
+        relative_path = os.path.splitext(relative_path)[0] + ENCODER_PROFILES[profile]["extension"]
+    elif output_format:
+        relative_path = os.path.splitext(relative_path)[0] + "." + output_format
+    output_path = os.path.join(output_dir, relative_path)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    save_image(result, output_path, profile)
+
+    height, width = image.shape[:2]
+    return output_path, height * width / 1e6, time.perf_counter() - started
+
+
+def process_file_out_of_core(file_path, input_dir, output_dir, operation, params, output_format, band_rows):
+    started = time.perf_counter()
+
+    relative_path = os.path.splitext(os.path.relpath(file_path, input_dir))[0] + "." + (output_format or "ppm")
+    output_path = os.path.join(output_dir, relative_path)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+    height, width = process_out_of_core(file_path, output_path, operation, params, band_rows)
+    return output_path, height * width / 1e6, time.perf_counter() - started
+
+
+def run_batch(input_dir, output_dir, operation, params=None, workers=None, output_format=None, log=print,
+              out_of_core=False, band_rows=1024, profile=None):
+    """
+    Апрацаваць усе выявы каталога. Адначасова ў памяці знаходзіцца не больш
+    за 2*workers выяў. Вяртае зводную статыстыку прапускной здольнасці.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = 2 * workers
+    params = params or {}
+    if hasattr(operation, "steps") and params:
+        # Параметры ланцужка задаюцца ў яго кроках; агульныя params інакш ціха ігнараваліся б
+        raise ValueError("Параметры і колеравы рэжым не прымяняюцца да ланцужка аперацый: "
+                         "задайце іх у кроках ланцужка")
+
+    processed = 0
+    failed = 0
+    megapixels = 0.0
+    started = time.perf_counter()
+
+    def collect(done, pending):
+        nonlocal processed, failed, megapixels
+        for future in done:
+            file_path = pending.pop(future)
+            try:
+                output_path, image_mp, elapsed = future.result()
+                processed += 1
+                megapixels += image_mp
+                log(f"✅ {file_path} → {output_path}: {elapsed:.3f} с, "
+                    f"{1 / elapsed:.2f} выяў/с, {image_mp / elapsed:.2f} Мпікс/с")
+            except Exception as e:
+                failed += 1
+                log(f"❌ {file_path}: {e}")
+
+    # У рэжыме out-of-core сціснутыя фарматы трапляюць у спіс, каб адмова
+    # ад іх была бачная ў логу як памылка, а не як ціхі пропуск файла
+    extensions = SUPPORTED_EXTENSIONS | MEMMAP_EXTENSIONS if out_of_core else SUPPORTED_EXTENSIONS
+
+    pending = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for file_path in find_images(input_dir, extensions):
+            if len(pending) >= max_in_flight:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done, pending)
+
+            if out_of_core:
+                future = executor.submit(process_file_out_of_core, file_path, input_dir, output_dir,
+                                         operation, params, output_format, band_rows)
+            else:
+                future = executor.submit(process_file, file_path, input_dir, output_dir,
+                                         operation, params, output_format, profile)
+            pending[future] = file_path
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            collect(done, pending)
+
+    elapsed = time.perf_counter() - started
+    summary = {
+        'processed': processed,
+        'failed': failed,
+        'elapsed': elapsed,
+        'images_per_second': processed / elapsed if elapsed else 0.0,
+        'megapixels_per_second': megapixels / elapsed if elapsed else 0.0,
+    }
+    log(f"📊 Апрацавана: {processed}, памылак: {failed}, час: {elapsed:.2f} с, "
+        f"{summary['images_per_second']:.2f} выяў/с, {summary['megapixels_per_second']:.2f} Мпікс/с")
+    return summary
+
+
+def parse_param(text):
+    key, _, value = text.partition("=")
+    try:
+        return key, int(value)
+    except ValueError:
+        return key, float(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пакетная апрацоўка выяў без графічнага інтэрфейсу")
+    parser.add_argument("input_dir", nargs="?", help="каталог з зыходнымі выявамі")
+    parser.add_argument("output_dir", nargs="?", help="каталог для вынікаў")
+    parser.add_argument("-o", "--operation", help="аперацыя, яе аліяс, імя ланцужка або шлях да .json")
+    parser.add_argument("-p", "--param", action="append", default=[], type=parse_param,
+                        metavar="KEY=VALUE", help="параметр аперацыі (напрыклад, block_size=25); не для ланцужкоў")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="колькасць працоўных патокаў")
+    parser.add_argument("-f", "--format", dest="output_format", help="фармат вынікаў (png, jpg, ...); ppm - заўсёды RGB (P6), "
+                             "бінарныя вынікі ў 1 біт - pbm")
+    parser.add_argument("--profile", choices=list(ENCODER_PROFILES),
+                        help="профіль кадавальніка (бінарныя вынікі PNG/TIFF пішуцца ў 1 біт)")
+    parser.add_argument("--out-of-core", action="store_true",
+                        help="апрацоўка палосамі праз memmap для выяў, большых за памяць; уваход - ppm, pgm, "
+                             "npy або tif/bmp без сціску (PNG, JPEG і сціснуты TIFF адхіляюцца), вынік - ppm, pgm або npy")
+    parser.add_argument("--band-rows", type=int, default=1024, help="вышыня паласы ў рэжыме --out-of-core")
+    parser.add_argument("--color-mode", choices=sorted(set(ImageProcessor.COLOR_MODES.values())), default="gray",
+                        help="апрацоўка па каналах RGB або светлыні Lab/HLS замест адценняў шэрага")
+    parser.add_argument("--list", action="store_true", help="паказаць даступныя аперацыі")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for alias, name in OPERATION_ALIASES.items():
+            print(f"{alias:20} {name}")
+        for name in Pipeline.load_presets():
+            print(f"{'':20} {name}")
+        return 0
+
+    if not args.input_dir or not args.output_dir or not args.operation:
+        parser.error("патрэбны input_dir, output_dir і --operation")
+
+    if not os.path.isdir(args.input_dir):
+        print(f"Папка не існуе: {args.input_dir}")
+        return 1
+
+    try:
+        operation = resolve_operation(args.operation)
+    except ValueError as e:
+        print(e)
+        return 1
+
+    if isinstance(operation, Pipeline) and (args.param or args.color_mode != "gray"):
+        parser.error("-p/--param і --color-mode не прымяняюцца да ланцужка аперацый: "
+                     "задайце параметры ў кроках ланцужка (.json)")
+
+    params = dict(args.param)
+    if args.color_mode != "gray":
+        params["color_mode"] = args.color_mode
+
+    summary = run_batch(args.input_dir, args.output_dir, operation, params,
+                        args.workers, args.output_format, out_of_core=args.out_of_core,
+                        band_rows=args.band_rows, profile=args.profile)
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,133 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import numpy as np
+from image_processor import ImageProcessor
+
+DEFAULT_SIZES = [256, 512, 1024, 2048, 4096, 8192]
+
+
+def synthetic_image(size, seed=0):
+    """Сінтэтычная RGB выява: градыент з шумам, каб парогі не былі трывіяльнымі"""
+    rng = np.random.default_rng(seed)
+    ramp = np.linspace(0, 255, size, dtype=np.float32)
+    base = (ramp[None, :] + ramp[:, None]) / 2
+    noise = rng.normal(0, 25, (size, size, 3)).astype(np.float32)
+    return np.clip(base[..., None] + noise, 0, 255).astype(np.uint8)
+
+
+def measure(image, operation, params, repeats):
+    """Лепшы час з repeats запускаў і пікавы аб'ём памяці аднаго запуску"""
+    tracemalloc.start()
+    ImageProcessor.process_image(image, operation, params)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = float('inf')
+    for _ in range(repeats):
+        started = time.perf_counter()
+        ImageProcessor.process_image(image, operation, params)
+        best = min(best, time.perf_counter() - started)
+
+    return best, peak
+
+
+def run_benchmarks(sizes=None, operations=None, repeats=3, log=print):
+    sizes = sizes or DEFAULT_SIZES
+    operations = operations or list(ImageProcessor.OPERATION_HALOS)
+    results = []
+
+    for size in sizes:
+        image = synthetic_image(size)
+        megapixels = size * size / 1e6
+
+        for operation in operations:
+            wall_time, peak = measure(image, operation, {}, repeats)
+            record = {
+                'operation': operation,
+                'size': size,
+                'wall_time': wall_time,
+                'megapixels_per_second': megapixels / wall_time if wall_time else 0.0,
+                'peak_memory_mb': peak / (1024 * 1024),
+            }
+            results.append(record)
+            log(f"{size:>5}² {operation:45} {wall_time:8.4f} с  "
+                f"{record['megapixels_per_second']:9.2f} Мпікс/с  {record['peak_memory_mb']:8.1f} MB")
+
+        del image
+
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'results': results,
+    }
+
+
+def compare_with_baseline(report, baseline, threshold=0.2):
+    """
+    Спіс рэгрэсій: запісы, у якіх час вырас больш чым на threshold
+    адносна базавага запуску з той жа аперацыяй і памерам.
+    """
+    reference = {(r['operation'], r['size']): r for r in baseline.get('results', [])}
+    regressions = []
+
+    for record in report['results']:
+        base = reference.get((record['operation'], record['size']))
+        if base is None or not base['wall_time']:
+            continue
+
+        ratio = record['wall_time'] / base['wall_time']
+        if ratio > 1 + threshold:
+            regressions.append({
+                'operation': record['operation'],
+                'size': record['size'],
+                'baseline_time': base['wall_time'],
+                'wall_time': record['wall_time'],
+                'ratio': ratio,
+            })
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарк аперацый ImageProcessor")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="бакі квадратных выяў")
+    parser.add_argument("--operations", nargs="+", help="аперацыі (па змаўчанні ўсе)")
+    parser.add_argument("--repeats", type=int, default=3, help="колькасць паўтораў для кожнага замеру")
+    parser.add_argument("--output", default="benchmark_results.json", help="файл для JSON вынікаў")
+    parser.add_argument("--baseline", help="JSON з базавымі вынікамі для параўнання")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="дапушчальнае запаволенне адносна базы (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.sizes, args.operations, args.repeats)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"💾 Вынікі захаваны ў: {args.output}")
+
+    if not args.baseline:
+        return 0
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    regressions = compare_with_baseline(report, baseline, args.threshold)
+    for r in regressions:
+        print(f"❌ Рэгрэсія: {r['operation']} {r['size']}²: "
+              f"{r['baseline_time']:.4f} с → {r['wall_time']:.4f} с (×{r['ratio']:.2f})")
+
+    if regressions:
+        return 1
+
+    print("✅ Рэгрэсій няма")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,138 @@
+import numpy as np
+from PIL import Image
+
+
+class BinaryImage:
+    """
+    Бінарная выява (вынік парогавай апрацоўкі) у выглядзе бітавай плоскасці.
+
+    Пікселі пакуюцца np.packbits па радках: 8 пікселяў у байце, старшы біт
+    злева - той жа фармат, што ў PIL mode "1" і QImage.Format_Mono. Выява
+    займае 1 біт на піксель замест 24 у RGB; інверсія і марфалогія
+    выконваюцца непасрэдна над байтамі, а ў RGB выява пашыраецца толькі
+    для адлюстравання.
+    """
+
+    def __init__(self, bits, width):
+        self.bits = bits
+        self.width = width
+
+    @classmethod
+    def from_mask(cls, mask):
+        """Запакаваць лагічную маску (True - белы піксель)"""
+        return cls(np.packbits(mask, axis=1), mask.shape[1])
+
+    @classmethod
+    def from_array(cls, image):
+        """Бінарызаваць масіў 0/255 (адценні шэрага або RGB) па сярэдзіне дыяпазону"""
+        if len(image.shape) == 3:
+            image = image[..., 0]
+        return cls.from_mask(image > 127)
+
+    @classmethod
+    def empty(cls, height, width):
+        return cls(np.zeros((height, (width + 7) // 8), dtype=np.uint8), width)
+
+    @property
+    def height(self):
+        return self.bits.shape[0]
+
+    @property
+    def shape(self):
+        return self.height, self.width
+
+    @property
+    def nbytes(self):
+        return self.bits.nbytes
+
+    def copy(self):
+        return BinaryImage(self.bits.copy(), self.width)
+
+    def mask(self):
+        return np.unpackbits(self.bits, axis=1, count=self.width).view(np.bool_)
+
+    def unpack(self):
+        """Адценні шэрага 0/255 (uint8)"""
+        plane = np.unpackbits(self.bits, axis=1, count=self.width)
+        plane *= np.uint8(255)
+        return plane
+
+    def to_rgb(self):
+        plane = self.unpack()
+        return np.stack([plane, plane, plane], axis=2)
+
+    def to_pil(self):
+        return Image.frombytes("1", (self.width, self.height), self.bits.tobytes())
+
+    def crop(self, y0, y1, x0, x1):
+        if x0 % 8 == 0:
+            bits = self.bits[y0:y1, x0 // 8:(x1 + 7) // 8].copy()
+            result = BinaryImage(bits, x1 - x0)
+            result._clear_padding()
+            return result
+        return BinaryImage.from_mask(self.mask()[y0:y1, x0:x1])
+
+    def paste(self, y, x, source):
+        """Уставіць іншую BinaryImage з левым верхнім кутом у (y, x)"""
+        height, width = source.shape
+        if x % 8 == 0 and (width % 8 == 0 or x + width == self.width):
+            self.bits[y:y + height, x // 8:x // 8 + source.bits.shape[1]] = source.bits
+            return
+
+        b0, b1 = x // 8, (x + width + 7) // 8
+        region = np.unpackbits(self.bits[y:y + height, b0:b1], axis=1)
+        region[:, x - b0 * 8:x - b0 * 8 + width] = source.mask()
+        self.bits[y:y + height, b0:b1] = np.packbits(region, axis=1)
+
+    def invert(self):
+        result = BinaryImage(np.invert(self.bits), self.width)
+        result._clear_padding()
+        return result
+
+    def dilate(self, radius=1):
+        """
+        Пашырэнне квадратным элементам (2*radius+1)²: зрухі радкоў на біт
+        з пераносам паміж байтамі і АБО суседніх радкоў. Пікселі за
+        межамі выявы лічацца чорнымі.
+        """
+        bits = self.bits
+        rows = bits.copy()
+        left = right = bits
+        for _ in range(radius):
+            right = self._shift_right(right)
+            left = self._shift_left(left)
+            rows |= right
+            rows |= left
+
+        result = rows.copy()
+        for offset in range(1, min(radius, self.height - 1) + 1):
+            result[offset:] |= rows[:-offset]
+            result[:-offset] |= rows[offset:]
+
+        dilated = BinaryImage(result, self.width)
+        dilated._clear_padding()
+        return dilated
+
+    def erode(self, radius=1):
+        """Звужэнне як інверсія пашырэння фону; межы выявы не звужаюць аб'екты"""
+        return self.invert().dilate(radius).invert()
+
+    @staticmethod
+    def _shift_right(bits):
+        """Зрух пікселяў на адзін управа (да большых x)"""
+        shifted = bits >> 1
+        shifted[:, 1:] |= bits[:, :-1] << 7
+        return shifted
+
+    @staticmethod
+    def _shift_left(bits):
+        """Зрух пікселяў на адзін улева (да меншых x)"""
+        shifted = bits << 1
+        shifted[:, :-1] |= bits[:, 1:] >> 7
+        return shifted
+
+    def _clear_padding(self):
+        # Біты за апошнім пікселем радка заўсёды нулявыя
+        tail = self.width % 8
+        if tail and self.bits.size:
+            self.bits[:, -1] &= np.uint8((0xFF << (8 - tail)) & 0xFF)
@@ -0,0 +1,96 @@
+from functools import lru_cache
+import numpy as np
+
+# Матрыцы sRGB (D65) <-> XYZ, нармаваныя на белую кропку
+RGB_TO_XYZ = np.array([
+    [0.4124564 / 0.95047, 0.3575761 / 0.95047, 0.1804375 / 0.95047],
+    [0.2126729, 0.7151522, 0.0721750],
+    [0.0193339 / 1.08883, 0.1191920 / 1.08883, 0.9503041 / 1.08883],
+], dtype=np.float32)
+XYZ_TO_RGB = np.linalg.inv(RGB_TO_XYZ.astype(np.float64)).astype(np.float32)
+
+LAB_EPSILON = 216 / 24389
+LAB_KAPPA = 24389 / 27
+
+
+@lru_cache(maxsize=1)
+def srgb_to_linear_lut():
+    """Лінеарызацыя sRGB для ўсіх 256 узроўняў, каб не ўзводзіць у ступень кожны піксель"""
+    c = np.arange(256, dtype=np.float64) / 255
+    linear = np.where(c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+    return linear.astype(np.float32)
+
+
+def linear_to_srgb(linear):
+    linear = np.clip(linear, 0, 1)
+    srgb = np.where(linear <= 0.0031308, linear * 12.92, 1.055 * np.power(linear, 1 / 2.4) - 0.055)
+    return np.rint(srgb * 255).astype(np.uint8)
+
+
+def _lab_f(t):
+    return np.where(t > LAB_EPSILON, np.cbrt(t), (LAB_KAPPA * t + 16) / 116)
+
+
+def _lab_f_inv(f):
+    cube = f ** 3
+    return np.where(cube > LAB_EPSILON, cube, (116 * f - 16) / LAB_KAPPA)
+
+
+def split_lab(image):
+    """
+    Светлыня L* выявы RGB у маштабе 0..255 (uint8) і астатнія кампаненты
+    (a*, b*, дробная частка светлыні), патрэбныя для зваротнага
+    пераўтварэння.
+    """
+    linear = srgb_to_linear_lut()[image[..., :3]]
+    fx, fy, fz = (_lab_f(linear @ row) for row in RGB_TO_XYZ)
+    lightness = np.clip(116 * fy - 16, 0, 100) * 2.55
+    a = 500 * (fx - fy)
+    b = 200 * (fy - fz)
+    quantized = np.rint(lightness)
+    return quantized.astype(np.uint8), (a, b, lightness - quantized)
+
+
+def merge_lab(lightness, rest):
+    """RGB з новай светлыні L* (0..255) і захаваных a*, b*"""
+    a, b, fraction = rest
+    fy = ((lightness + fraction) / 2.55 + 16) / 116
+    xyz = np.stack([_lab_f_inv(fy + a / 500), _lab_f_inv(fy), _lab_f_inv(fy - b / 200)], axis=-1)
+    return linear_to_srgb(xyz @ XYZ_TO_RGB.T)
+
+
+def split_hls(image):
+    """
+    Светлыня HLS (max + min) / 2 і адхіленні каналаў ад яе; пры захаваных
+    адцені і насычанасці адхіленні маштабуюцца разам з храмай.
+    """
+    rgb = image[..., :3]
+    lightness = (rgb.max(axis=-1).astype(np.float32) + rgb.min(axis=-1)) / 2
+    delta = rgb - lightness[..., np.newaxis]
+    return np.rint(lightness).astype(np.uint8), (lightness, delta)
+
+
+def merge_hls(lightness, rest):
+    """RGB з новай светлыні HLS (0..255) пры нязменных адцені і насычанасці"""
+    old_lightness, delta = rest
+    # Дробная частка старой светлыні, страчаная пры акругленні да uint8
+    new_lightness = np.clip(lightness + (old_lightness - np.rint(old_lightness)), 0, 255)
+    old_chroma = 255 - np.abs(2 * old_lightness - 255)
+    new_chroma = 255 - np.abs(2 * new_lightness - 255)
+    scale = np.divide(new_chroma, old_chroma, out=np.zeros_like(new_chroma), where=old_chroma > 0)
+    rgb = new_lightness[..., np.newaxis] + delta * scale[..., np.newaxis]
+    return np.clip(np.rint(rgb), 0, 255).astype(np.uint8)
+
+
+# Колеравыя прасторы з асобнай светлынёй: (раздзяленне, зборка)
+LIGHTNESS_SPACES = {
+    "lab": (split_lab, merge_lab),
+    "hls": (split_hls, merge_hls),
+}
+
+
+def crop_planes(planes, row, col, height, width):
+    """Зрэз раздзеленых плоскасцей для пліткі або паласы выявы"""
+    lightness, rest = planes
+    window = (slice(row, row + height), slice(col, col + width))
+    return lightness[window], tuple(part[window] for part in rest)
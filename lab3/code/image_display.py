@@ -0,0 +1,50 @@
+import numpy as np
+from PyQt5 import sip
+from PyQt5.QtGui import QImage, qRgb
+from binary_image import BinaryImage
+
+QIMAGE_FORMATS = {
+    1: QImage.Format_Grayscale8,
+    3: QImage.Format_RGB888,
+    4: QImage.Format_RGBA8888,
+}
+
+
+def numpy_to_qimage(image):
+    """
+    QImage паверх памяці масіва NumPy без капіявання.
+
+    Падтрымліваюцца адценні шэрага, RGB і RGBA, у тым ліку зрэзы з
+    адвольным крокам радкоў. Калі пікселі ў радку не ляжаць запар,
+    робіцца адна копія. Масіў замацоўваецца на QImage, каб буфер жыў
+    столькі ж, колькі выява. BinaryImage паказваецца як 1-бітная
+    QImage.Format_Mono паверх яе бітавай плоскасці.
+    """
+    if isinstance(image, BinaryImage):
+        bits = np.ascontiguousarray(image.bits)
+        q_img = QImage(sip.voidptr(bits.ctypes.data), image.width, image.height, bits.strides[0], QImage.Format_Mono)
+        q_img.setColorTable([qRgb(0, 0, 0), qRgb(255, 255, 255)])
+        q_img.ndarray = bits
+        return q_img
+
+    if image.dtype == np.bool_:
+        image = image.view(np.uint8) * np.uint8(255)
+    elif image.dtype != np.uint8:
+        image = np.clip(image, 0, 255).astype(np.uint8)
+
+    if len(image.shape) == 3 and image.shape[2] == 1:
+        image = image[..., 0]
+
+    channels = 1 if len(image.shape) == 2 else image.shape[2]
+    if channels not in QIMAGE_FORMATS:
+        raise ValueError(f"Непадтрымоўваная колькасць каналаў: {channels}")
+
+    height, width = image.shape[:2]
+    packed_pixels = image.strides[1] == channels and (channels == 1 or image.strides[2] == 1)
+    if not packed_pixels or image.strides[0] < width * channels:
+        image = np.ascontiguousarray(image)
+
+    q_img = QImage(sip.voidptr(image.ctypes.data), width, height, image.strides[0], QIMAGE_FORMATS[channels])
+    q_img.ndarray = image
+    return q_img
+
@@ -1,44 +1,312 @@
 import numpy as np
-import math
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from binary_image import BinaryImage
+from color_space import LIGHTNESS_SPACES, crop_planes
 
 class ImageProcessor:
+    # Кэш яркасці загружанай выявы (гл. cache_luminance): (weakref крыніцы, плоскасць)
+    _luminance_entry = None
+    # Кэш раздзеленых колеравых плоскасцей: прастора -> [(крыніца, плоскасці)]
+    _color_planes = {}
+    COLOR_PLANES_CACHE_SIZE = 2
+    _channel_executor = None
+    # Кэшы агульныя для ўсіх патокаў (пліткі TileScheduler, QThread-задачы),
+    # таму чытаюцца і змяняюцца толькі пад замком; вылічэнні - па-за ім
+    _cache_lock = threading.Lock()
+
+    # Радыус наваколля кожнай аперацыі ў пікселях (halo для пліткавай апрацоўкі).
+    # None азначае глабальную аперацыю, якая залежыць ад усёй выявы.
+    OPERATION_HALOS = {
+        "Лінейнае кантраставаньне": None,
+        "Павялічыць яркасць": 0,
+        "Павялічыць кантраснасць": None,
+        "Мануальная парогавая апрацоўка": 0,
+        "Адаптыўная парогавая апрацоўка (Otsu)": 4,
+        "Лякальная парогавая апрацоўка (Gaussian)": 5,
+        "Лякальная парогавая апрацоўка (Mean)": 5,
+        "Інвертаваць колеры": 0,
+        "Глабальная парогавая апрацоўка (Mean)": None,
+        "Глабальная парогавая апрацоўка (Otsu)": None,
+        "Глабальная парогавая апрацоўка (Triangle)": None,
+        "Глабальная парогавая апрацоўка (Isodata)": None,
+        "Глабальная парогавая апрацоўка (Percentile)": None,
+        "Марфалагічнае пашырэнне": 1,
+        "Марфалагічнае звужэнне": 1,
+    }
+    # Аперацыі, парог якіх вылічваецца па гістаграме выявы
+    HISTOGRAM_METHODS = {
+        "Глабальная парогавая апрацоўка (Otsu)": "otsu",
+        "Глабальная парогавая апрацоўка (Triangle)": "triangle",
+        "Глабальная парогавая апрацоўка (Isodata)": "isodata",
+        "Глабальная парогавая апрацоўка (Percentile)": "percentile",
+    }
+    # Танальныя аперацыі, якія зводзяцца да 256-элементнай табліцы (LUT)
+    LUT_OPERATIONS = {
+        "Павялічыць яркасць",
+        "Інвертаваць колеры",
+        "Павялічыць кантраснасць",
+        "Лінейнае кантраставаньне",
+    }
+    # Табліцы гэтых аперацый залежаць ад гістаграмы выявы
+    STATISTIC_LUT_OPERATIONS = {
+        "Павялічыць кантраснасць",
+        "Лінейнае кантраставаньне",
+    }
+    # Аперацыі, у якіх halo вызначаецца параметрам block_size
+    BLOCK_OPERATIONS = {
+        "Лякальная парогавая апрацоўка (Gaussian)",
+        "Лякальная парогавая апрацоўка (Mean)",
+    }
+    # Колеравыя рэжымы: "gray" - адценні шэрага, "channels" - кожны канал RGB
+    # асобна, "lab" / "hls" - толькі светлыня адпаведнай колеравай прасторы
+    COLOR_MODES = {
+        "Адценні шэрага": "gray",
+        "Па каналах RGB": "channels",
+        "Светлыня L (Lab)": "lab",
+        "Светлыня L (HLS)": "hls",
+    }
+    # Аперацыі, якія могуць выконвацца ў колеравым рэжыме
+    COLOR_OPERATIONS = {
+        "Лінейнае кантраставаньне",
+        "Павялічыць яркасць",
+        "Павялічыць кантраснасць",
+        "Мануальная парогавая апрацоўка",
+        "Адаптыўная парогавая апрацоўка (Otsu)",
+        "Лякальная парогавая апрацоўка (Gaussian)",
+        "Лякальная парогавая апрацоўка (Mean)",
+        "Глабальная парогавая апрацоўка (Mean)",
+        "Глабальная парогавая апрацоўка (Otsu)",
+        "Глабальная парогавая апрацоўка (Triangle)",
+        "Глабальная парогавая апрацоўка (Isodata)",
+        "Глабальная парогавая апрацоўка (Percentile)",
+    }
+    # Аперацыі, якія прымаюць BinaryImage без распакоўкі (halo - параметр radius)
+    BINARY_OPERATIONS = {
+        "Інвертаваць колеры",
+        "Марфалагічнае пашырэнне",
+        "Марфалагічнае звужэнне",
+    }
+
+    @staticmethod
+    def get_halo(operation, params=None):
+        """Радыус наваколля аперацыі; None для глабальных аперацый"""
+        if hasattr(operation, "halo"):
+            return operation.halo
+        params = params or {}
+        if operation in ImageProcessor.BLOCK_OPERATIONS and "block_size" in params:
+            return params["block_size"] // 2
+        if operation in ImageProcessor.BINARY_OPERATIONS and "radius" in params:
+            return params["radius"]
+        return ImageProcessor.OPERATION_HALOS.get(operation, 0)
+
     @staticmethod
     def process_image(image, operation, params):
         try:
-            if operation == "Лінейнае кантраставаньне":
-                return ImageProcessor.linear_contrast(image)
-            elif operation == "Павялічыць яркасць":
-                return ImageProcessor.adjust_brightness(image, 1.5)
-            elif operation == "Павялічыць кантраснасць":
-                return ImageProcessor.adjust_contrast(image, 1.5)
-            elif operation == "Мануальная парогавая апрацоўка":
-                return ImageProcessor.manual_threshold(image, 127)
-            elif operation == "Адаптыўная парогавая апрацоўка (Otsu)":
-                return ImageProcessor.adaptive_threshold_otsu(image)
-            elif operation == "Лякальная парогавая апрацоўка (Gaussian)":
-                return ImageProcessor.local_threshold_gaussian(image)
-            elif operation == "Лякальная парогавая апрацоўка (Mean)":
-                return ImageProcessor.local_threshold_mean(image)
-            elif operation == "Інвертаваць колеры":
-                return ImageProcessor.invert_colors(image)
-            elif operation == "Глабальная парогавая апрацоўка (Mean)":
-                return ImageProcessor.global_threshold_mean(image)
-            else:
-                return image.copy()
+            if hasattr(operation, "run"):
+                return operation.run(image)
+            return ImageProcessor.apply_operation(image, operation, params)
         except Exception as e:
             print(f"Памылка апрацоўкі: {e}")
             return None
 
+    @staticmethod
+    def apply_operation(image, operation, params=None, as_rgb=True):
+        """
+        Выканаць адну аперацыю. Пры as_rgb=False вынікі ў адценнях шэрага
+        застаюцца аднаканальнымі (для ланцужкоў аперацый). Пры параметры
+        packed=True парогавыя аперацыі вяртаюць BinaryImage.
+        """
+        params = params or {}
+        packed = params.get("packed", False)
+
+        if isinstance(image, BinaryImage) and operation not in ImageProcessor.BINARY_OPERATIONS:
+            image = image.unpack()
+
+        color_mode = params.get("color_mode", "gray")
+        if color_mode != "gray" and len(image.shape) == 3 and operation in ImageProcessor.COLOR_OPERATIONS:
+            return ImageProcessor.apply_color_mode(image, operation, params, color_mode, as_rgb=as_rgb)
+
+        if operation == "Лінейнае кантраставаньне":
+            return ImageProcessor.linear_contrast(image, as_rgb=as_rgb)
+        elif operation == "Павялічыць яркасць":
+            return ImageProcessor.adjust_brightness(image, params.get("factor", 1.5))
+        elif operation == "Павялічыць кантраснасць":
+            return ImageProcessor.adjust_contrast(image, params.get("factor", 1.5))
+        elif operation == "Мануальная парогавая апрацоўка":
+            return ImageProcessor.manual_threshold(image, params.get("threshold", 127), as_rgb=as_rgb,
+                                                   packed=packed)
+        elif operation == "Адаптыўная парогавая апрацоўка (Otsu)":
+            return ImageProcessor.adaptive_threshold_otsu(image, as_rgb=as_rgb, packed=packed)
+        elif operation == "Лякальная парогавая апрацоўка (Gaussian)":
+            return ImageProcessor.local_threshold_gaussian(image, params.get("block_size", 11),
+                                                           params.get("C", 2), as_rgb=as_rgb, packed=packed)
+        elif operation == "Лякальная парогавая апрацоўка (Mean)":
+            return ImageProcessor.local_threshold_mean(image, params.get("block_size", 11),
+                                                       params.get("C", 2), as_rgb=as_rgb, packed=packed)
+        elif operation == "Інвертаваць колеры":
+            return ImageProcessor.invert_colors(image)
+        elif operation == "Глабальная парогавая апрацоўка (Mean)":
+            return ImageProcessor.global_threshold_mean(image, as_rgb=as_rgb, packed=packed)
+        elif operation in ImageProcessor.HISTOGRAM_METHODS:
+            return ImageProcessor.histogram_threshold(image, ImageProcessor.HISTOGRAM_METHODS[operation],
+                                                      params.get("percentile", 50), params.get("hist"),
+                                                      as_rgb=as_rgb, packed=packed)
+        elif operation == "Марфалагічнае пашырэнне":
+            return ImageProcessor.dilate(image, params.get("radius", 1), as_rgb=as_rgb, packed=packed)
+        elif operation == "Марфалагічнае звужэнне":
+            return ImageProcessor.erode(image, params.get("radius", 1), as_rgb=as_rgb, packed=packed)
+        else:
+            return image.copy()
+
     @staticmethod
     def rgb_to_grayscale(image):
+        """
+        Яркасць выявы. Для выявы з кэшам яркасці (і яе зрэзаў) вяртаецца
+        ўжо вылічаная плоскасць.
+        """
         if len(image.shape) == 3:
-            gray = np.dot(image[..., :3], [0.299, 0.587, 0.114])
-            return gray.astype(np.uint8)
+            cached = ImageProcessor.cached_luminance(image)
+            if cached is not None:
+                return cached
+            return ImageProcessor.luminance(image)
         else:
             return image
 
+    @staticmethod
+    def luminance(image):
+        """Яркасць (77R + 150G + 29B) >> 8 у цэлых uint16 без часовых масіваў з плаваючай коскай"""
+        rgb = image[..., :3]
+        gray = rgb[..., 0].astype(np.uint16)
+        gray *= 77
+        channel = rgb[..., 1].astype(np.uint16)
+        channel *= 150
+        gray += channel
+        np.multiply(rgb[..., 2], np.uint16(29), out=channel, dtype=np.uint16)
+        gray += channel
+        gray >>= 8
+        return gray.astype(np.uint8)
+
+    @staticmethod
+    def cache_luminance(image):
+        """
+        Вылічыць плоскасць яркасці загружанай выявы адзін раз; далей
+        rgb_to_grayscale вяртае яе для гэтай выявы і для яе зрэзаў (пліткі,
+        палосы), таму гістаграма, парогі і кантраст не пералічваюць яе.
+        """
+        gray = ImageProcessor.luminance(image) if len(image.shape) == 3 else image
+        with ImageProcessor._cache_lock:
+            ImageProcessor._luminance_entry = (weakref.ref(image), gray)
+        return gray
+
+    @staticmethod
+    def cached_luminance(image):
+        # Крыніца і плоскасць бяруцца адной парай, каб іншы паток не
+        # падмяніў плоскасць паміж праверкай крыніцы і зрэзам
+        with ImageProcessor._cache_lock:
+            entry = ImageProcessor._luminance_entry
+            source = entry[0]() if entry else None
+            if entry and source is None:
+                ImageProcessor._luminance_entry = None
+        if source is None:
+            return None
+        luminance = entry[1]
+        if image is source:
+            return luminance
+
+        origin = ImageProcessor.view_origin(image, source)
+        if origin is None:
+            return None
+        row, col = origin
+        height, width = image.shape[:2]
+        return luminance[row:row + height, col:col + width]
+
+    @staticmethod
+    def view_origin(image, source):
+        """Радок і слупок, з якіх image пачынаецца ўнутры source, калі гэта яе зрэз"""
+        owner = source if source.base is None else source.base
+        if image.base is not owner or image.strides != source.strides:
+            return None
+
+        offset = image.ctypes.data - source.ctypes.data
+        if offset < 0:
+            return None
+        row, rest = divmod(offset, source.strides[0])
+        col, rest = divmod(rest, source.strides[1])
+        height, width = image.shape[:2]
+        if rest or row + height > source.shape[0] or col + width > source.shape[1]:
+            return None
+        return row, col
+
+    @staticmethod
+    def color_planes(image, space):
+        """
+        Светлыня і астатнія кампаненты выявы ў прасторы space ("lab", "hls").
+        Пераўтварэнне робіцца адзін раз на выяву; для яе зрэзаў (пліткі,
+        папярэдні прагляд той жа выявы) вяртаюцца зрэзы гатовых плоскасцей.
+        """
+        split, _ = LIGHTNESS_SPACES[space]
+        with ImageProcessor._cache_lock:
+            entries = [(source, planes) for source, planes in
+                       ((source_ref(), planes) for source_ref, planes in ImageProcessor._color_planes.get(space, []))
+                       if source is not None]
+            ImageProcessor._color_planes[space] = [(weakref.ref(source), planes) for source, planes in entries]
+
+        for source, planes in entries:
+            if image is source:
+                return planes
+            origin = ImageProcessor.view_origin(image, source)
+            if origin is not None:
+                return crop_planes(planes, *origin, *image.shape[:2])
+
+        planes = split(image)
+        if image.base is None:
+            with ImageProcessor._cache_lock:
+                cached = ImageProcessor._color_planes.setdefault(space, [])
+                cached.append((weakref.ref(image), planes))
+                del cached[:-ImageProcessor.COLOR_PLANES_CACHE_SIZE]
+        return planes
+
+    @staticmethod
+    def map_channels(function, planes):
+        """Выканаць function для кожнай плоскасці паралельна (NumPy вызваляе GIL)"""
+        with ImageProcessor._cache_lock:
+            if ImageProcessor._channel_executor is None:
+                ImageProcessor._channel_executor = ThreadPoolExecutor(max_workers=3)
+        return list(ImageProcessor._channel_executor.map(function, planes))
+
+    @staticmethod
+    def apply_color_mode(image, operation, params, color_mode, as_rgb=True):
+        """
+        Аперацыя над колеравай выявай без зводу да адценняў шэрага: у рэжыме
+        "channels" - над кожным каналам RGB паралельна, у рэжымах "lab" і
+        "hls" - толькі над светлынёй, пасля чаго колер аднаўляецца.
+        """
+        # Гістаграма яркасці не адпавядае асобным каналам і светлыні
+        plane_params = {k: v for k, v in params.items() if k not in ("color_mode", "hist", "packed")}
+
+        def process(plane):
+            return ImageProcessor.apply_operation(plane, operation, plane_params, as_rgb=False)
+
+        if color_mode == "channels":
+            channels = ImageProcessor.map_channels(process, [image[..., c] for c in range(3)])
+            return np.stack(channels, axis=2)
+
+        lightness, rest = ImageProcessor.color_planes(image, color_mode)
+        result = process(lightness)
+        if operation not in ImageProcessor.LUT_OPERATIONS:
+            # Парог светлыні дае бінарную выяву
+            return ImageProcessor.binary_result(result > 127, as_rgb, params.get("packed", False))
+
+        _, merge = LIGHTNESS_SPACES[color_mode]
+        return merge(result, rest)
+
     @staticmethod
     def grayscale_to_rgb(image):
+        if isinstance(image, BinaryImage):
+            return image.to_rgb()
         if len(image.shape) == 2:
             rgb = np.stack([image, image, image], axis=2)
             return rgb.astype(np.uint8)
@@ -46,7 +314,248 @@ class ImageProcessor:
             return image
 
     @staticmethod
-    def linear_contrast(image):
+    def binary_result(mask, as_rgb=True, packed=False):
+        """Вынік бінарнай аперацыі: BinaryImage, плоскасць 0/255 або RGB"""
+        if packed:
+            return mask if isinstance(mask, BinaryImage) else BinaryImage.from_mask(mask)
+        if isinstance(mask, BinaryImage):
+            result = mask.unpack()
+        else:
+            result = np.where(mask, 255, 0).astype(np.uint8)
+        return ImageProcessor.grayscale_to_rgb(result) if as_rgb else result
+
+    @staticmethod
+    def downsample(image):
+        """Памяншэнне выявы ўдвая: сярэдняе па блоках 2×2"""
+        height, width = image.shape[:2]
+        blocks = image[:height // 2 * 2, :width // 2 * 2].astype(np.uint16)
+        result = (blocks[0::2, 0::2] + blocks[1::2, 0::2] + blocks[0::2, 1::2] + blocks[1::2, 1::2] + 2) // 4
+        return result.astype(np.uint8)
+
+    @staticmethod
+    def build_pyramid(image, min_size=256):
+        """Піраміда выяў: зыходная выява і яе памяншэнні ўдвая да min_size"""
+        levels = [image]
+        while min(levels[-1].shape[:2]) // 2 >= min_size:
+            levels.append(ImageProcessor.downsample(levels[-1]))
+        return levels
+
+    @staticmethod
+    def pyramid_level(pyramid, width, height):
+        """Найменшы ўзровень піраміды, не меншы за width×height"""
+        for level in reversed(pyramid):
+            if level.shape[1] >= width and level.shape[0] >= height:
+                return level
+        return pyramid[0]
+
+    @staticmethod
+    def integral_image(gray):
+        """
+        Табліца сум (summed-area table) з нулявым першым радком і слупком:
+        sat[i, j] = сума gray[:i, :j]
+        """
+        height, width = gray.shape
+        sat = np.zeros((height + 1, width + 1), dtype=np.int64)
+        np.cumsum(np.cumsum(gray, axis=0, dtype=np.int64), axis=1, out=sat[1:, 1:])
+        return sat
+
+    @staticmethod
+    def box_sum(gray, radius, sat=None):
+        """
+        Сума і колькасць пікселяў у акне (2*radius+1)² для кожнага пікселя.
+        Акно абразаецца па межах выявы гэтак жа, як зрэз gray[i_min:i_max, j_min:j_max].
+        """
+        height, width = gray.shape
+        if sat is None:
+            sat = ImageProcessor.integral_image(gray)
+
+        rows = np.arange(height)
+        cols = np.arange(width)
+        i_min = np.maximum(rows - radius, 0)
+        i_max = np.minimum(rows + radius + 1, height)
+        j_min = np.maximum(cols - radius, 0)
+        j_max = np.minimum(cols + radius + 1, width)
+
+        # Спачатку рознасць радкоў табліцы, потым слупкоў: дзве выбаркі па
+        # адной восі танней за чатыры двухмерныя выбаркі np.ix_
+        band = np.take(sat, i_max, axis=0)
+        band -= np.take(sat, i_min, axis=0)
+        total = np.take(band, j_max, axis=1)
+        total -= np.take(band, j_min, axis=1)
+        count = np.outer(i_max - i_min, j_max - j_min)
+        return total, count
+
+    @staticmethod
+    def box_mean(gray, radius, sat=None):
+        """
+        Сярэдняе па акне (2*radius+1)² для кожнага пікселя за O(1) на піксель.
+        """
+        total, count = ImageProcessor.box_sum(gray, radius, sat)
+        return total / count
+
+    @staticmethod
+    def window_sum(sat, rows, cols, radius):
+        """Сума і колькасць пікселяў у абрэзаных вокнах толькі вакол пікселяў (rows, cols)"""
+        height, width = sat.shape[0] - 1, sat.shape[1] - 1
+        i_min = np.maximum(rows - radius, 0)
+        i_max = np.minimum(rows + radius + 1, height)
+        j_min = np.maximum(cols - radius, 0)
+        j_max = np.minimum(cols + radius + 1, width)
+
+        total = sat[i_max, j_max] - sat[i_min, j_max] - sat[i_max, j_min] + sat[i_min, j_min]
+        return total, (i_max - i_min) * (j_max - j_min)
+
+    @staticmethod
+    def running_extremum(array, radius, axis, func):
+        """
+        Бягучы максімум/мінімум (func = np.maximum або np.minimum) у акне
+        2*radius+1 уздоўж адной восі па схеме van Herk/Gil-Werman:
+        тры параўнанні на элемент незалежна ад памеру акна.
+        """
+        array = np.moveaxis(np.asarray(array), axis, 0)
+        length = array.shape[0]
+        window = 2 * radius + 1
+
+        if np.issubdtype(array.dtype, np.integer):
+            info = np.iinfo(array.dtype)
+            fill = info.min if func is np.maximum else info.max
+        else:
+            fill = -np.inf if func is np.maximum else np.inf
+
+        blocks = -(-(length + 2 * radius) // window)
+        padded = np.full((blocks * window,) + array.shape[1:], fill, dtype=array.dtype)
+        padded[radius:radius + length] = array
+
+        blocked = padded.reshape((blocks, window) + array.shape[1:])
+        prefix = func.accumulate(blocked, axis=1).reshape(padded.shape)
+        suffix = func.accumulate(blocked[:, ::-1], axis=1)[:, ::-1].reshape(padded.shape)
+
+        result = func(suffix[:length], prefix[window - 1:window - 1 + length])
+        return np.moveaxis(result, 0, axis)
+
+    @staticmethod
+    def box_extrema(gray, radius):
+        """
+        Мінімум і максімум у акне (2*radius+1)², абрэзаным па межах выявы.
+        """
+        local_min = ImageProcessor.running_extremum(gray, radius, 0, np.minimum)
+        local_min = ImageProcessor.running_extremum(local_min, radius, 1, np.minimum)
+        local_max = ImageProcessor.running_extremum(gray, radius, 0, np.maximum)
+        local_max = ImageProcessor.running_extremum(local_max, radius, 1, np.maximum)
+        return local_min, local_max
+
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def gaussian_kernel(radius, sigma):
+        """
+        Аднамернае ядро Гаўса даўжынёй 2*radius+1 (без нармалізацыі).
+        Ядро будуецца адзін раз для кожнай пары (radius, sigma).
+        """
+        offsets = np.arange(-radius, radius + 1, dtype=np.float64)
+        kernel = np.exp(-(offsets ** 2) / (2 * sigma ** 2))
+        kernel.flags.writeable = False
+        return kernel
+
+    @staticmethod
+    def convolve_axis(array, kernel, axis):
+        """
+        Згортка ўздоўж адной восі з нулямі за межамі выявы.
+        """
+        radius = len(kernel) // 2
+        array = np.moveaxis(np.asarray(array, dtype=np.float64), axis, 0)
+        length = array.shape[0]
+
+        pad_width = [(radius, radius)] + [(0, 0)] * (array.ndim - 1)
+        padded = np.pad(array, pad_width)
+
+        result = np.zeros_like(array)
+        for offset, weight in enumerate(kernel):
+            result += weight * padded[offset:offset + length]
+
+        return np.moveaxis(result, 0, axis)
+
+    @staticmethod
+    def gaussian_mean(gray, radius, sigma):
+        """
+        Узважанае па Гаўсу сярэдняе ў акне (2*radius+1)², разлічанае двума
+        аднамернымі праходамі. Каля межаў вагі перанармалёўваюцца толькі па
+        пікселях унутры выявы.
+        """
+        kernel = ImageProcessor.gaussian_kernel(radius, float(sigma))
+
+        weighted_sum = ImageProcessor.convolve_axis(gray, kernel, axis=0)
+        weighted_sum = ImageProcessor.convolve_axis(weighted_sum, kernel, axis=1)
+
+        row_norm = ImageProcessor.convolve_axis(np.ones(gray.shape[0]), kernel, axis=0)
+        col_norm = ImageProcessor.convolve_axis(np.ones(gray.shape[1]), kernel, axis=0)
+
+        return weighted_sum / np.outer(row_norm, col_norm)
+
+    @staticmethod
+    def apply_lut(image, lut):
+        """Прымяніць 256-элементную табліцу да кожнага канала адной аперацыяй take"""
+        if len(image.shape) == 3 and image.shape[2] != 3:
+            result = np.zeros_like(image)
+            result[..., :3] = np.take(lut, image[..., :3])
+            return result
+        return np.take(lut, image)
+
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def brightness_lut(factor):
+        levels = np.arange(256, dtype=np.float64)
+        lut = np.clip((levels * factor).astype(np.float32), 0, 255).astype(np.uint8)
+        lut.flags.writeable = False
+        return lut
+
+    @staticmethod
+    def contrast_lut(mean_brightness, factor):
+        levels = np.arange(256, dtype=np.float64)
+        result = (mean_brightness + (levels - mean_brightness) * factor).astype(np.float32)
+        return np.clip(result, 0, 255).astype(np.uint8)
+
+    @staticmethod
+    def linear_contrast_lut(min_val, max_val):
+        min_val = np.uint8(min_val)
+        max_val = np.uint8(max_val)
+        levels = np.clip(np.arange(256), min_val, max_val).astype(np.uint8)
+        if max_val == min_val:
+            return levels
+
+        contrasted = ((levels - min_val) / (max_val - min_val)) * 255
+        return contrasted.astype(np.float32).astype(np.uint8)
+
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def invert_lut():
+        lut = 255 - np.arange(256, dtype=np.uint8)
+        lut.flags.writeable = False
+        return lut
+
+    @staticmethod
+    def tone_lut(operation, params=None, hist=None):
+        """
+        Табліца для танальнай аперацыі. Для аперацый, што залежаць ад
+        статыстыкі выявы, патрэбна гістаграма яе адценняў шэрага.
+        """
+        params = params or {}
+
+        if operation == "Павялічыць яркасць":
+            return ImageProcessor.brightness_lut(params.get("factor", 1.5))
+        elif operation == "Інвертаваць колеры":
+            return ImageProcessor.invert_lut()
+        elif operation == "Павялічыць кантраснасць":
+            return ImageProcessor.contrast_lut(ImageProcessor.histogram_mean(hist), params.get("factor", 1.5))
+        elif operation == "Лінейнае кантраставаньне":
+            levels = np.flatnonzero(hist)
+            if len(levels) == 0:
+                return ImageProcessor.linear_contrast_lut(0, 0)
+            return ImageProcessor.linear_contrast_lut(levels[0], levels[-1])
+        else:
+            raise ValueError(f"Аперацыя не зводзіцца да табліцы: {operation}")
+
+    @staticmethod
+    def linear_contrast(image, as_rgb=True):
         if len(image.shape) == 3:
             gray = ImageProcessor.rgb_to_grayscale(image)
         else:
@@ -56,30 +565,14 @@ class ImageProcessor:
         max_val = np.max(gray)
 
         if max_val == min_val:
-            return ImageProcessor.grayscale_to_rgb(gray)
+            return ImageProcessor.grayscale_to_rgb(gray) if as_rgb else gray
 
-        contrasted = np.zeros_like(gray, dtype=np.float32)
-        for i in range(gray.shape[0]):
-            for j in range(gray.shape[1]):
-                contrasted[i, j] = ((gray[i, j] - min_val) / (max_val - min_val)) * 255
-
-        contrasted = contrasted.astype(np.uint8)
-        return ImageProcessor.grayscale_to_rgb(contrasted)
+        contrasted = ImageProcessor.apply_lut(gray, ImageProcessor.linear_contrast_lut(min_val, max_val))
+        return ImageProcessor.grayscale_to_rgb(contrasted) if as_rgb else contrasted
 
     @staticmethod
     def adjust_brightness(image, factor):
-        result = np.zeros_like(image, dtype=np.float32)
-
-        for i in range(image.shape[0]):
-            for j in range(image.shape[1]):
-                if len(image.shape) == 3:
-                    for k in range(3):
-                        result[i, j, k] = image[i, j, k] * factor
-                else:
-                    result[i, j] = image[i, j] * factor
-
-        result = np.clip(result, 0, 255).astype(np.uint8)
-        return result
+        return ImageProcessor.apply_lut(image, ImageProcessor.brightness_lut(factor))
 
     @staticmethod
     def adjust_contrast(image, factor):
@@ -90,38 +583,19 @@ class ImageProcessor:
 
         mean_brightness = np.mean(gray)
 
-        result = np.zeros_like(image, dtype=np.float32)
-
-        for i in range(image.shape[0]):
-            for j in range(image.shape[1]):
-                if len(image.shape) == 3:
-                    for k in range(3):
-                        result[i, j, k] = mean_brightness + (image[i, j, k] - mean_brightness) * factor
-                else:
-                    result[i, j] = mean_brightness + (image[i, j] - mean_brightness) * factor
-
-        result = np.clip(result, 0, 255).astype(np.uint8)
-        return result
+        return ImageProcessor.apply_lut(image, ImageProcessor.contrast_lut(mean_brightness, factor))
 
     @staticmethod
-    def manual_threshold(image, threshold_value):
+    def manual_threshold(image, threshold_value, as_rgb=True, packed=False):
         if len(image.shape) == 3:
             gray = ImageProcessor.rgb_to_grayscale(image)
         else:
             gray = image
 
-        thresholded = np.zeros_like(gray)
-        for i in range(gray.shape[0]):
-            for j in range(gray.shape[1]):
-                if gray[i, j] > threshold_value:
-                    thresholded[i, j] = 255
-                else:
-                    thresholded[i, j] = 0
-
-        return ImageProcessor.grayscale_to_rgb(thresholded)
+        return ImageProcessor.binary_result(gray > threshold_value, as_rgb, packed)
 
     @staticmethod
-    def adaptive_threshold_otsu(image):
+    def adaptive_threshold_otsu(image, as_rgb=True, packed=False):
         """
         Адаптыўная парогавая апрацоўка паводле формул з прэзентацыі
         """
@@ -130,166 +604,223 @@ class ImageProcessor:
         else:
             gray = image
 
-        height, width = gray.shape
-        result = np.zeros_like(gray)
-
         K = 3
         alpha = 2/3
+        height, width = gray.shape
 
-        for i in range(height):
-            for j in range(width):
-                f_mn = gray[i, j]
-
-                i_min = max(0, i - K)
-                i_max = min(height, i + K + 1)
-                j_min = max(0, j - K)
-                j_max = min(width, j + K + 1)
-
-                region = gray[i_min:i_max, j_min:j_max]
-
-                f_max = np.max(region)
-                f_min = np.min(region)
-                P_hat = np.mean(region)
-
-                delta_f_max = f_max - P_hat
-                delta_f_min = abs(f_min - P_hat)
-
-                if delta_f_max > delta_f_min:
-                    t = alpha * (2/3 * f_min + 1/3 * P_hat)
-                elif delta_f_max < delta_f_min:
-                    t = alpha * (1/3 * f_min + 2/3 * P_hat)
-                else:
-                    if f_max != f_min:
-                        K_temp = K + 1
-                        i_min_temp = max(0, i - K_temp)
-                        i_max_temp = min(height, i + K_temp + 1)
-                        j_min_temp = max(0, j - K_temp)
-                        j_max_temp = min(width, j + K_temp + 1)
-
-                        region_temp = gray[i_min_temp:i_max_temp, j_min_temp:j_max_temp]
-                        f_max_temp = np.max(region_temp)
-                        f_min_temp = np.min(region_temp)
-                        P_hat_temp = np.mean(region_temp)
-
-                        delta_f_max_temp = f_max_temp - P_hat_temp
-                        delta_f_min_temp = abs(f_min_temp - P_hat_temp)
-
-                        if delta_f_max_temp > delta_f_min_temp:
-                            t = alpha * (2/3 * f_min_temp + 1/3 * P_hat_temp)
-                        elif delta_f_max_temp < delta_f_min_temp:
-                            t = alpha * (1/3 * f_min_temp + 2/3 * P_hat_temp)
-                        else:
-                            t = alpha * P_hat_temp
+        # Статыстыка акна (2K+1)² для ўсёй выявы адразу
+        sat = ImageProcessor.integral_image(gray)
+        f_min, f_max = ImageProcessor.box_extrema(gray, K)
+        total, count = ImageProcessor.box_sum(gray, K, sat)
+        P_hat = total / count
+
+        # Знак delta_f_max - delta_f_min у цэлых: n*(f_max + f_min) - 2*сума.
+        # Дакладныя адхіленні адрозніваюцца не менш чым на 1/n, таму знак
+        # супадае з параўнаннем акругленых float64 у папіксельнай версіі
+        side = np.sign(count * (f_max.astype(np.int32) + f_min) - 2 * total).astype(np.int8)
+        t_min = f_min
+        t_mean = P_hat
+
+        # Пашыранае акно (2K+3)² патрэбнае толькі там, дзе адхіленні роўныя
+        rows, cols = np.nonzero((side == 0) & (f_max != f_min))
+        if len(rows):
+            # Экстрэмумы акна (2K+3)² - экстрэмумы акон (2K+1)² суседзяў 3×3
+            min_temp = max_temp = None
+            for dr in (-1, 0, 1):
+                r = np.clip(rows + dr, 0, height - 1)
+                for dc in (-1, 0, 1):
+                    c = np.clip(cols + dc, 0, width - 1)
+                    if min_temp is None:
+                        min_temp, max_temp = f_min[r, c], f_max[r, c]
                     else:
-                        t = alpha * P_hat
+                        np.minimum(min_temp, f_min[r, c], out=min_temp)
+                        np.maximum(max_temp, f_max[r, c], out=max_temp)
+            total_temp, count_temp = ImageProcessor.window_sum(sat, rows, cols, K + 1)
+
+            t_min = f_min.copy()
+            t_mean = P_hat.copy()
+            t_min[rows, cols] = min_temp
+            t_mean[rows, cols] = total_temp / count_temp
+            side[rows, cols] = np.sign(count_temp * (max_temp.astype(np.int32) + min_temp) - 2 * total_temp)
+
+        # side > 0: t = α(2/3·f_min + 1/3·P̂), side < 0: t = α(1/3·f_min + 2/3·P̂),
+        # роўныя адхіленні (і аднатоннае акно): t = α·P̂
+        weight_min = np.array([1/3, 0.0, 2/3])[side + 1]
+        weight_mean = np.array([2/3, 1.0, 1/3])[side + 1]
+        t = weight_min * t_min
+        t += weight_mean * t_mean
+        t *= alpha
+
+        deviation = P_hat - gray
+        np.abs(deviation, out=deviation)
+        return ImageProcessor.binary_result(deviation > t, as_rgb, packed)
+
+    @staticmethod
+    def local_threshold_gaussian(image, block_size=11, C=2, as_rgb=True, packed=False):
+        if len(image.shape) == 3:
+            gray = ImageProcessor.rgb_to_grayscale(image)
+        else:
+            gray = image
 
-                if abs(P_hat - f_mn) > t:
-                    result[i, j] = 255
-                else:
-                    result[i, j] = 0
+        sigma = block_size / 4
+        # Параўнанне ў float32, як у папіксельнай версіі: унёскі далёкіх пікселяў,
+        # меншыя за паўкроку float32, знікаюць, і на роўных участках сярэдняе
+        # дакладна роўнае пікселю - інакш пры C=0 вынік залежыць ад акруглення
+        weighted_mean = ImageProcessor.gaussian_mean(gray, block_size // 2, sigma).astype(np.float32)
+        return ImageProcessor.binary_result(gray > weighted_mean - C, as_rgb, packed)
 
-        return ImageProcessor.grayscale_to_rgb(result)
+    @staticmethod
+    def local_threshold_mean(image, block_size=11, C=2, as_rgb=True, packed=False):
+        if len(image.shape) == 3:
+            gray = ImageProcessor.rgb_to_grayscale(image)
+        else:
+            gray = image
 
-        thresholded = np.zeros_like(gray)
-        for i in range(gray.shape[0]):
-            for j in range(gray.shape[1]):
-                if gray[i, j] > optimal_threshold:
-                    thresholded[i, j] = 255
-                else:
-                    thresholded[i, j] = 0
+        half_block = block_size // 2
+        local_mean = ImageProcessor.box_mean(gray, half_block)
+        return ImageProcessor.binary_result(gray > local_mean - C, as_rgb, packed)
 
-        return ImageProcessor.grayscale_to_rgb(thresholded)
+    @staticmethod
+    def invert_colors(image):
+        if isinstance(image, BinaryImage):
+            return image.invert()
+        return ImageProcessor.apply_lut(image, ImageProcessor.invert_lut())
 
     @staticmethod
-    def local_threshold_gaussian(image, block_size=11, C=2):
+    def global_threshold_mean(image, as_rgb=True, packed=False):
         if len(image.shape) == 3:
             gray = ImageProcessor.rgb_to_grayscale(image)
         else:
             gray = image
 
-        thresholded = np.zeros_like(gray)
-        half_block = block_size // 2
+        mean_val = ImageProcessor.histogram_mean(ImageProcessor.histogram(gray))
+        return ImageProcessor.binary_result(gray > mean_val, as_rgb, packed)
 
-        for i in range(gray.shape[0]):
-            for j in range(gray.shape[1]):
-                i_min = max(0, i - half_block)
-                i_max = min(gray.shape[0], i + half_block + 1)
-                j_min = max(0, j - half_block)
-                j_max = min(gray.shape[1], j + half_block + 1)
+    @staticmethod
+    def dilate(image, radius=1, as_rgb=True, packed=False):
+        """Марфалагічнае пашырэнне белых абласцей бінарнай выявы"""
+        if not isinstance(image, BinaryImage):
+            image = BinaryImage.from_array(image)
+        return ImageProcessor.binary_result(image.dilate(radius), as_rgb, packed)
 
-                region = gray[i_min:i_max, j_min:j_max]
-                weights = np.zeros_like(region, dtype=np.float32)
-                center_i = i - i_min
-                center_j = j - j_min
+    @staticmethod
+    def erode(image, radius=1, as_rgb=True, packed=False):
+        """Марфалагічнае звужэнне белых абласцей бінарнай выявы"""
+        if not isinstance(image, BinaryImage):
+            image = BinaryImage.from_array(image)
+        return ImageProcessor.binary_result(image.erode(radius), as_rgb, packed)
+
+    @staticmethod
+    def histogram(gray):
+        """256-бінная гістаграма выявы ў адценнях шэрага за адзін праход"""
+        return np.bincount(gray.ravel(), minlength=256)[:256]
+
+    @staticmethod
+    def histogram_mean(hist):
+        total = hist.sum()
+        if total == 0:
+            return 0.0
+        return np.dot(hist, np.arange(len(hist))) / total
 
-                for x in range(region.shape[0]):
-                    for y in range(region.shape[1]):
-                        distance = math.sqrt((x - center_i)**2 + (y - center_j)**2)
-                        weights[x, y] = math.exp(-(distance**2) / (2 * (block_size/4)**2))
+    @staticmethod
+    def otsu_threshold(hist):
+        """Сапраўдны метад Otsu: парог з максімальнай міжкласавай дысперсіяй"""
+        total = hist.sum()
+        if total == 0:
+            return 0
 
-                weights /= np.sum(weights)
-                weighted_mean = np.sum(region * weights)
+        levels = np.arange(len(hist))
+        omega = np.cumsum(hist) / total
+        mu = np.cumsum(hist * levels) / total
+        mu_total = mu[-1]
 
-                if gray[i, j] > weighted_mean - C:
-                    thresholded[i, j] = 255
-                else:
-                    thresholded[i, j] = 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sigma_b = (mu_total * omega - mu) ** 2 / (omega * (1 - omega))
+        sigma_b = np.nan_to_num(sigma_b, nan=0.0, posinf=0.0)
 
-        return ImageProcessor.grayscale_to_rgb(thresholded)
+        return int(np.argmax(sigma_b))
 
     @staticmethod
-    def local_threshold_mean(image, block_size=11, C=2):
-        if len(image.shape) == 3:
-            gray = ImageProcessor.rgb_to_grayscale(image)
-        else:
-            gray = image
+    def triangle_threshold(hist):
+        """Метад трохкутніка: найдалейшы ад лініі пік-край бін гістаграмы"""
+        nonzero = np.flatnonzero(hist)
+        if len(nonzero) == 0:
+            return 0
 
-        thresholded = np.zeros_like(gray)
-        half_block = block_size // 2
+        low, high = nonzero[0], nonzero[-1]
+        peak = int(np.argmax(hist))
+        end = high if high - peak > peak - low else low
+        if end == peak:
+            return peak
 
-        for i in range(gray.shape[0]):
-            for j in range(gray.shape[1]):
-                i_min = max(0, i - half_block)
-                i_max = min(gray.shape[0], i + half_block + 1)
-                j_min = max(0, j - half_block)
-                j_max = min(gray.shape[1], j + half_block + 1)
+        step = 1 if end > peak else -1
+        levels = np.arange(peak, end + step, step)
+        distance = np.abs((peak - end) * hist[levels] - hist[peak] * (levels - end))
 
-                region = gray[i_min:i_max, j_min:j_max]
-                local_mean = np.mean(region)
+        return int(levels[np.argmax(distance)])
 
-                if gray[i, j] > local_mean - C:
-                    thresholded[i, j] = 255
-                else:
-                    thresholded[i, j] = 0
+    @staticmethod
+    def isodata_threshold(hist, max_iterations=256):
+        """Ітэрацыйны метад Ridler-Calvard (isodata)"""
+        levels = np.arange(len(hist))
+        counts = np.cumsum(hist)
+        sums = np.cumsum(hist * levels)
+        total, total_sum = counts[-1], sums[-1]
+        if total == 0:
+            return 0
+
+        threshold = int(total_sum / total)
+        for _ in range(max_iterations):
+            low_count = counts[threshold]
+            high_count = total - low_count
+            if low_count == 0 or high_count == 0:
+                break
+
+            low_mean = sums[threshold] / low_count
+            high_mean = (total_sum - sums[threshold]) / high_count
+            new_threshold = int((low_mean + high_mean) / 2)
+            if new_threshold == threshold:
+                break
+            threshold = new_threshold
+
+        return threshold
 
-        return ImageProcessor.grayscale_to_rgb(thresholded)
+    @staticmethod
+    def percentile_threshold(hist, percentile=50):
+        """Найменшы ўзровень, да якога ўключна трапляе percentile % пікселяў"""
+        counts = np.cumsum(hist)
+        if counts[-1] == 0:
+            return 0
+        return int(np.searchsorted(counts, counts[-1] * percentile / 100))
 
     @staticmethod
-    def invert_colors(image):
-        result = np.zeros_like(image)
-        for i in range(image.shape[0]):
-            for j in range(image.shape[1]):
-                if len(image.shape) == 3:
-                    for k in range(3):
-                        result[i, j, k] = 255 - image[i, j, k]
-                else:
-                    result[i, j] = 255 - image[i, j]
-        return result
-
-    @staticmethod
-    def global_threshold_mean(image):
+    def histogram_threshold(image, method, percentile=50, hist=None, as_rgb=True, packed=False):
+        """
+        Глабальная парогавая апрацоўка па гістаграме: method - адзін з
+        "otsu", "triangle", "isodata", "percentile", "mean".
+        """
         if len(image.shape) == 3:
             gray = ImageProcessor.rgb_to_grayscale(image)
         else:
             gray = image
 
-        mean_val = np.mean(gray)
-        thresholded = np.zeros_like(gray)
-        for i in range(gray.shape[0]):
-            for j in range(gray.shape[1]):
-                if gray[i, j] > mean_val:
-                    thresholded[i, j] = 255
-                else:
-                    thresholded[i, j] = 0
+        if hist is None:
+            hist = ImageProcessor.histogram(gray)
+
+        threshold_value = ImageProcessor.threshold_from_histogram(hist, method, percentile)
+        return ImageProcessor.binary_result(gray > threshold_value, as_rgb, packed)
 
-        return ImageProcessor.grayscale_to_rgb(thresholded)
+    @staticmethod
+    def threshold_from_histogram(hist, method, percentile=50):
+        if method == "otsu":
+            return ImageProcessor.otsu_threshold(hist)
+        elif method == "triangle":
+            return ImageProcessor.triangle_threshold(hist)
+        elif method == "isodata":
+            return ImageProcessor.isodata_threshold(hist)
+        elif method == "percentile":
+            return ImageProcessor.percentile_threshold(hist, percentile)
+        elif method == "mean":
+            return ImageProcessor.histogram_mean(hist)
+        else:
+            raise ValueError(f"Невядомы метад парогу: {method}")
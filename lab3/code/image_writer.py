@@ -0,0 +1,102 @@
+import os
+import numpy as np
+from PIL import Image
+from binary_image import BinaryImage
+
+# Профілі кадавальнікаў: фармат, параметры Pillow і ці можна пісаць 1-бітныя выявы
+ENCODER_PROFILES = {
+    "PNG (хуткі)": {"format": "PNG", "extension": ".png", "options": {"compress_level": 1}, "bilevel": True},
+    "PNG (кампактны)": {"format": "PNG", "extension": ".png", "options": {"compress_level": 9}, "bilevel": True},
+    "JPEG (якасць 90)": {"format": "JPEG", "extension": ".jpg", "options": {"quality": 90}, "bilevel": False},
+    "JPEG (якасць 75)": {"format": "JPEG", "extension": ".jpg", "options": {"quality": 75}, "bilevel": False},
+    "TIFF (1-біт G4)": {"format": "TIFF", "extension": ".tif", "options": {"compression": "group4"}, "bilevel": True},
+}
+DEFAULT_PROFILE = "PNG (хуткі)"
+# Варыянт Netpbm вызначаецца рэжымам PIL, таму рэжым бярэцца з пашырэння:
+# .ppm - заўсёды P6 (RGB), .pgm - P5, 1-бітны P4 толькі для .pbm
+NETPBM_MODES = {".ppm": "RGB", ".pgm": "L", ".pbm": "1"}
+
+
+def single_plane(image):
+    """Адзін канал, калі ўсе каналы выявы аднолькавыя, інакш None"""
+    if len(image.shape) == 2:
+        return image
+    if image.shape[2] >= 3 and np.array_equal(image[..., 0], image[..., 1]) \
+            and np.array_equal(image[..., 0], image[..., 2]):
+        return image[..., 0]
+    return None
+
+
+def is_binary(plane):
+    """Ці складаецца плоскасць толькі з 0 і 255 (вынік парогавай апрацоўкі)"""
+    if plane.dtype == np.bool_:
+        return True
+    return not np.count_nonzero((plane != 0) & (plane != 255))
+
+
+def to_pil_image(image, bilevel=True):
+    """
+    PIL выява для захавання: бінарныя вынікі - 1 біт на піксель (mode "1"),
+    аднолькавыя каналы - адзін канал "L", астатняе - як ёсць. BinaryImage
+    перадаецца кадавальніку без распакоўкі.
+    """
+    if isinstance(image, BinaryImage):
+        return image.to_pil() if bilevel else Image.fromarray(image.unpack())
+
+    plane = single_plane(image)
+    if plane is None:
+        return Image.fromarray(image)
+    if bilevel and is_binary(plane):
+        return Image.fromarray(plane > 127)
+    return Image.fromarray(plane)
+
+
+def profile_for_path(file_path):
+    """Профіль па змаўчанні для пашырэння файла"""
+    ext = os.path.splitext(file_path)[1].lower()
+    for name, profile in ENCODER_PROFILES.items():
+        if profile["extension"] == ext or (ext == ".jpeg" and profile["format"] == "JPEG") \
+                or (ext == ".tiff" and profile["format"] == "TIFF"):
+            return name
+    return None
+
+
+def save_target(file_path, profile=None):
+    """
+    Шлях і профіль для захавання з дыялогу. Пашырэнне, уведзенае
+    карыстальнікам, мае перавагу над фільтрам дыялогу: профіль фільтра
+    застаецца, толькі калі ён піша той жа фармат, інакш профіль
+    выводзіцца з пашырэння. Без вядомага пашырэння дадаецца пашырэнне фільтра.
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+    extension_format = Image.registered_extensions().get(ext)
+    if extension_format is None:
+        if profile:
+            file_path += ENCODER_PROFILES[profile]["extension"]
+        return file_path, profile
+
+    if profile and ENCODER_PROFILES[profile]["format"] == extension_format:
+        return file_path, profile
+    return file_path, profile_for_path(file_path)
+
+
+def save_image(image, file_path, profile=None):
+    """Захаваць масіў з выбраным профілем кадавальніка"""
+    profile = profile or profile_for_path(file_path)
+    if profile is None:
+        mode = NETPBM_MODES.get(os.path.splitext(file_path)[1].lower())
+        pil_image = to_pil_image(image, bilevel=mode == "1")
+        if mode is not None and pil_image.mode != mode:
+            pil_image = pil_image.convert(mode)
+        pil_image.save(file_path)
+        return
+
+    settings = ENCODER_PROFILES[profile]
+    pil_image = to_pil_image(image, settings["bilevel"])
+    options = dict(settings["options"])
+
+    if settings["format"] == "TIFF" and pil_image.mode != "1":
+        # Group 4 магчымы толькі для 1-бітных выяў
+        options["compression"] = "tiff_lzw"
+
+    pil_image.save(file_path, settings["format"], **options)
@@ -0,0 +1,358 @@
+import os
+import tempfile
+import numpy as np
+from PIL import Image
+from binary_image import BinaryImage
+from image_processor import ImageProcessor
+from tile_scheduler import ProcessingCancelled
+
+NETPBM_EXTENSIONS = {'.ppm': 3, '.pgm': 1}
+# Фарматы, якія адлюстроўваюцца з дыска без раскадзіроўкі
+MEMMAP_EXTENSIONS = {'.npy', *NETPBM_EXTENSIONS}
+# Фарматы без сціску, якія раскадзіроўваюцца палосамі ў часовы memmap
+BAND_DECODE_EXTENSIONS = {'.tif', '.tiff', '.bmp', '.dib'}
+BAND_DECODE_FORMATS = {'TIFF', 'BMP', 'DIB'}
+
+
+def read_netpbm_header(file_path):
+    """(шырыня, вышыня, каналы, зрух пікселяў) для бінарных PPM (P6) і PGM (P5)"""
+    with open(file_path, 'rb') as f:
+        head = f.read(1024)
+
+    tokens = []
+    pos = 0
+    while len(tokens) < 4:
+        while pos < len(head) and head[pos:pos + 1].isspace():
+            pos += 1
+        if head[pos:pos + 1] == b'#':
+            pos = head.index(b'\n', pos) + 1
+            continue
+        start = pos
+        while pos < len(head) and not head[pos:pos + 1].isspace():
+            pos += 1
+        tokens.append(head[start:pos])
+
+    magic, width, height, maxval = tokens[0], int(tokens[1]), int(tokens[2]), int(tokens[3])
+    if magic not in (b'P5', b'P6') or maxval > 255:
+        raise ValueError("Падтрымліваюцца толькі 8-бітныя бінарныя PPM/PGM")
+
+    channels = 3 if magic == b'P6' else 1
+    return width, height, channels, pos + 1
+
+
+def open_lazy(file_path):
+    """PIL выява без раскадзіроўкі пікселяў і без абмежавання памеру (decompression bomb)"""
+    max_pixels = Image.MAX_IMAGE_PIXELS
+    Image.MAX_IMAGE_PIXELS = None
+    try:
+        return Image.open(file_path)
+    finally:
+        Image.MAX_IMAGE_PIXELS = max_pixels
+
+
+def raw_tiles(img):
+    """
+    Паласы (strips) або пліткі файла без сціску ў выглядзе
+    (межы, зрух у файле, байтаў у радку, rawmode, кірунак радкоў).
+    Сціснутыя файлы PIL раскадзіроўвае толькі цалкам, таму яны адхіляюцца.
+    """
+    if img.format not in BAND_DECODE_FORMATS:
+        raise ValueError(f"Фармат {img.format} не раскадзіроўваецца палосамі")
+    if img.format == 'TIFF' and img.tag_v2.get(284, 1) != 1:
+        raise ValueError("TIFF з асобнымі плоскасцямі каналаў не раскадзіроўваецца палосамі")
+
+    tiles = []
+    for decoder, extents, offset, args in img.tile:
+        if decoder != 'raw':
+            raise ValueError(f"{img.format} са сціскам ({decoder}) раскадзіроўваецца толькі цалкам: "
+                             f"для рэжыму out-of-core захавайце яго без сціску або ў PPM, PGM ці NPY")
+        if isinstance(args, str):
+            args = (args,)
+        rawmode, stride, orientation = (tuple(args) + (0, 1))[:3]
+        if not stride:
+            # Радкі TIFF без сціску: пікселі запар, радок выраўнаваны да байта
+            bits = img.tag_v2.get(258, (1,))
+            samples = img.tag_v2.get(277, len(bits))
+            pixel_bits = sum(bits) if len(bits) == samples else bits[0] * samples
+            stride = ((extents[2] - extents[0]) * pixel_bits + 7) // 8
+        tiles.append((extents, offset, abs(stride), rawmode, orientation))
+    return tiles
+
+
+def decode_to_memmap(file_path, scratch_path, band_rows=1024):
+    """
+    Раскадзіраваць TIFF або BMP без сціску ў memmap на дыску па палосах
+    радкоў. Радкі паласы чытаюцца з файла па зрухах палос або плітак PIL і
+    раскадзіроўваюцца асобна, таму ў памяці адначасова толькі адна паласа.
+    Адценні шэрага і 1-бітныя выявы захоўваюцца ў адным канале, астатняе - RGB.
+    """
+    with open_lazy(file_path) as img:
+        tiles = raw_tiles(img)
+        width, height = img.size
+        mode = 'L' if img.mode in ('1', 'L') else 'RGB'
+        palette = img.palette.getdata() if img.mode == 'P' and img.palette else None
+
+        shape = (height, width) if mode == 'L' else (height, width, 3)
+        scratch = np.memmap(scratch_path, dtype=np.uint8, mode='w+', shape=shape)
+        with open(file_path, 'rb') as f:
+            for y0 in range(0, height, band_rows):
+                y1 = min(height, y0 + band_rows)
+                for (x0, tile_y0, x1, tile_y1), offset, row_bytes, rawmode, orientation in tiles:
+                    r0, r1 = max(y0, tile_y0), min(y1, tile_y1)
+                    if r0 >= r1:
+                        continue
+                    # Радкі пліткі захоўваюцца зверху ўніз або (BMP) знізу ўверх
+                    first = r0 - tile_y0 if orientation > 0 else tile_y1 - r1
+                    f.seek(offset + first * row_bytes)
+                    data = f.read((r1 - r0) * row_bytes)
+
+                    piece = Image.frombuffer(img.mode, (x1 - x0, r1 - r0), data, 'raw',
+                                             rawmode, row_bytes, orientation)
+                    if palette is not None:
+                        piece.putpalette(palette[1], palette[0])
+                    x_end = min(x1, width)
+                    scratch[r0:r1, x0:x_end] = np.asarray(piece.convert(mode))[:, :x_end - x0]
+        scratch.flush()
+
+    return scratch
+
+
+def image_size(file_path):
+    """(шырыня, вышыня) выявы без раскадзіроўкі пікселяў"""
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == '.npy':
+        height, width = np.load(file_path, mmap_mode='r').shape[:2]
+        return width, height
+    if ext in NETPBM_EXTENSIONS:
+        return read_netpbm_header(file_path)[:2]
+    with open_lazy(file_path) as img:
+        return img.size
+
+
+def open_source(file_path, scratch_path=None, band_rows=1024):
+    """
+    Выява ў выглядзе масіва, адлюстраванага з дыска: NPY, PPM і PGM
+    адлюстроўваюцца наўпрост, TIFF і BMP без сціску раскадзіроўваюцца
+    палосамі ў scratch_path. Астатнія фарматы (PNG, JPEG, сціснуты TIFF)
+    Pillow раскадзіроўвае толькі цалкам, таму яны не падтрымліваюцца.
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+
+    if ext == '.npy':
+        source = np.load(file_path, mmap_mode='r')
+        if source.dtype != np.uint8 or source.ndim not in (2, 3) or (source.ndim == 3 and source.shape[2] != 3):
+            raise ValueError(f"NPY павінен утрымліваць масіў uint8 памерам H×W або H×W×3, "
+                             f"а не {source.dtype} {source.shape}")
+        return source
+
+    if ext in NETPBM_EXTENSIONS:
+        width, height, channels, offset = read_netpbm_header(file_path)
+        shape = (height, width, 3) if channels == 3 else (height, width)
+        return np.memmap(file_path, dtype=np.uint8, mode='r', offset=offset, shape=shape)
+
+    if ext in BAND_DECODE_EXTENSIONS and scratch_path is not None:
+        return decode_to_memmap(file_path, scratch_path, band_rows)
+
+    raise ValueError(f"Фармат {ext or '(без пашырэння)'} не адлюстроўваецца з дыска: у рэжыме "
+                     f"out-of-core падтрымліваюцца PPM, PGM, NPY і TIFF або BMP без сціску")
+
+
+class DiskImage:
+    """
+    Крыніца для рэжыму out-of-core: масіў, адлюстраваны з файла, або
+    часовы memmap з раскадзіраванымі палосамі, які выдаляецца ў close().
+    """
+
+    def __init__(self, file_path, band_rows=1024, scratch_dir=None):
+        self.file_path = file_path
+        self.scratch_path = None
+        if os.path.splitext(file_path)[1].lower() not in MEMMAP_EXTENSIONS:
+            fd, self.scratch_path = tempfile.mkstemp(suffix='.raw', dir=scratch_dir)
+            os.close(fd)
+        try:
+            self.array = open_source(file_path, self.scratch_path, band_rows)
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.array = None
+        if self.scratch_path is not None:
+            try:
+                os.remove(self.scratch_path)
+            except OSError:
+                # Windows не дае выдаліць файл, пакуль на яго ёсць адлюстраванні
+                pass
+            self.scratch_path = None
+
+
+def strided_pyramid(source, min_size=256):
+    """
+    Піраміда для прагляду выявы на дыску: узроўні - зрэзы з крокам 2^k
+    (бліжэйшы суседні піксель), а не копіі, таму памяць не расце, а з
+    дыска чытаюцца толькі радкі бачных плітак.
+    """
+    levels = [source]
+    while min(levels[-1].shape[:2]) // 2 >= min_size:
+        levels.append(levels[-1][::2, ::2])
+    return levels
+
+
+def band_histogram(source, band_rows=1024, is_cancelled=None):
+    """Гістаграма яркасці ўсёй выявы, сабраная па палосах"""
+    hist = np.zeros(256, dtype=np.int64)
+    for y0 in range(0, source.shape[0], band_rows):
+        if is_cancelled is not None and is_cancelled():
+            raise ProcessingCancelled()
+        hist += ImageProcessor.histogram(ImageProcessor.rgb_to_grayscale(np.asarray(source[y0:y0 + band_rows])))
+    return hist
+
+
+class BandWriter:
+    """Паслядоўны запіс выніку палосамі ў .npy, .ppm або .pgm"""
+
+    def __init__(self, file_path, height, width, channels):
+        self.ext = os.path.splitext(file_path)[1].lower()
+        self.channels = NETPBM_EXTENSIONS.get(self.ext, channels)
+
+        if self.ext == '.npy':
+            shape = (height, width, channels) if channels > 1 else (height, width)
+            self.array = np.lib.format.open_memmap(file_path, mode='w+', dtype=np.uint8, shape=shape)
+            self.row = 0
+        elif self.ext in NETPBM_EXTENSIONS:
+            magic = b'P6' if self.channels == 3 else b'P5'
+            self.file = open(file_path, 'wb')
+            self.file.write(b'%s\n%d %d\n255\n' % (magic, width, height))
+        else:
+            raise ValueError(f"Непадтрымоўваны фармат для пачасткавага запісу: {self.ext}")
+
+    def write(self, band):
+        if self.ext == '.npy':
+            self.array[self.row:self.row + band.shape[0]] = band
+            self.row += band.shape[0]
+            return
+
+        if self.channels == 3:
+            band = ImageProcessor.grayscale_to_rgb(band)
+        else:
+            band = ImageProcessor.rgb_to_grayscale(band)
+        self.file.write(np.ascontiguousarray(band, dtype=np.uint8).tobytes())
+
+    def close(self):
+        if self.ext == '.npy':
+            self.array.flush()
+            del self.array
+        else:
+            self.file.close()
+
+
+def global_band_function(operation, params, hist):
+    """
+    Пападосная версія глабальнай аперацыі: статыстыка бярэцца з
+    гістаграмы ўсёй выявы, а кожная паласа апрацоўваецца незалежна.
+    """
+    if operation == "Лінейнае кантраставаньне":
+        lut = ImageProcessor.tone_lut(operation, params, hist)
+        return lambda band: ImageProcessor.apply_lut(ImageProcessor.rgb_to_grayscale(band), lut)
+
+    if operation in ImageProcessor.LUT_OPERATIONS:
+        lut = ImageProcessor.tone_lut(operation, params, hist)
+        return lambda band: ImageProcessor.apply_lut(band, lut)
+
+    if operation == "Глабальная парогавая апрацоўка (Mean)":
+        method = "mean"
+    elif operation in ImageProcessor.HISTOGRAM_METHODS:
+        method = ImageProcessor.HISTOGRAM_METHODS[operation]
+    else:
+        raise ValueError(f"Аперацыя не падтрымліваецца ў рэжыме out-of-core: {operation}")
+
+    threshold_value = ImageProcessor.threshold_from_histogram(hist, method, (params or {}).get("percentile", 50))
+    return lambda band: ImageProcessor.manual_threshold(band, threshold_value, as_rgb=False)
+
+
+def process_out_of_core(input_path, output_path, operation, params=None, band_rows=1024, scratch_dir=None,
+                        progress_callback=None, is_cancelled=None):
+    """
+    Апрацаваць выяву, большую за аператыўную памяць: крыніца адлюстроўваецца
+    з дыска (memmap), аперацыя праходзіць па палосах радкоў з перакрыццём
+    на halo аперацыі, а вынік адразу пішацца ў output_path. input_path -
+    шлях да файла або ўжо адкрыты масіў (напрыклад, DiskImage.array).
+    progress_callback(доля) і is_cancelled() - як у TileScheduler.process.
+    Вяртае (вышыня, шырыня).
+    """
+    if isinstance(input_path, np.ndarray):
+        return process_bands(input_path, output_path, operation, params, band_rows,
+                             progress_callback, is_cancelled)
+
+    with DiskImage(input_path, band_rows, scratch_dir) as disk:
+        return process_bands(disk.array, output_path, operation, params, band_rows,
+                             progress_callback, is_cancelled)
+
+
+def process_bands(source, output_path, operation, params=None, band_rows=1024,
+                  progress_callback=None, is_cancelled=None):
+    params = params or {}
+    halo = ImageProcessor.get_halo(operation, params)
+    height, width = source.shape[:2]
+
+    def check_cancelled():
+        if is_cancelled is not None and is_cancelled():
+            raise ProcessingCancelled()
+
+    if halo is None:
+        if hasattr(operation, "steps"):
+            raise ValueError("Ланцужкі з глабальнымі крокамі не падтрымліваюцца ў рэжыме out-of-core")
+        if params.get("color_mode", "gray") != "gray":
+            raise ValueError("Глабальныя аперацыі ў колеравым рэжыме не падтрымліваюцца ў рэжыме out-of-core")
+
+        hist = params.get("hist")
+        if hist is None:
+            hist = band_histogram(source, band_rows, is_cancelled)
+        band_function = global_band_function(operation, params, hist)
+        halo = 0
+    elif hasattr(operation, "run"):
+        band_function = operation.run
+    else:
+        band_function = lambda band: ImageProcessor.apply_operation(band, operation, params, as_rgb=False)
+
+    writer = None
+    try:
+        for y0 in range(0, height, band_rows):
+            check_cancelled()
+            y1 = min(height, y0 + band_rows)
+            top = max(0, y0 - halo)
+            bottom = min(height, y1 + halo)
+
+            result = band_function(np.asarray(source[top:bottom]))
+            if isinstance(result, BinaryImage):
+                result = result.unpack()
+            result = result[y0 - top:y1 - top]
+
+            if writer is None:
+                channels = result.shape[2] if len(result.shape) == 3 else 1
+                writer = BandWriter(output_path, height, width, channels)
+            writer.write(result)
+            if progress_callback is not None:
+                progress_callback(y1 / height)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return height, width
+
+
+def copy_out_of_core(source, output_path, band_rows=1024):
+    """Запісаць масіў на дыску ў .npy, .ppm або .pgm палосамі, не чытаючы яго цалкам"""
+    height, width = source.shape[:2]
+    writer = BandWriter(output_path, height, width, source.shape[2] if source.ndim == 3 else 1)
+    try:
+        for y0 in range(0, height, band_rows):
+            writer.write(np.asarray(source[y0:y0 + band_rows]))
+    finally:
+        writer.close()
@@ -0,0 +1,143 @@
+import json
+import os
+import numpy as np
+from binary_image import BinaryImage
+from image_processor import ImageProcessor
+
+PRESETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "presets")
+
+
+class Pipeline:
+    """
+    Ланцужок аперацый ImageProcessor, які выконваецца за адзін праход.
+
+    Паміж крокамі выява ў адценнях шэрага застаецца аднаканальнай і не
+    пераўтвараецца ў RGB, а вынікі парогавых крокаў захоўваюцца як
+    BinaryImage; пашырэнне да RGB адбываецца толькі пры адлюстраванні або
+    захаванні. Ланцужок можна перадаць у
+    ImageProcessor.process_image замест назвы аперацыі.
+    """
+
+    def __init__(self, steps=None, name=None):
+        self.name = name
+        self.steps = []
+        for step in steps or []:
+            if isinstance(step, dict):
+                self.add(step["operation"], step.get("params"))
+            else:
+                self.add(*step)
+
+    def add(self, operation, params=None):
+        self.steps.append((operation, dict(params or {})))
+        return self
+
+    @property
+    def halo(self):
+        """Сумарны радыус наваколля ўсіх крокаў; None, калі ёсць глабальны крок"""
+        total = 0
+        for operation, params in self.steps:
+            halo = ImageProcessor.get_halo(operation, params)
+            if halo is None:
+                return None
+            total += halo
+        return total
+
+    def run(self, image):
+        """
+        Паслядоўныя танальныя крокі (яркасць, кантраснасць, інверсія,
+        лінейнае расцяжэнне) зліваюцца ў адну табліцу і прымяняюцца за
+        адзін праход, таму ланцужок з пяці такіх крокаў каштуе як адзін.
+        """
+        current = image
+        lut = None
+        base_hist = None
+
+        for operation, params in self.steps:
+            if isinstance(current, BinaryImage):
+                if operation in ImageProcessor.BINARY_OPERATIONS:
+                    current = ImageProcessor.apply_operation(current, operation, dict(params, packed=True),
+                                                             as_rgb=False)
+                    continue
+                current = current.unpack()
+
+            if operation in ImageProcessor.LUT_OPERATIONS and params.get("color_mode", "gray") == "gray":
+                hist = None
+                if operation in ImageProcessor.STATISTIC_LUT_OPERATIONS:
+                    if len(current.shape) == 3:
+                        if lut is not None:
+                            current = ImageProcessor.apply_lut(current, lut)
+                            lut = None
+                        if operation == "Лінейнае кантраставаньне":
+                            current = ImageProcessor.rgb_to_grayscale(current)
+                        else:
+                            hist = ImageProcessor.histogram(ImageProcessor.rgb_to_grayscale(current))
+
+                    if hist is None:
+                        if base_hist is None:
+                            base_hist = ImageProcessor.histogram(current)
+                        if lut is None:
+                            hist = base_hist
+                        else:
+                            hist = np.bincount(lut, weights=base_hist, minlength=256).astype(np.int64)
+
+                step_lut = ImageProcessor.tone_lut(operation, params, hist)
+                lut = step_lut if lut is None else step_lut[lut]
+                continue
+
+            if lut is not None:
+                current = ImageProcessor.apply_lut(current, lut)
+                lut = None
+            base_hist = None
+
+            current = ImageProcessor.apply_operation(current, operation, dict(params, packed=True), as_rgb=False)
+            if current is None:
+                return None
+
+        if lut is not None:
+            current = ImageProcessor.apply_lut(current, lut)
+        return current
+
+    def __str__(self):
+        if self.name:
+            return self.name
+        return " → ".join(operation for operation, _ in self.steps)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "steps": [{"operation": operation, "params": params} for operation, params in self.steps]
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get("steps", []), name=data.get("name"))
+
+    def save(self, file_path):
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load(cls, file_path):
+        with open(file_path, "r", encoding="utf-8") as f:
+            pipeline = cls.from_dict(json.load(f))
+        if not pipeline.name:
+            pipeline.name = os.path.splitext(os.path.basename(file_path))[0]
+        return pipeline
+
+    @classmethod
+    def load_presets(cls, directory=PRESETS_DIR):
+        """Загрузіць усе захаваныя ланцужкі (*.json) з каталога"""
+        presets = {}
+        if not os.path.isdir(directory):
+            return presets
+
+        for file_name in sorted(os.listdir(directory)):
+            if not file_name.endswith(".json"):
+                continue
+            try:
+                pipeline = cls.load(os.path.join(directory, file_name))
+                presets[pipeline.name] = pipeline
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Памылка загрузкі ланцужка {file_name}: {e}")
+
+        return presets
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+from binary_image import BinaryImage
+
+
+def image_digest(image):
+    """Хэш змесціва выявы разам з яе формай і тыпам даных"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str((image.shape, image.dtype.str)).encode())
+    digest.update(np.ascontiguousarray(image).data)
+    return digest.hexdigest()
+
+
+def operation_key(operation, params=None):
+    """Радковы ключ аперацыі (назва або ланцужок) і яе параметраў"""
+    if hasattr(operation, "to_dict"):
+        operation = operation.to_dict()["steps"]
+
+    # Масівы ў параметрах (напрыклад, кэшаваная гістаграма) выводзяцца з самой выявы
+    params = {k: v for k, v in (params or {}).items() if not isinstance(v, np.ndarray)}
+    return json.dumps([operation, params], ensure_ascii=False, sort_keys=True, default=str)
+
+
+class ResultCache:
+    """
+    LRU кэш вынікаў апрацоўкі з абмежаваннем па памяці.
+
+    Ключ - (хэш выявы, аперацыя, параметры). Калі зададзены spill_dir,
+    выцесненыя вынікі захоўваюцца на дыск і вяртаюцца адтуль пры
+    наступным звароце.
+    """
+
+    def __init__(self, max_bytes=512 * 1024 * 1024, spill_dir=None):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.entries = OrderedDict()
+        self.spilled = {}
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def make_key(self, digest, operation, params=None):
+        return digest + ":" + operation_key(operation, params)
+
+    def get(self, key):
+        with self.lock:
+            result = self.entries.get(key)
+            if result is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return result
+
+            spilled = self.spilled.pop(key, None)
+
+        if spilled is not None:
+            spill_path, width = spilled
+            try:
+                result = np.load(spill_path)
+                if width is not None:
+                    result = BinaryImage(result, width)
+                os.remove(spill_path)
+            except OSError:
+                result = None
+
+        with self.lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        self.put(key, result)
+        return result
+
+    def put(self, key, result):
+        if result is None or result.nbytes > self.max_bytes:
+            return
+
+        evicted = []
+        with self.lock:
+            if key in self.entries:
+                self.current_bytes -= self.entries.pop(key).nbytes
+            self.entries[key] = result
+            self.current_bytes += result.nbytes
+
+            while self.current_bytes > self.max_bytes:
+                old_key, old_result = self.entries.popitem(last=False)
+                self.current_bytes -= old_result.nbytes
+                evicted.append((old_key, old_result))
+
+        if self.spill_dir:
+            for old_key, old_result in evicted:
+                self._spill(old_key, old_result)
+
+    def _spill(self, key, result):
+        file_name = hashlib.blake2b(key.encode(), digest_size=16).hexdigest() + ".npy"
+        spill_path = os.path.join(self.spill_dir, file_name)
+        width = None
+        if isinstance(result, BinaryImage):
+            # Для бінарных вынікаў на дыск ідзе толькі бітавая плоскасць
+            result, width = result.bits, result.width
+        try:
+            np.save(spill_path, result)
+        except OSError as e:
+            print(f"Памылка запісу кэша на дыск: {e}")
+            return
+        with self.lock:
+            self.spilled[key] = (spill_path, width)
+
+    def clear(self):
+        with self.lock:
+            spilled = [spill_path for spill_path, _ in self.spilled.values()]
+            self.entries.clear()
+            self.spilled.clear()
+            self.current_bytes = 0
+
+        for spill_path in spilled:
+            try:
+                os.remove(spill_path)
+            except OSError:
+                pass
+
+    def stats_text(self):
+        return (f"🗃️ Кэш: {self.hits} трапл. / {self.misses} промах., "
+                f"{self.current_bytes / (1024 * 1024):.1f} MB")
@@ -0,0 +1,178 @@
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+from image_processor import ImageProcessor
+from reference_processor import ReferenceImageProcessor
+
+
+def random_images():
+    rng = np.random.default_rng(1234)
+    return {
+        "gray": rng.integers(0, 256, (23, 17), dtype=np.uint8),
+        "rgb": rng.integers(0, 256, (19, 21, 3), dtype=np.uint8),
+        "rgba": rng.integers(0, 256, (17, 15, 4), dtype=np.uint8),
+        "narrow_range": rng.integers(90, 140, (16, 16, 3), dtype=np.uint8),
+        "constant": np.full((12, 14, 3), 77, dtype=np.uint8),
+        "constant_gray": np.full((12, 14), 200, dtype=np.uint8),
+    }
+
+
+IMAGES = random_images()
+
+POINT_OPERATIONS = [
+    ("linear_contrast", ()),
+    ("adjust_brightness", (1.5,)),
+    ("adjust_brightness", (0.37,)),
+    ("adjust_contrast", (1.5,)),
+    ("adjust_contrast", (0.6,)),
+    ("manual_threshold", (127,)),
+    ("manual_threshold", (0,)),
+    ("global_threshold_mean", ()),
+    ("invert_colors", ()),
+]
+
+
+@pytest.fixture
+def fixed_point_reference(monkeypatch):
+    """
+    Эталон з той жа цэлалікавай яркасцю, што і ImageProcessor: розніца ў
+    пераўтварэнні RGB у шэры правяраецца асобна (гл. test_luminance_*).
+    """
+    monkeypatch.setattr(ReferenceImageProcessor, "rgb_to_grayscale",
+                        staticmethod(ImageProcessor.rgb_to_grayscale))
+
+
+@pytest.mark.parametrize("name", sorted(IMAGES))
+@pytest.mark.parametrize("operation, args", POINT_OPERATIONS)
+def test_point_operation_matches_reference(fixed_point_reference, name, operation, args):
+    image = IMAGES[name]
+    expected = getattr(ReferenceImageProcessor, operation)(image.copy(), *args)
+    actual = getattr(ImageProcessor, operation)(image.copy(), *args)
+
+    assert actual.dtype == expected.dtype
+    np.testing.assert_array_equal(actual, expected)
+
+
+@pytest.mark.parametrize("name", ["gray", "constant_gray"])
+@pytest.mark.parametrize("operation, args", POINT_OPERATIONS)
+def test_grayscale_input_matches_float_reference(name, operation, args):
+    image = IMAGES[name]
+    expected = getattr(ReferenceImageProcessor, operation)(image.copy(), *args)
+    actual = getattr(ImageProcessor, operation)(image.copy(), *args)
+
+    np.testing.assert_array_equal(actual, expected)
+
+
+@pytest.mark.parametrize("name", ["rgb", "rgba", "narrow_range", "constant"])
+def test_luminance_within_one_level_of_float_reference(name):
+    image = IMAGES[name]
+    expected = ReferenceImageProcessor.rgb_to_grayscale(image).astype(np.int16)
+    actual = ImageProcessor.rgb_to_grayscale(image).astype(np.int16)
+
+    assert np.abs(actual - expected).max() <= 1
+
+
+def step_images():
+    vertical = np.full((40, 60), 30, dtype=np.uint8)
+    vertical[:, 30:] = 200
+    diagonal = np.where(np.add.outer(np.arange(40), np.arange(60)) > 50, 200, 20).astype(np.uint8)
+    stairs = np.repeat(np.arange(0, 250, 50, dtype=np.uint8), 12)[None, :].repeat(30, axis=0)
+    return {"vertical": vertical, "diagonal": diagonal, "stairs": stairs}
+
+
+STEP_IMAGES = step_images()
+
+
+@pytest.mark.parametrize("value", [0, 1, 37, 100, 128, 200, 255])
+@pytest.mark.parametrize("block_size", [3, 11, 15, 25])
+def test_gaussian_threshold_flat_image_is_stable(value, block_size):
+    image = np.full((30, 33), value, dtype=np.uint8)
+    result = ImageProcessor.local_threshold_gaussian(image, block_size, 0)
+
+    # Піксель роўны сярэдняму - пры C=0 ён чорны на ўсім участку
+    assert not result.any()
+
+
+@pytest.mark.parametrize("name", sorted(STEP_IMAGES))
+@pytest.mark.parametrize("block_size", [11, 15, 25])
+def test_gaussian_threshold_step_edge_matches_reference(name, block_size):
+    image = STEP_IMAGES[name]
+    expected = ReferenceImageProcessor.local_threshold_gaussian(image, block_size, 0)
+    actual = ImageProcessor.local_threshold_gaussian(image, block_size, 0)
+
+    # На роўных вокнах эталон у float32 дае шум акруглення, там
+    # правяраецца толькі стабільнасць (чорны колер), астатняе - дакладна
+    low, high = ImageProcessor.box_extrema(image, block_size // 2)
+    edge = low != high
+    np.testing.assert_array_equal(actual[edge], expected[edge])
+    assert not actual[~edge].any()
+
+
+def window_images():
+    rng = np.random.default_rng(4321)
+    return {
+        "random": rng.integers(0, 256, (23, 17), dtype=np.uint8),
+        # Два або тры ўзроўні: у многіх вокнах адхіленні ад сярэдняга роўныя
+        "two_levels": np.where(rng.random((24, 26)) < 0.5, 10, 250).astype(np.uint8),
+        "three_levels": (rng.integers(0, 3, (22, 25)) * 100).astype(np.uint8),
+        "flat": np.full((12, 14), 77, dtype=np.uint8),
+        "smaller_than_window": rng.integers(0, 256, (3, 5), dtype=np.uint8),
+        "rgb": rng.integers(0, 256, (15, 18, 3), dtype=np.uint8),
+    }
+
+
+WINDOW_IMAGES = window_images()
+
+
+@pytest.mark.parametrize("name", sorted(WINDOW_IMAGES))
+def test_adaptive_threshold_otsu_matches_reference(fixed_point_reference, name):
+    image = WINDOW_IMAGES[name]
+    expected = ReferenceImageProcessor.adaptive_threshold_otsu(image)
+    actual = ImageProcessor.adaptive_threshold_otsu(image)
+
+    np.testing.assert_array_equal(actual, expected)
+
+
+@pytest.mark.parametrize("name", sorted(WINDOW_IMAGES))
+@pytest.mark.parametrize("block_size, C", [(3, 0), (3, 2), (5, -3), (11, 2), (11, 0), (25, 5), (31, 2)])
+def test_local_threshold_mean_matches_reference(fixed_point_reference, name, block_size, C):
+    image = WINDOW_IMAGES[name]
+    expected = ReferenceImageProcessor.local_threshold_mean(image, block_size, C)
+    actual = ImageProcessor.local_threshold_mean(image, block_size, C)
+
+    np.testing.assert_array_equal(actual, expected)
+
+
+def test_luminance_cache_is_consistent_across_threads(monkeypatch):
+    monkeypatch.setattr(ImageProcessor, "_luminance_entry", None)
+    rng = np.random.default_rng(99)
+    images = [rng.integers(0, 256, (48, 40, 3), dtype=np.uint8) for _ in range(4)]
+    expected = [ImageProcessor.luminance(image)[5:30, 3:33] for image in images]
+    errors = []
+
+    def work(index):
+        try:
+            for _ in range(500):
+                ImageProcessor.cache_luminance(images[index])
+                actual = ImageProcessor.rgb_to_grayscale(images[index][5:30, 3:33])
+                if not np.array_equal(actual, expected[index]):
+                    errors.append(index)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=(index,)) for index in range(len(images))]
+    # Частае пераключэнне патокаў, каб яны перапляталіся паміж праверкай і зрэзам кэша
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    assert errors == []
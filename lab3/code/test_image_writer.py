@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from image_processor import ImageProcessor
+from image_writer import save_image, save_target
+
+
+@pytest.fixture
+def binary_result():
+    image = np.random.default_rng(7).integers(0, 256, (20, 30, 3), dtype=np.uint8)
+    return ImageProcessor.manual_threshold(image, 127, packed=True)
+
+
+@pytest.mark.parametrize("extension, magic, mode", [
+    ("ppm", b"P6", "RGB"),
+    ("pgm", b"P5", "L"),
+    ("pbm", b"P4", "1"),
+])
+def test_netpbm_variant_follows_extension(tmp_path, binary_result, extension, magic, mode):
+    output_path = tmp_path / f"result.{extension}"
+    save_image(binary_result, str(output_path))
+
+    assert output_path.read_bytes()[:2] == magic
+    with Image.open(output_path) as saved:
+        assert saved.mode == mode
+        np.testing.assert_array_equal(np.asarray(saved.convert("L")), binary_result.unpack())
+
+
+@pytest.mark.parametrize("typed, selected, expected_path, expected_profile", [
+    # Уведзенае пашырэнне перамагае фільтр дыялогу
+    ("out.jpg", "PNG (хуткі)", "out.jpg", "JPEG (якасць 90)"),
+    ("out.bmp", "PNG (хуткі)", "out.bmp", None),
+    # Той жа фармат - застаецца профіль фільтра
+    ("out.png", "PNG (кампактны)", "out.png", "PNG (кампактны)"),
+    ("out.jpeg", "JPEG (якасць 75)", "out.jpeg", "JPEG (якасць 75)"),
+    # Без вядомага пашырэння дадаецца пашырэнне фільтра
+    ("out", "TIFF (1-біт G4)", "out.tif", "TIFF (1-біт G4)"),
+    ("scan.v2", "PNG (хуткі)", "scan.v2.png", "PNG (хуткі)"),
+])
+def test_save_target_prefers_typed_extension(typed, selected, expected_path, expected_profile):
+    assert save_target(typed, selected) == (expected_path, expected_profile)
+
+
+def test_typed_jpeg_extension_writes_jpeg_with_png_filter(tmp_path):
+    image = np.random.default_rng(3).integers(0, 256, (16, 16, 3), dtype=np.uint8)
+    file_path, profile = save_target(str(tmp_path / "out.jpg"), "PNG (хуткі)")
+    save_image(image, file_path, profile)
+
+    with Image.open(file_path) as saved:
+        assert saved.format == "JPEG"
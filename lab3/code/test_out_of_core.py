@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from image_processor import ImageProcessor
+from out_of_core import DiskImage, open_source, process_out_of_core
+
+
+def sample_image():
+    return np.random.default_rng(11).integers(0, 256, (70, 45, 3), dtype=np.uint8)
+
+
+def expected_pixels(file_path):
+    with Image.open(file_path) as img:
+        return np.asarray(img.convert('L' if img.mode in ('1', 'L') else 'RGB'))
+
+
+# (пашырэнне, рэжым PIL, параметры захавання); 278 - радкоў у паласе TIFF
+UNCOMPRESSED_FILES = [
+    ("tif", "RGB", {}),
+    ("tif", "RGB", {"tiffinfo": {278: 16}}),
+    ("tif", "L", {"tiffinfo": {278: 9}}),
+    ("tif", "1", {}),
+    ("tif", "RGBA", {}),
+    ("bmp", "RGB", {}),
+    ("bmp", "L", {}),
+    ("bmp", "P", {}),
+]
+
+
+@pytest.mark.parametrize("extension, mode, options", UNCOMPRESSED_FILES)
+def test_band_decoding_matches_full_decode(tmp_path, extension, mode, options):
+    file_path = str(tmp_path / f"scan.{extension}")
+    Image.fromarray(sample_image()).convert(mode).save(file_path, **options)
+
+    with DiskImage(file_path, band_rows=8, scratch_dir=str(tmp_path)) as disk:
+        assert isinstance(disk.array, np.memmap)
+        np.testing.assert_array_equal(disk.array, expected_pixels(file_path))
+        scratch_path = disk.scratch_path
+
+    assert not (tmp_path / scratch_path).exists()
+
+
+@pytest.mark.parametrize("compression", ["tiff_lzw", "packbits"])
+def test_compressed_tiff_is_rejected(tmp_path, compression):
+    file_path = str(tmp_path / "scan.tif")
+    Image.fromarray(sample_image()).save(file_path, compression=compression)
+
+    with pytest.raises(ValueError, match="сціскам"):
+        DiskImage(file_path, scratch_dir=str(tmp_path))
+    assert [path.name for path in tmp_path.iterdir()] == ["scan.tif"]
+
+
+def test_png_is_rejected(tmp_path):
+    file_path = str(tmp_path / "scan.png")
+    Image.fromarray(sample_image()).save(file_path)
+
+    with pytest.raises(ValueError):
+        open_source(file_path, str(tmp_path / "scratch.raw"))
+
+
+@pytest.mark.parametrize("array", [
+    np.zeros((8, 9), dtype=np.float32),
+    np.zeros((8, 9, 4), dtype=np.uint8),
+    np.zeros((8,), dtype=np.uint8),
+])
+def test_npy_dtype_and_shape_are_validated(tmp_path, array):
+    file_path = str(tmp_path / "scan.npy")
+    np.save(file_path, array)
+
+    with pytest.raises(ValueError, match="uint8"):
+        open_source(file_path)
+
+
+@pytest.mark.parametrize("operation", ["Лякальная парогавая апрацоўка (Mean)",
+                                       "Глабальная парогавая апрацоўка (Otsu)"])
+def test_strip_tiff_out_of_core_matches_in_memory(tmp_path, operation):
+    image = sample_image()
+    input_path = str(tmp_path / "scan.tif")
+    output_path = str(tmp_path / "result.npy")
+    Image.fromarray(image).save(input_path, tiffinfo={278: 16})
+
+    process_out_of_core(input_path, output_path, operation, band_rows=16, scratch_dir=str(tmp_path))
+
+    expected = ImageProcessor.apply_operation(image, operation, as_rgb=False)
+    np.testing.assert_array_equal(np.load(output_path), expected)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["result.npy", "scan.tif"]
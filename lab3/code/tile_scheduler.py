@@ -0,0 +1,106 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
+from binary_image import BinaryImage
+from color_space import LIGHTNESS_SPACES
+from image_processor import ImageProcessor
+
+
+class ProcessingCancelled(Exception):
+    """Апрацоўка спынена па запыце карыстальніка"""
+
+
+class TileScheduler:
+    """
+    Пліткавая апрацоўка выявы на некалькіх ядрах.
+
+    Выява разбіваецца на пліткі, кожная пашыраецца на halo аперацыі, каб
+    аконныя парогі бачылі тыя ж суседзяў, што і пры апрацоўцы цалкам.
+    NumPy вызваляе GIL у вектарных аперацыях, таму пліткі выконваюцца ў
+    пуле патокаў.
+    """
+
+    def __init__(self, tile_size=512, max_workers=None):
+        self.tile_size = tile_size
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def iter_tiles(self, height, width, halo):
+        """Пліткі ў выглядзе (унутраны прастакутнік, пашыраны прастакутнік)"""
+        for y0 in range(0, height, self.tile_size):
+            y1 = min(height, y0 + self.tile_size)
+            for x0 in range(0, width, self.tile_size):
+                x1 = min(width, x0 + self.tile_size)
+                inner = (y0, y1, x0, x1)
+                outer = (max(0, y0 - halo), min(height, y1 + halo),
+                         max(0, x0 - halo), min(width, x1 + halo))
+                yield inner, outer
+
+    def process(self, image, operation, params, progress_callback=None, is_cancelled=None):
+        """
+        Апрацаваць выяву па плітках. progress_callback(доля) выклікаецца
+        пасля кожнай гатовай пліткі; is_cancelled() правяраецца перад
+        кожнай пліткай, і пры адмене ўзнікае ProcessingCancelled.
+        """
+        halo = ImageProcessor.get_halo(operation, params)
+        height, width = image.shape[:2]
+
+        def check_cancelled():
+            if is_cancelled is not None and is_cancelled():
+                raise ProcessingCancelled()
+
+        color_mode = (params or {}).get("color_mode")
+        if color_mode in LIGHTNESS_SPACES and operation in ImageProcessor.COLOR_OPERATIONS:
+            # Колеравае пераўтварэнне робіцца адзін раз, пліткі атрымліваюць яго зрэзы
+            check_cancelled()
+            ImageProcessor.color_planes(image, color_mode)
+
+        if halo is None or max(height, width) <= self.tile_size:
+            check_cancelled()
+            result = ImageProcessor.process_image(image, operation, params)
+            if progress_callback is not None:
+                progress_callback(1.0)
+            return result
+
+        tiles = list(self.iter_tiles(height, width, halo))
+
+        def run_tile(tile):
+            check_cancelled()
+            inner, outer = tile
+            oy0, oy1, ox0, ox1 = outer
+            return tile, ImageProcessor.process_image(image[oy0:oy1, ox0:ox1], operation, params)
+
+        if self.max_workers == 1:
+            completed = (run_tile(tile) for tile in tiles)
+            return self._stitch(completed, len(tiles), height, width, progress_callback)
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            futures = [executor.submit(run_tile, tile) for tile in tiles]
+            completed = (future.result() for future in as_completed(futures))
+            return self._stitch(completed, len(tiles), height, width, progress_callback)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _stitch(self, completed, total, height, width, progress_callback):
+        result = None
+        for done, ((inner, outer), tile_result) in enumerate(completed, 1):
+            if tile_result is None:
+                return None
+
+            y0, y1, x0, x1 = inner
+            oy0, _, ox0, _ = outer
+
+            if isinstance(tile_result, BinaryImage):
+                # Бінарныя пліткі збіраюцца адразу ў бітавую плоскасць
+                if result is None:
+                    result = BinaryImage.empty(height, width)
+                result.paste(y0, x0, tile_result.crop(y0 - oy0, y1 - oy0, x0 - ox0, x1 - ox0))
+            else:
+                if result is None:
+                    result = np.empty((height, width) + tile_result.shape[2:], dtype=tile_result.dtype)
+                result[y0:y1, x0:x1] = tile_result[y0 - oy0:y1 - oy0, x0 - ox0:x1 - ox0]
+
+            if progress_callback is not None:
+                progress_callback(done / total)
+
+        return result
@@ -0,0 +1,355 @@
+import math
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtCore import Qt, QPointF, QRectF, pyqtSignal
+from PyQt5.QtGui import QColor, QPainter, QPixmap
+from PyQt5.QtWidgets import QSizePolicy, QWidget
+from binary_image import BinaryImage
+from image_display import numpy_to_qimage
+from image_processor import ImageProcessor
+from out_of_core import global_band_function
+
+TILE_SIZE = 256
+
+
+def pyramid_depth(height, width, min_size=256):
+    """Колькасць узроўняў піраміды паводле правіла ImageProcessor.build_pyramid"""
+    levels = 1
+    while min(height, width) >> levels >= min_size:
+        levels += 1
+    return levels
+
+
+class PyramidTileSource:
+    """Пліткі гатовай піраміды выяў (узровень 0 - поўная выява)"""
+
+    def __init__(self, pyramid, tile_size=TILE_SIZE):
+        self.pyramid = pyramid
+        self.tile_size = tile_size
+        self.height, self.width = pyramid[0].shape[:2]
+        self.levels = len(pyramid)
+
+    def level_shape(self, level):
+        return self.pyramid[level].shape[:2]
+
+    def tile(self, level, row, col):
+        y0, x0 = row * self.tile_size, col * self.tile_size
+        return self.pyramid[level][y0:y0 + self.tile_size, x0:x0 + self.tile_size]
+
+
+class ResultTileSource:
+    """
+    Пліткі выніку апрацоўкі поўнай выявы. Памяншэнні не захоўваюцца: плітка
+    ўзроўню L атрымліваецца памяншэннем адпаведнага ўчастка выніку.
+    """
+
+    def __init__(self, result, tile_size=TILE_SIZE):
+        self.result = result
+        self.tile_size = tile_size
+        self.height, self.width = result.shape[:2]
+        self.levels = pyramid_depth(self.height, self.width)
+
+    def level_shape(self, level):
+        return self.height >> level, self.width >> level
+
+    def tile(self, level, row, col):
+        span = self.tile_size << level
+        y0, x0 = row * span, col * span
+        y1, x1 = min(self.height, y0 + span), min(self.width, x0 + span)
+
+        if isinstance(self.result, BinaryImage):
+            region = self.result.crop(y0, y1, x0, x1)
+            if level == 0:
+                return region
+            region = region.unpack()
+        else:
+            region = self.result[y0:y1, x0:x1]
+
+        for _ in range(level):
+            region = ImageProcessor.downsample(region)
+        return region
+
+
+class ProcessedTileSource(PyramidTileSource):
+    """
+    Пліткі апрацаванай выявы, якія вылічваюцца па запыце: кожная плітка
+    ўзроўню піраміды апрацоўваецца разам з halo аперацыі. Глабальныя
+    аперацыі атрымліваюць статыстыку з гістаграмы ўсёй выявы.
+    """
+
+    def __init__(self, pyramid, operation, params, hist, tile_size=TILE_SIZE):
+        super().__init__(pyramid, tile_size)
+        self.operation = operation
+        self.params = params
+        self.halo = ImageProcessor.get_halo(operation, params)
+        self.band_function = None
+        # Узроўні, якія апрацоўваюцца цалкам (глабальныя ланцужкі і колеравыя рэжымы)
+        self.whole_levels = None
+        self.lock = threading.Lock()
+
+        if self.halo is None:
+            self.halo = 0
+            if hasattr(operation, "steps") or params.get("color_mode", "gray") != "gray":
+                self.whole_levels = {}
+            else:
+                self.band_function = global_band_function(operation, params, hist)
+
+    def tile(self, level, row, col):
+        image = self.pyramid[level]
+        height, width = image.shape[:2]
+        y0, x0 = row * self.tile_size, col * self.tile_size
+        y1, x1 = min(height, y0 + self.tile_size), min(width, x0 + self.tile_size)
+
+        if self.whole_levels is not None:
+            with self.lock:
+                if level not in self.whole_levels:
+                    self.whole_levels[level] = ImageProcessor.process_image(image, self.operation, self.params)
+            result = self.whole_levels[level]
+            if result is None:
+                return None
+            return result.crop(y0, y1, x0, x1) if isinstance(result, BinaryImage) else result[y0:y1, x0:x1]
+
+        oy0, ox0 = max(0, y0 - self.halo), max(0, x0 - self.halo)
+        oy1, ox1 = min(height, y1 + self.halo), min(width, x1 + self.halo)
+        region = image[oy0:oy1, ox0:ox1]
+        if self.band_function is not None:
+            result = self.band_function(region)
+        else:
+            result = ImageProcessor.process_image(region, self.operation, self.params)
+        if result is None:
+            return None
+
+        if isinstance(result, BinaryImage):
+            return result.crop(y0 - oy0, y1 - oy0, x0 - ox0, x1 - ox0)
+        return result[y0 - oy0:y1 - oy0, x0 - ox0:x1 - ox0]
+
+
+class TiledImageView(QWidget):
+    """
+    Прагляд вялікай выявы па плітках з маштабаваннем колцам мышы і
+    перацягваннем. Малююцца толькі бачныя пліткі ўзроўню піраміды, які
+    адпавядае маштабу; гатовыя QPixmap трымаюцца ў LRU кэшы, а
+    адсутныя вылічваюцца ў фонавых патоках. Змена выгляду паведамляецца
+    сігналам view_changed для сінхранізацыі з іншым праглядам.
+    """
+    view_changed = pyqtSignal(float, float, float)  # маштаб, цэнтр x, цэнтр y
+    tile_ready = pyqtSignal(object, object)  # ключ пліткі, QImage або None
+
+    _executor = None
+
+    def __init__(self, placeholder="", cache_size=256, parent=None):
+        super().__init__(parent)
+        self.placeholder = placeholder
+        self.cache_size = cache_size
+        self.source = None
+        self.generation = 0
+        self.tiles = OrderedDict()
+        self.pending = {}
+        self.zoom = 1.0
+        self.center = QPointF()
+        self.fitted = True
+        self.drag_origin = None
+
+        self.setMinimumSize(600, 500)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.tile_ready.connect(self.on_tile_ready)
+
+    @classmethod
+    def executor(cls):
+        if cls._executor is None:
+            cls._executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1)
+        return cls._executor
+
+    def set_source(self, source, view_from=None):
+        """Новая крыніца плітак; выгляд падганяецца пад памер або бярэцца з view_from"""
+        self.generation += 1
+        self.tiles.clear()
+        for future in self.pending.values():
+            future.cancel()
+        self.pending.clear()
+        self.source = source
+
+        if view_from is not None:
+            self.zoom, self.center, self.fitted = view_from.zoom, QPointF(view_from.center), view_from.fitted
+        elif source is not None:
+            self.fit()
+        self.update()
+
+    def clear(self, text=None):
+        if text is not None:
+            self.placeholder = text
+        self.set_source(None)
+
+    def fit(self):
+        if self.source is None:
+            return
+        self.fitted = True
+        self.zoom = min(self.width() / self.source.width, self.height() / self.source.height)
+        self.center = QPointF(self.source.width / 2, self.source.height / 2)
+        self.update()
+
+    def set_view(self, zoom, cx, cy):
+        """Выгляд, зададзены іншым праглядам; сігнал не паўтараецца"""
+        self.fitted = False
+        self.zoom = zoom
+        self.center = QPointF(cx, cy)
+        self.update()
+
+    def notify_view(self):
+        self.view_changed.emit(self.zoom, self.center.x(), self.center.y())
+
+    def level_for_zoom(self):
+        if self.zoom >= 1:
+            return 0
+        return min(self.source.levels - 1, int(math.floor(math.log2(1 / self.zoom))))
+
+    def to_image(self, point):
+        return QPointF(self.center.x() + (point.x() - self.width() / 2) / self.zoom,
+                       self.center.y() + (point.y() - self.height() / 2) / self.zoom)
+
+    def tile_rect(self, level, row, col, shape):
+        """Прастакутнік пліткі на экране"""
+        scale = (1 << level) * self.zoom
+        size = self.source.tile_size
+        left = (col * size << level) - self.center.x()
+        top = (row * size << level) - self.center.y()
+        return QRectF(self.width() / 2 + left * self.zoom, self.height() / 2 + top * self.zoom,
+                      shape[1] * scale, shape[0] * scale)
+
+    def visible_tiles(self, level):
+        height, width = self.source.level_shape(level)
+        span = self.source.tile_size << level
+        top_left = self.to_image(QPointF(0, 0))
+        bottom_right = self.to_image(QPointF(self.width(), self.height()))
+
+        rows = range(max(0, int(top_left.y() // span)),
+                     min(-(-height // self.source.tile_size), int(bottom_right.y() // span) + 1))
+        cols = range(max(0, int(top_left.x() // span)),
+                     min(-(-width // self.source.tile_size), int(bottom_right.x() // span) + 1))
+        return [(row, col) for row in rows for col in cols]
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("#f8f9fa"))
+
+        if self.source is None:
+            painter.setPen(QColor("#6c757d"))
+            painter.drawText(self.rect(), Qt.AlignCenter, self.placeholder)
+            return
+
+        painter.setRenderHint(QPainter.SmoothPixmapTransform, self.zoom < 1)
+        level = self.level_for_zoom()
+        visible = set()
+
+        for row, col in self.visible_tiles(level):
+            key = (level, row, col)
+            visible.add(key)
+            pixmap = self.tiles.get(key)
+            if pixmap is not None:
+                self.tiles.move_to_end(key)
+                painter.drawPixmap(self.tile_rect(level, row, col, (pixmap.height(), pixmap.width())),
+                                   pixmap, QRectF(pixmap.rect()))
+                continue
+
+            self.request_tile(key)
+            self.draw_coarser(painter, level, row, col)
+
+        # Запыты плітак, якія ўжо не бачныя, адмяняюцца, калі яшчэ не пачаліся
+        for key in [key for key in self.pending if key not in visible]:
+            if self.pending[key].cancel():
+                del self.pending[key]
+
+    def draw_coarser(self, painter, level, row, col):
+        """Пакуль плітка вылічваецца, паказаць адпаведную частку пліткі ўзроўнем вышэй"""
+        parent = self.tiles.get((level + 1, row // 2, col // 2))
+        if parent is None:
+            return
+
+        half = self.source.tile_size // 2
+        source_rect = QRectF((col % 2) * half, (row % 2) * half, half, half) \
+            .intersected(QRectF(parent.rect()))
+        if source_rect.isEmpty():
+            return
+        target = self.tile_rect(level, row, col, (source_rect.height() * 2, source_rect.width() * 2))
+        painter.drawPixmap(target, parent, source_rect)
+
+    def request_tile(self, key):
+        if key in self.pending:
+            return
+        source, generation = self.source, self.generation
+
+        def render():
+            tile = source.tile(*key)
+            return None if tile is None else numpy_to_qimage(tile)
+
+        future = self.executor().submit(render)
+        self.pending[key] = future
+        future.add_done_callback(lambda f: self.tile_ready.emit((generation,) + key, f))
+
+    def on_tile_ready(self, generation_key, future):
+        generation, key = generation_key[0], generation_key[1:]
+        if generation != self.generation or future.cancelled():
+            return
+        self.pending.pop(key, None)
+
+        try:
+            q_img = future.result()
+        except Exception as e:
+            print(f"Памылка апрацоўкі пліткі: {e}")
+            return
+        if q_img is None:
+            return
+
+        self.tiles[key] = QPixmap.fromImage(q_img)
+        while len(self.tiles) > self.cache_size:
+            self.tiles.popitem(last=False)
+        self.update()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self.fitted:
+            self.fit()
+
+    def wheelEvent(self, event):
+        if self.source is None:
+            return
+        anchor = event.position() if hasattr(event, "position") else QPointF(event.pos())
+        before = self.to_image(anchor)
+        factor = 1.25 if event.angleDelta().y() > 0 else 1 / 1.25
+        self.zoom = max(2.0 ** -(self.source.levels + 2), min(32.0, self.zoom * factor))
+        after = self.to_image(anchor)
+        self.center += before - after
+        self.fitted = False
+        self.update()
+        self.notify_view()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self.drag_origin = QPointF(event.pos())
+
+    def mouseMoveEvent(self, event):
+        if self.drag_origin is None or self.source is None:
+            return
+        position = QPointF(event.pos())
+        self.center -= (position - self.drag_origin) / self.zoom
+        self.drag_origin = position
+        self.fitted = False
+        self.update()
+        self.notify_view()
+
+    def mouseReleaseEvent(self, event):
+        self.drag_origin = None
+
+    def mouseDoubleClickEvent(self, event):
+        self.fit()
+        self.notify_view()
+
+
+def link_views(*views):
+    """Сінхранізаваць маштаб і зрух праглядаў"""
+    for view in views:
+        for other in views:
+            if other is not view:
+                view.view_changed.connect(other.set_view)
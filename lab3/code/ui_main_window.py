@@ -2,29 +2,125 @@ from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                             QPushButton, QLabel, QComboBox,
                             QGroupBox, QFileDialog,
                             QMessageBox, QProgressBar,
-                            QTabWidget, QSizePolicy)
+                            QTabWidget)
 from PyQt5.QtCore import Qt, pyqtSignal, QThread
-from PyQt5.QtGui import QPixmap, QImage, QFont
+from PyQt5.QtGui import QFont
 import numpy as np
 from PIL import Image
 from image_processor import ImageProcessor
+from tile_scheduler import TileScheduler, ProcessingCancelled
+from pipeline import Pipeline
+from tiled_viewer import TiledImageView, PyramidTileSource, ProcessedTileSource, ResultTileSource, link_views
+from result_cache import ResultCache, image_digest
+from image_writer import ENCODER_PROFILES, save_image, save_target
+from out_of_core import (DiskImage, image_size, strided_pyramid, band_histogram, process_out_of_core,
+                         copy_out_of_core)
 import os
+import tempfile
+import time
+
+# Абмежаванне памяці кэша вынікаў і каталог для выцясненых вынікаў (None - без дыска)
+RESULT_CACHE_BYTES = 512 * 1024 * 1024
+RESULT_CACHE_SPILL_DIR = None
+# Большыя выявы (і ўсе .npy) не загружаюцца ў памяць: яны адлюстроўваюцца з
+# дыска і апрацоўваюцца палосамі праз process_out_of_core
+OUT_OF_CORE_PIXELS = 100_000_000
+OUT_OF_CORE_BAND_ROWS = 1024
+# Фарматы, у якія вынік рэжыму out-of-core запісваецца палосамі
+OUT_OF_CORE_SAVE_FILTERS = {"PPM (*.ppm)": ".ppm", "PGM (*.pgm)": ".pgm", "NPY (*.npy)": ".npy"}
+
+
+def remove_file(file_path):
+    try:
+        os.remove(file_path)
+    except OSError:
+        # Windows не дае выдаліць файл, пакуль ён адлюстраваны ў памяць
+        pass
+
+
+def discard_result(result):
+    """Выдаліць часовы .npy выніку рэжыму out-of-core (вынікі ў памяці не чапаюцца)"""
+    if isinstance(result, np.memmap):
+        remove_file(result.filename)
 
 class ProcessingThread(QThread):
+    """
+    Задача апрацоўкі: паведамляе долю выкананых плітак, спыняецца па
+    requestInterruption() паміж пліткамі і запамінае час выканання.
+    """
     finished = pyqtSignal(object)
+    progress = pyqtSignal(float)
 
     def __init__(self, image, operation, params):
         super().__init__()
         self.image = image
         self.operation = operation
         self.params = params
+        self.scheduler = TileScheduler()
+        self.elapsed = 0.0
+
+    @property
+    def megapixels_per_second(self):
+        height, width = self.image.shape[:2]
+        return height * width / 1e6 / self.elapsed if self.elapsed else 0.0
+
+    def run(self):
+        started = time.perf_counter()
+        try:
+            result = self.scheduler.process(self.image, self.operation, self.params,
+                                            progress_callback=self.progress.emit,
+                                            is_cancelled=self.isInterruptionRequested)
+        except ProcessingCancelled:
+            return
+        except Exception as e:
+            result = None
+        self.elapsed = time.perf_counter() - started
+        self.finished.emit(result)
+
+class OutOfCoreThread(ProcessingThread):
+    """
+    Апрацоўка выявы на дыску палосамі: вынік пішацца ў часовы .npy і
+    вяртаецца як memmap, таму ні крыніца, ні вынік не чытаюцца ў памяць цалкам.
+    """
+
+    def __init__(self, image, operation, params, output_path):
+        super().__init__(image, operation, params)
+        self.output_path = output_path
+
+    def run(self):
+        started = time.perf_counter()
+        try:
+            process_out_of_core(self.image, self.output_path, self.operation, self.params, OUT_OF_CORE_BAND_ROWS,
+                                progress_callback=self.progress.emit, is_cancelled=self.isInterruptionRequested)
+            result = np.load(self.output_path, mmap_mode='r')
+        except ProcessingCancelled:
+            remove_file(self.output_path)
+            return
+        except Exception as e:
+            remove_file(self.output_path)
+            result = None
+        self.elapsed = time.perf_counter() - started
+        self.finished.emit(result)
+
+class SaveThread(QThread):
+    """Захаванне выніку ў фонавым патоку, каб не блакаваць інтэрфейс"""
+    finished = pyqtSignal(str, str)  # шлях, тэкст памылкі (пусты, калі паспяхова)
+
+    def __init__(self, image, file_path, profile):
+        super().__init__()
+        self.image = image
+        self.file_path = file_path
+        self.profile = profile
 
     def run(self):
         try:
-            result = ImageProcessor.process_image(self.image, self.operation, self.params)
-            self.finished.emit(result)
+            if isinstance(self.image, np.memmap):
+                copy_out_of_core(self.image, self.file_path, OUT_OF_CORE_BAND_ROWS)
+            else:
+                save_image(self.image, self.file_path, self.profile)
+            self.finished.emit(self.file_path, "")
         except Exception as e:
-            self.finished.emit(None)
+            self.finished.emit(self.file_path, str(e))
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -32,6 +128,17 @@ class MainWindow(QMainWindow):
         self.current_image = None
         self.processed_image = None
         self.original_image = None
+        self.histogram = None
+        self.pyramid = None
+        self.job_id = 0
+        self.processing_threads = []
+        self.current_job = None
+        self.save_threads = []
+        self.image_digest = None
+        self.result_cache = ResultCache(RESULT_CACHE_BYTES, RESULT_CACHE_SPILL_DIR)
+        self.cache_key = None
+        self.disk_image = None
+        self.presets = Pipeline.load_presets()
         self.init_ui()
 
     def init_ui(self):
@@ -107,12 +214,26 @@ class MainWindow(QMainWindow):
             "Лякальная парогавая апрацоўка (Gaussian)",
             "Лякальная парогавая апрацоўка (Mean)",
             "Глабальная парогавая апрацоўка (Mean)",
+            "Глабальная парогавая апрацоўка (Otsu)",
+            "Глабальная парогавая апрацоўка (Triangle)",
+            "Глабальная парогавая апрацоўка (Isodata)",
+            "Глабальная парогавая апрацоўка (Percentile)",
             "Інвертаваць колеры",
         ]
+        operations.extend(f"⛓ {name}" for name in self.presets)
         self.operation_combo.addItems(operations)
+        self.operation_combo.currentTextChanged.connect(lambda _: self.cancel_processing())
+        self.operation_combo.currentTextChanged.connect(self.preview_threshold)
         self.operation_combo.setStyleSheet("QComboBox{padding:10px;border:2px solid #4CAF50;border-radius:10px;background:white;font-size:14px;min-width:300px;}QComboBox::drop-down{border:none;width:30px;}QComboBox::down-arrow{border-left:5px solid transparent;border-right:5px solid transparent;border-top:5px solid #4CAF50;width:0px;height:0px;}")
         buttons_layout.addWidget(self.operation_combo)
 
+        self.color_mode_combo = QComboBox()
+        self.color_mode_combo.setFixedWidth(200)
+        self.color_mode_combo.addItems(list(ImageProcessor.COLOR_MODES))
+        self.color_mode_combo.currentTextChanged.connect(lambda _: self.cancel_processing())
+        self.color_mode_combo.setStyleSheet("QComboBox{padding:10px;border:2px solid #4CAF50;border-radius:10px;background:white;font-size:14px;}QComboBox::drop-down{border:none;width:30px;}QComboBox::down-arrow{border-left:5px solid transparent;border-right:5px solid transparent;border-top:5px solid #4CAF50;width:0px;height:0px;}")
+        buttons_layout.addWidget(self.color_mode_combo)
+
         self.process_btn = QPushButton("⚡ Апрацаваць")
         self.process_btn.clicked.connect(self.process_image)
         self.process_btn.setStyleSheet(self.get_process_button_style())
@@ -120,6 +241,13 @@ class MainWindow(QMainWindow):
         self.process_btn.setEnabled(False)
         buttons_layout.addWidget(self.process_btn)
 
+        self.stop_btn = QPushButton("⛔ Спыніць")
+        self.stop_btn.clicked.connect(self.stop_processing)
+        self.stop_btn.setStyleSheet(self.get_button_style())
+        self.stop_btn.setFixedSize(150, 50)
+        self.stop_btn.setEnabled(False)
+        buttons_layout.addWidget(self.stop_btn)
+
         layout.addLayout(buttons_layout)
 
         bottom_layout = QHBoxLayout()
@@ -161,25 +289,18 @@ class MainWindow(QMainWindow):
         original_layout = QVBoxLayout(original_frame)
         original_layout.setAlignment(Qt.AlignCenter)
 
-        self.original_label = QLabel()
-        self.original_label.setAlignment(Qt.AlignCenter)
-        self.original_label.setMinimumSize(600, 500)
-        self.original_label.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-        self.original_label.setStyleSheet("QLabel{background:#f8f9fa;border:3px dashed #dee2e6;border-radius:15px;color:#6c757d;font-size:16px;}")
-        self.original_label.setText("Тут будзе арыгінальная выява")
-        original_layout.addWidget(self.original_label)
+        self.original_view = TiledImageView("Тут будзе арыгінальная выява")
+        original_layout.addWidget(self.original_view)
 
         processed_frame = QGroupBox("Апрацаваная выява")
         processed_layout = QVBoxLayout(processed_frame)
         processed_layout.setAlignment(Qt.AlignCenter)
 
-        self.processed_label = QLabel()
-        self.processed_label.setAlignment(Qt.AlignCenter)
-        self.processed_label.setMinimumSize(600, 500)
-        self.processed_label.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-        self.processed_label.setStyleSheet("QLabel{background:#f8f9fa;border:3px dashed #dee2e6;border-radius:15px;color:#6c757d;font-size:16px;}")
-        self.processed_label.setText("Тут будзе апрацаваная выява")
-        processed_layout.addWidget(self.processed_label)
+        self.processed_view = TiledImageView("Тут будзе апрацаваная выява")
+        processed_layout.addWidget(self.processed_view)
+
+        # Колца мышы маштабуе, перацягванне зрушвае, падвойны націск падганяе пад памер
+        link_views(self.original_view, self.processed_view)
 
         compare_layout.addWidget(original_frame)
         compare_layout.addWidget(processed_frame)
@@ -198,49 +319,69 @@ class MainWindow(QMainWindow):
         return "QPushButton{background:#2E7D32;color:white;font-weight:bold;padding:12px;border-radius:10px;font-size:13px;border:none;}QPushButton:hover{background:#1B5E20;}QPushButton:pressed{background:#0D4010;}QPushButton:disabled{background:#E8F5E8;color:#A5D6A7;border:2px solid #C8E6C9;}"
 
     def load_image(self):
-        file_path, _ = QFileDialog.getOpenFileName(self, "Загрузіць выяву", "", "Image Files (*.png *.jpg *.jpeg *.bmp *.tiff);;All Files (*)")
+        file_path, _ = QFileDialog.getOpenFileName(self, "Загрузіць выяву", "", "Image Files (*.png *.jpg *.jpeg *.bmp *.tif *.tiff *.ppm *.pgm *.npy);;All Files (*)")
 
         if file_path:
             try:
-                pil_image = Image.open(file_path)
-                self.original_image = np.array(pil_image.convert('RGB'))
-                self.current_image = self.original_image.copy()
-                self.processed_image = None
-
-                self.display_image(self.original_image, self.original_label)
-
-                self.processed_label.clear()
-                self.processed_label.setText("Тут будзе апрацаваная выява")
+                self.cancel_processing()
+                self.release_images()
+
+                width, height = image_size(file_path)
+                if os.path.splitext(file_path)[1].lower() == '.npy':
+                    self.disk_image = DiskImage(file_path, OUT_OF_CORE_BAND_ROWS)
+                elif width * height > OUT_OF_CORE_PIXELS:
+                    try:
+                        self.disk_image = DiskImage(file_path, OUT_OF_CORE_BAND_ROWS)
+                    except ValueError:
+                        # Сціснутыя фарматы раскадзіроўваюцца толькі цалкам
+                        self.disk_image = None
+
+                if self.disk_image is not None:
+                    # Выява застаецца на дыску: прагляд чытае толькі бачныя пліткі,
+                    # а апрацоўка ідзе палосамі (process_out_of_core)
+                    self.original_image = self.disk_image.array
+                    self.histogram = band_histogram(self.original_image, OUT_OF_CORE_BAND_ROWS)
+                    self.pyramid = strided_pyramid(self.original_image)
+                    self.image_digest = None
+                else:
+                    with Image.open(file_path) as pil_image:
+                        self.original_image = np.array(pil_image.convert('RGB'))
+                    self.histogram = ImageProcessor.histogram(ImageProcessor.cache_luminance(self.original_image))
+                    self.pyramid = ImageProcessor.build_pyramid(self.original_image)
+                    self.image_digest = image_digest(self.original_image)
+                # Выява не змяняецца на месцы, таму асобная копія не патрэбна
+                self.current_image = self.original_image
+
+                self.original_view.set_source(PyramidTileSource(self.pyramid))
+                self.processed_view.clear("Тут будзе апрацаваная выява")
 
                 self.process_btn.setEnabled(True)
                 self.save_btn.setEnabled(False)
 
-                height, width = self.original_image.shape[:2]
-                self.info_label.setText(f"📊 Памер: {width}×{height}\n🎯 Фармат: RGB\n💾 Загружана: {os.path.basename(file_path)}")
+                mode = "out-of-core (memmap)" if self.disk_image is not None else "RGB"
+                self.info_label.setText(f"📊 Памер: {width}×{height}\n🎯 Фармат: {mode}\n💾 Загружана: {os.path.basename(file_path)}")
+                self.preview_threshold(self.operation_combo.currentText())
 
             except Exception as e:
+                self.release_images()
+                self.process_btn.setEnabled(False)
                 QMessageBox.critical(self, "Памылка", f"Не атрымалася загрузіць выяву: {str(e)}")
 
-    def display_image(self, image, label):
-        if image is None:
-            return
-
-        try:
-            if len(image.shape) == 3:
-                h, w, ch = image.shape
-                bytes_per_line = ch * w
-                q_img = QImage(image.data, w, h, bytes_per_line, QImage.Format_RGB888)
-            else:
-                h, w = image.shape
-                q_img = QImage(image.data, w, h, w, QImage.Format_Grayscale8)
-
-            pixmap = QPixmap.fromImage(q_img)
-            label_size = label.size()
-            scaled_pixmap = pixmap.scaled(label_size.width() - 20, label_size.height() - 20, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            label.setPixmap(scaled_pixmap)
-
-        except Exception as e:
-            print(f"Памылка адлюстравання выявы: {e}")
+    def release_images(self):
+        """Забыць загружаную выяву і вынік, выдаліць часовыя файлы рэжыму out-of-core"""
+        discard_result(self.processed_image)
+        self.current_image = self.original_image = self.processed_image = None
+        self.histogram = self.pyramid = self.image_digest = None
+        self.original_view.clear()
+        self.processed_view.clear()
+        if self.disk_image is not None:
+            self.disk_image.close()
+            self.disk_image = None
+
+    def closeEvent(self, event):
+        self.cancel_processing()
+        self.release_images()
+        super().closeEvent(event)
 
     def process_image(self):
         if self.current_image is None:
@@ -252,25 +393,131 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Увага", "Выберыце метад апрацоўкі!")
             return
 
+        # Парогавыя вынікі захоўваюцца як BinaryImage (1 біт на піксель)
+        params = {"packed": True}
+        color_mode = ImageProcessor.COLOR_MODES[self.color_mode_combo.currentText()]
+        if color_mode != "gray":
+            params["color_mode"] = color_mode
+        if operation.startswith("⛓ "):
+            operation = self.presets[operation[2:]]
+        elif operation in ImageProcessor.HISTOGRAM_METHODS and color_mode == "gray":
+            params["hist"] = self.histogram
+
+        if self.disk_image is not None and ImageProcessor.get_halo(operation, params) is None \
+                and (hasattr(operation, "steps") or color_mode != "gray"):
+            QMessageBox.warning(self, "Увага", "Глабальныя ланцужкі і колеравыя рэжымы не падтрымліваюцца "
+                                              "для выяў, апрацаваных па палосах з дыска")
+            return
+
+        self.cancel_processing()
+        job_id = self.job_id
+
+        # Вынікі выяў на дыску не кэшуюцца ў памяці
+        self.cache_key = None
+        if self.disk_image is None:
+            self.cache_key = self.result_cache.make_key(self.image_digest, operation, params)
+            cached = self.result_cache.get(self.cache_key)
+            if cached is not None:
+                self.on_processing_finished(cached, job_id)
+                return
+
         self.progress_bar.setVisible(True)
-        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
         self.process_btn.setEnabled(False)
+        self.stop_btn.setEnabled(True)
+
+        # Пакуль поўная выява апрацоўваецца, бачныя пліткі вылічваюцца па запыце
+        self.processed_view.set_source(ProcessedTileSource(self.pyramid, operation, params, self.histogram),
+                                       view_from=self.original_view)
+        self.info_label.setText("👁️ Папярэдні прагляд\n⏳ Апрацоўка поўнай выявы...")
+
+        self.start_processing(self.current_image, operation, params, job_id)
 
-        self.processing_thread = ProcessingThread(self.current_image, operation, {})
-        self.processing_thread.finished.connect(self.on_processing_finished)
-        self.processing_thread.start()
+    def start_processing(self, image, operation, params, job_id):
+        self.processing_threads = [t for t in self.processing_threads if t.isRunning()]
+
+        if self.disk_image is not None:
+            fd, output_path = tempfile.mkstemp(suffix='.npy')
+            os.close(fd)
+            thread = OutOfCoreThread(image, operation, params, output_path)
+        else:
+            thread = ProcessingThread(image, operation, params)
+        thread.finished.connect(lambda result: self.on_processing_finished(result, job_id))
+        thread.progress.connect(lambda fraction: self.on_processing_progress(fraction, job_id))
+        self.current_job = thread
+        self.processing_threads.append(thread)
+        thread.start()
+
+    def on_processing_progress(self, fraction, job_id):
+        if job_id == self.job_id:
+            self.progress_bar.setValue(int(fraction * 100))
+
+    def stop_processing(self):
+        self.cancel_processing()
+        self.info_label.setText("⛔ Апрацоўка спынена")
+
+    def cancel_processing(self):
+        """Адмяніць бягучую апрацоўку: вынікі старых задач ігнаруюцца"""
+        self.job_id += 1
+        self.current_job = None
+        for thread in self.processing_threads:
+            thread.requestInterruption()
+
+        self.progress_bar.setVisible(False)
+        self.process_btn.setEnabled(self.current_image is not None)
+        self.stop_btn.setEnabled(False)
+
+    def preview_threshold(self, operation):
+        """
+        Мгненны прагляд глабальнага парога: парог бярэцца з гістаграмы
+        ўсёй выявы і прымяняецца толькі да бачных плітак піраміды (узровень
+        0 - кэшаваная яркасць). Поўная апрацоўка - па кнопцы «Апрацаваць».
+        """
+        method = ImageProcessor.HISTOGRAM_METHODS.get(operation)
+        if method is None or self.histogram is None:
+            return
+        if ImageProcessor.COLOR_MODES[self.color_mode_combo.currentText()] != "gray":
+            return
+
+        threshold_value = ImageProcessor.threshold_from_histogram(self.histogram, method)
+        # Прагляд замяняе ранейшы вынік у праглядзе, таму захоўваць няма чаго
+        discard_result(self.processed_image)
+        self.processed_image = None
+        self.save_btn.setEnabled(False)
+        self.processed_view.set_source(ProcessedTileSource(self.pyramid, operation, {}, self.histogram),
+                                       view_from=self.original_view)
+        self.info_label.setText(f"👁️ Папярэдні прагляд, парог ({method}): {threshold_value}\n"
+                                f"⚡ Націсніце «Апрацаваць» для прымянення")
+
+    def on_processing_finished(self, result, job_id=None):
+        if job_id is not None and job_id != self.job_id:
+            discard_result(result)
+            return
 
-    def on_processing_finished(self, result):
         self.progress_bar.setVisible(False)
-        self.progress_bar.setRange(0, 100)
         self.process_btn.setEnabled(True)
+        self.stop_btn.setEnabled(False)
 
         if result is not None:
+            if self.processed_image is not result:
+                discard_result(self.processed_image)
             self.processed_image = result
-            self.display_image(self.processed_image, self.processed_label)
+            if isinstance(result, np.memmap):
+                source = PyramidTileSource(strided_pyramid(result))
+            else:
+                self.result_cache.put(self.cache_key, result)
+                source = ResultTileSource(self.processed_image)
+            self.processed_view.set_source(source, view_from=self.original_view)
             self.save_btn.setEnabled(True)
             operation = self.operation_combo.currentText()
-            self.info_label.setText(f"✅ Апрацавана: {operation}\n💾 Вынік гатовы да захавання")
+            timing = ""
+            if self.current_job is not None and self.current_job.elapsed:
+                timing = (f"⏱️ {self.current_job.elapsed:.2f} с, "
+                          f"{self.current_job.megapixels_per_second:.1f} Мпікс/с\n")
+            self.current_job = None
+            self.info_label.setText(f"✅ Апрацавана: {operation}\n{timing}💾 Вынік гатовы да захавання\n"
+                                    f"{self.result_cache.stats_text()}")
         else:
             QMessageBox.critical(self, "Памылка", "Не атрымалася апрацаваць выяву!")
 
@@ -279,14 +526,30 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Увага", "Няма апрацаванай выявы для захавання!")
             return
 
-        file_path, _ = QFileDialog.getSaveFileName(self, "Захаваць выяву", "", "PNG Files (*.png);;JPEG Files (*.jpg);;All Files (*)")
+        if isinstance(self.processed_image, np.memmap):
+            # Вынік на дыску пішацца палосамі ў фарматы без сціску
+            filters = OUT_OF_CORE_SAVE_FILTERS
+        else:
+            filters = {f"{name} (*{profile['extension']})": name for name, profile in ENCODER_PROFILES.items()}
+        file_path, selected_filter = QFileDialog.getSaveFileName(self, "Захаваць выяву", "", ";;".join(filters))
 
         if file_path:
-            try:
-                from PIL import Image as PILImage
-                pil_image = PILImage.fromarray(self.processed_image)
-                pil_image.save(file_path)
-                QMessageBox.information(self, "Паспяхова", f"Выява захавана ў: {file_path}")
-                self.info_label.setText(f"💾 Выява паспяхова захавана!")
-            except Exception as e:
-                QMessageBox.critical(self, "Памылка", f"Памылка пры захаванні: {str(e)}")
+            if filters is OUT_OF_CORE_SAVE_FILTERS:
+                profile = None
+                if os.path.splitext(file_path)[1].lower() not in OUT_OF_CORE_SAVE_FILTERS.values():
+                    file_path += filters.get(selected_filter, ".ppm")
+            else:
+                file_path, profile = save_target(file_path, filters.get(selected_filter))
+
+            self.save_threads = [t for t in self.save_threads if t.isRunning()]
+            thread = SaveThread(self.processed_image, file_path, profile)
+            thread.finished.connect(self.on_save_finished)
+            self.save_threads.append(thread)
+            thread.start()
+            self.info_label.setText(f"⏳ Захаванне: {os.path.basename(file_path)}...")
+
+    def on_save_finished(self, file_path, error):
+        if error:
+            QMessageBox.critical(self, "Памылка", f"Памылка пры захаванні: {error}")
+        else:
+            self.info_label.setText(f"💾 Выява паспяхова захавана!\n{file_path}")